@@ -0,0 +1,256 @@
+from threading import Thread, Event, Condition
+from collections import deque
+from typing import Optional, Tuple
+import logging
+import math
+import numpy as np
+import speech_recognition as sr
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE_DEFAULT = 16000
+CHUNK_SIZE_DEFAULT = 1600  # 100 ms at 16 kHz
+BUFFER_SECONDS_DEFAULT = 10.0
+CALIBRATION_SECONDS_DEFAULT = 0.5
+SPEECH_ENERGY_RATIO_DEFAULT = 1.5
+MIN_ENERGY_THRESHOLD = 300.0  # speech_recognition's default energy threshold
+PAUSE_THRESHOLD_DEFAULT = 0.8
+PRE_ROLL_SECONDS = 0.3
+NOISE_SMOOTHING = 0.05
+NOISE_RESET_SECONDS = 5.0  # A "phrase" louder than the floor for this long is new background noise
+VAD_AGGRESSIVENESS_DEFAULT = 2
+VAD_FRAME_MS = 20
+VAD_MODES = ("auto", "webrtc", "energy")
+
+
+class WebRtcVad:
+    """
+    Speech/non-speech classifier using the WebRTC voice activity detector.
+
+    Far more robust to steady background noise (fans, music) than an energy
+    threshold. A chunk counts as speech when most of its 20 ms frames do.
+    """
+
+    def __init__(self, sample_rate: int, aggressiveness: int = VAD_AGGRESSIVENESS_DEFAULT):
+        import webrtcvad
+        if sample_rate not in (8000, 16000, 32000, 48000):
+            raise ValueError(f"WebRTC VAD does not support {sample_rate} Hz audio")
+        self.vad = webrtcvad.Vad(aggressiveness)
+        self.sample_rate = sample_rate
+        self.frame_bytes = sample_rate * VAD_FRAME_MS // 1000 * 2
+
+    def is_speech(self, chunk: bytes) -> bool:
+        frames = [chunk[i:i + self.frame_bytes]
+                  for i in range(0, len(chunk) - self.frame_bytes + 1, self.frame_bytes)]
+        voiced = sum(self.vad.is_speech(frame, self.sample_rate) for frame in frames)
+        return voiced * 2 > len(frames)
+
+
+def create_vad(mode: str, sample_rate: int,
+               aggressiveness: int = VAD_AGGRESSIVENESS_DEFAULT) -> Optional[WebRtcVad]:
+    """Create a voice activity detector; None means the energy threshold is used."""
+    if mode not in VAD_MODES:
+        raise ValueError(f"Unknown VAD '{mode}'. Choose from: {', '.join(VAD_MODES)}")
+    if mode == "energy":
+        return None
+    try:
+        return WebRtcVad(sample_rate, aggressiveness)
+    except Exception as e:
+        if mode == "webrtc":
+            raise
+        logger.warning(f"WebRTC VAD unavailable ({e}), using energy threshold")
+        return None
+
+
+class AudioStream:
+    """
+    One long-lived microphone stream feeding a ring buffer of audio chunks.
+
+    The device is opened once. A capture thread reads fixed-size chunks into
+    the ring together with a speech flag, so audio keeps being recorded
+    while earlier speech is being recognized. The noise floor is calibrated
+    once from the first `calibration_seconds` of audio and then tracked in
+    the background from non-speech chunks. Each chunk is classified as
+    speech or not on the capture thread, by `vad` if given, otherwise by
+    its energy exceeding the floor by `speech_energy_ratio`.
+    """
+
+    def __init__(self, sample_rate: int = SAMPLE_RATE_DEFAULT,
+                 chunk_size: int = CHUNK_SIZE_DEFAULT,
+                 buffer_seconds: float = BUFFER_SECONDS_DEFAULT,
+                 calibration_seconds: float = CALIBRATION_SECONDS_DEFAULT,
+                 speech_energy_ratio: float = SPEECH_ENERGY_RATIO_DEFAULT,
+                 device_index: Optional[int] = None,
+                 vad: Optional[WebRtcVad] = None):
+        self.sample_rate = sample_rate
+        self.chunk_size = chunk_size
+        self.chunk_seconds = chunk_size / sample_rate
+        self.calibration_chunks = max(1, round(calibration_seconds / self.chunk_seconds))
+        self.speech_energy_ratio = speech_energy_ratio
+        self.device_index = device_index
+        self.vad = vad
+        self.noise_floor: Optional[float] = None
+        self.overruns = 0
+        self.closed = True
+        self.stop_event = Event()
+        self.capture_thread = None
+        self._chunks = deque(maxlen=max(1, math.ceil(buffer_seconds / self.chunk_seconds)))
+        self._cond = Condition()
+        self._seq = 0  # Chunks written since start
+        self._read_seq = 0
+        self._calibration = []
+        self._loud_chunks = 0
+
+    @property
+    def energy_threshold(self) -> float:
+        """RMS energy above which a chunk counts as speech."""
+        if self.noise_floor is None:
+            return MIN_ENERGY_THRESHOLD
+        return max(MIN_ENERGY_THRESHOLD, self.noise_floor * self.speech_energy_ratio)
+
+    @staticmethod
+    def rms(chunk: bytes) -> float:
+        samples = np.frombuffer(chunk, dtype=np.int16).astype(np.float32)
+        return float(np.sqrt(np.mean(samples * samples))) if len(samples) else 0.0
+
+    def _track_noise(self, energy: float) -> None:
+        if self.noise_floor is None:
+            self._calibration.append(energy)
+            if len(self._calibration) >= self.calibration_chunks:
+                self.noise_floor = float(np.mean(self._calibration))
+                self._calibration = []
+                logger.info(f"Microphone noise floor calibrated: {self.noise_floor:.0f}")
+            return
+        if energy <= self.energy_threshold:
+            self._loud_chunks = 0
+            self.noise_floor += NOISE_SMOOTHING * (energy - self.noise_floor)
+        else:
+            self._loud_chunks += 1
+            if self._loud_chunks * self.chunk_seconds >= NOISE_RESET_SECONDS:
+                self.noise_floor += NOISE_SMOOTHING * (energy - self.noise_floor)
+
+    def write(self, chunk: bytes) -> None:
+        """Classify a captured chunk, append it to the ring and wake the reader."""
+        energy = self.rms(chunk)
+        self._track_noise(energy)
+        if self.vad is not None:
+            speech = self.vad.is_speech(chunk)
+        else:
+            speech = energy > self.energy_threshold
+        with self._cond:
+            self._chunks.append((chunk, speech))
+            self._seq += 1
+            self._cond.notify_all()
+
+    def read(self, timeout: Optional[float] = None) -> Optional[Tuple[bytes, bool]]:
+        """
+        Return the next unread (chunk, is_speech), waiting for it if needed.
+
+        If the reader has fallen more than the ring's length behind, the
+        oldest chunks are gone; it skips ahead and counts an overrun.
+
+        Returns:
+            (chunk, is_speech), or None on timeout or once the stream is closed.
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._read_seq < self._seq or self.closed, timeout):
+                return None
+            if self._read_seq >= self._seq:
+                return None
+            oldest = self._seq - len(self._chunks)
+            if self._read_seq < oldest:
+                self.overruns += oldest - self._read_seq
+                self._read_seq = oldest
+            item = self._chunks[self._read_seq - oldest]
+            self._read_seq += 1
+            return item
+
+    def read_chunk(self) -> bytes:
+        """Next chunk of raw 16-bit mono PCM, or b"" once the stream is closed."""
+        item = self.read()
+        return item[0] if item else b""
+
+    def listen(self, timeout: Optional[float] = None, phrase_time_limit: Optional[float] = None,
+               pause_threshold: float = PAUSE_THRESHOLD_DEFAULT) -> sr.AudioData:
+        """
+        Cut the next phrase out of the buffer, like speech_recognition's Recognizer.listen.
+
+        A phrase starts at the first speech chunk (plus a short pre-roll) and
+        ends after `pause_threshold` seconds without speech.
+
+        Timeouts are measured in audio time, so audio that arrived while the
+        previous phrase was being recognized is not lost.
+
+        Raises:
+            sr.WaitTimeoutError: No speech started within `timeout` seconds.
+            EOFError: The stream was closed.
+        """
+        pre_roll = deque(maxlen=max(1, round(PRE_ROLL_SECONDS / self.chunk_seconds)))
+        waited = 0.0
+        while True:
+            item = self.read()
+            if item is None:
+                raise EOFError("Audio stream closed")
+            chunk, speech = item
+            if speech:
+                break
+            pre_roll.append(chunk)
+            waited += self.chunk_seconds
+            if timeout and waited >= timeout:
+                raise sr.WaitTimeoutError("listening timed out while waiting for phrase to start")
+
+        frames = list(pre_roll)
+        frames.append(chunk)
+        phrase = silence = 0.0
+        while phrase_time_limit is None or phrase < phrase_time_limit:
+            item = self.read()
+            if item is None:
+                break
+            chunk, speech = item
+            frames.append(chunk)
+            phrase += self.chunk_seconds
+            if speech:
+                silence = 0.0
+            else:
+                silence += self.chunk_seconds
+                if silence >= pause_threshold:
+                    break
+        return sr.AudioData(b"".join(frames), self.sample_rate, 2)
+
+    def capture_audio(self):
+        """Capture loop: read the microphone into the ring until stopped."""
+        try:
+            with sr.Microphone(device_index=self.device_index, sample_rate=self.sample_rate,
+                               chunk_size=self.chunk_size) as source:
+                while not self.stop_event.is_set():
+                    self.write(source.stream.read(source.CHUNK))
+        except Exception as e:
+            logger.error(f"Error in audio capture loop: {e}")
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        """Wake the reader; no more audio will arrive."""
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    def start(self):
+        """Open the microphone and start capturing in a separate thread."""
+        if self.capture_thread is None or not self.capture_thread.is_alive():
+            self.stop_event.clear()
+            with self._cond:
+                self.closed = False
+                self._chunks.clear()
+                self._seq = self._read_seq = 0
+            self.capture_thread = Thread(target=self.capture_audio,
+                                         name="AudioCaptureThread")
+            self.capture_thread.daemon = True
+            self.capture_thread.start()
+
+    def stop(self):
+        """Stop capturing and close the microphone."""
+        self.stop_event.set()
+        self.close()
+        if self.capture_thread and self.capture_thread.is_alive():
+            self.capture_thread.join(timeout=2)
@@ -0,0 +1,183 @@
+"""
+Offline replay and benchmark harness for the face pipeline.
+
+Drives FaceController.process_face_tracking at full speed from a recorded
+video, an image directory or a landmark dump, with input injected into an
+in-memory recorder instead of the desktop. Runs without a camera or display:
+
+    python benchmark.py --video clip.mp4 --json results.json
+    python benchmark.py --images frames/ --record-landmarks clip.npz
+    python benchmark.py --landmarks clip.npz
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from collections import defaultdict
+import numpy as np
+
+from facecontroller import FaceController
+from framesource import open_frame_source, save_landmark_stream
+from inputdispatcher import InputDispatcher, RecordingBackend
+
+logger = logging.getLogger(__name__)
+
+PERCENTILES = (50, 90, 99)
+
+# Settings that make a replay run at maximum speed and deterministically
+BENCHMARK_OVERRIDES = {
+    "headless": True,
+    "preview_fps": 0,
+    "target_fps": 0,
+    "idle_fps": 0,
+    "target_latency_ms": 0,
+    "cursor_refresh_hz": 0,
+    "input_backend": "recorder",
+    "display_backend": "single",
+}
+
+
+class RecordingKeyboard:
+    """Stands in for the VirtualKeyboard window and counts open/close toggles."""
+
+    def __init__(self):
+        self.opened = 0
+        self.closed = 0
+
+    def start(self, *args, **kwargs):
+        self.opened += 1
+
+    def stop(self):
+        self.closed += 1
+
+
+def summarize_events(backend: RecordingBackend) -> dict:
+    """Count recorded input events, split by mouse button and scroll direction."""
+    counts = defaultdict(int)
+    for _, op, args in backend.events:
+        if op in ("mouse_down", "mouse_up"):
+            counts[f"{op}:{args[0]}"] += 1
+        elif op == "scroll":
+            counts["scroll:up" if args[0] > 0 else "scroll:down"] += 1
+        else:
+            counts[op] += 1
+    return dict(sorted(counts.items()))
+
+
+def run_benchmark(source_spec: str, max_frames: int = 0, record_landmarks: str = None,
+                  config_path: str = None) -> dict:
+    """
+    Replay a frame source through the face pipeline and return the results.
+
+    Settings come from `config_path`, or are the defaults if it is None; the
+    face controller config in the working directory is never read or written.
+    """
+    if config_path is None:
+        with tempfile.TemporaryDirectory() as directory:
+            return run_benchmark(source_spec, max_frames, record_landmarks,
+                                 os.path.join(directory, "face_controller_config.json"))
+    source = open_frame_source(source_spec)
+    backend = RecordingBackend()
+    InputDispatcher().set_backend(backend)
+    controller = FaceController(frame_source=source, config_overrides=BENCHMARK_OVERRIDES,
+                                config_path=config_path)
+    keyboard = RecordingKeyboard()
+    controller.virtual_keyboard = keyboard
+
+    samples = defaultdict(list)
+    controller.stage_listeners.append(lambda stage, seconds: samples[stage].append(seconds))
+
+    frames = []
+    timestamps = []
+    frame_size = [0, 0]
+    detect = controller.detect_landmarks
+
+    def counting_detect(frame, recorded=None):
+        points = detect(frame, recorded)
+        frame_size[:] = frame.shape[1], frame.shape[0]
+        frames.append(points.copy() if points is not None else None)
+        buffer = controller.frame_buffer
+        timestamps.append(buffer.timestamps[buffer.reading_index])
+        if max_frames and len(frames) >= max_frames:
+            controller.stop_event.set()
+        return points
+
+    controller.detect_landmarks = counting_detect
+
+    started = time.perf_counter()
+    controller.process_face_tracking()
+    elapsed = time.perf_counter() - started
+    controller.output.flush(timeout=5)
+
+    if record_landmarks:
+        save_landmark_stream(record_landmarks, frames, frame_size, timestamps)
+        logger.info(f"Wrote {len(frames)} frames of landmarks to {record_landmarks}")
+
+    stages = {}
+    for stage, values in samples.items():
+        values = np.asarray(values) * 1000
+        stages[stage] = {
+            "count": len(values),
+            "mean_ms": round(float(values.mean()), 3),
+            **{f"p{p}_ms": round(float(np.percentile(values, p)), 3) for p in PERCENTILES},
+            "max_ms": round(float(values.max()), 3),
+        }
+
+    events = summarize_events(backend)
+    # Moves the pipeline asked for; move_to counts what survived dispatcher coalescing
+    events["cursor_targets"] = controller.cursor_motion.moves_sent
+    events["keyboard_open"] = keyboard.opened
+    events["keyboard_close"] = keyboard.closed
+    return {
+        "source": source_spec,
+        "frames": len(frames),
+        "faces": sum(points is not None for points in frames),
+        "seconds": round(elapsed, 3),
+        "fps": round(len(frames) / elapsed, 2) if elapsed > 0 else 0.0,
+        "stages": stages,
+        "events": events,
+    }
+
+
+def print_report(results: dict) -> None:
+    print(f"Source: {results['source']}")
+    print(f"Frames: {results['frames']} ({results['faces']} with a face) in "
+          f"{results['seconds']:.2f}s -> {results['fps']:.1f} FPS")
+    print(f"{'stage':<12}{'count':>8}{'mean':>10}" +
+          "".join(f"{'p' + str(p):>10}" for p in PERCENTILES) + f"{'max':>10}")
+    for stage, stats in results["stages"].items():
+        print(f"{stage:<12}{stats['count']:>8}{stats['mean_ms']:>10.2f}" +
+              "".join(f"{stats[f'p{p}_ms']:>10.2f}" for p in PERCENTILES) +
+              f"{stats['max_ms']:>10.2f}")
+    print("Events: " + ", ".join(f"{name}={count}" for name, count in results["events"].items()))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Replay recorded input through the face pipeline.")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--video", help="Recorded video file")
+    group.add_argument("--images", help="Directory of frame images")
+    group.add_argument("--landmarks", help="Landmark dump (.npz) written with --record-landmarks")
+    parser.add_argument("--max-frames", type=int, default=0, help="Stop after this many frames")
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    parser.add_argument("--record-landmarks", help="Save detected landmarks to this .npz file")
+    parser.add_argument("--config", help="Face controller config to take settings from "
+                                         "(default: built-in defaults)")
+    args = parser.parse_args(argv)
+
+    results = run_benchmark(args.video or args.images or args.landmarks,
+                            max_frames=args.max_frames,
+                            record_landmarks=args.record_landmarks,
+                            config_path=args.config)
+    print_report(results)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=4)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+from threading import Thread, Event, Lock
+from typing import Optional, Tuple
+import logging
+import math
+import sys
+import time
+
+logger = logging.getLogger(__name__)
+
+CURSOR_REFRESH_HZ_DEFAULT = 60
+CURSOR_DEADBAND_PX_DEFAULT = 1.0
+MAX_EXTRAPOLATION = 0.1  # Never predict further ahead than this many seconds
+IDLE_TIMEOUT = 0.5  # Park the motion thread once the target has been still this long
+VELOCITY_SMOOTHING = 0.5
+
+
+class CursorMotion:
+    """
+    Drives the cursor at display refresh rate from sparse landmark updates.
+
+    Each camera frame only sets a new target. The motion thread follows the
+    target every tick and extrapolates it from a velocity estimate between
+    updates, so motion stays smooth even though targets arrive at camera rate.
+    Moves smaller than `deadband_px` are dropped. Once the cursor has settled,
+    the thread sleeps until the next target arrives.
+
+    Velocity and extrapolation are timed from the frames' capture timestamps
+    (`time.time()` for a live camera), not from when the targets arrive, so
+    uneven processing time does not show up as speed changes and the
+    prediction also covers the time a frame spent in the pipeline.
+    """
+
+    def __init__(self, output, refresh_hz: float = CURSOR_REFRESH_HZ_DEFAULT,
+                 deadband_px: float = CURSOR_DEADBAND_PX_DEFAULT):
+        self.output = output
+        self.refresh_hz = refresh_hz
+        self.deadband_px = deadband_px
+        self.bounds: Optional[Tuple[float, float, float, float]] = None  # min_x, min_y, max_x, max_y
+        self.stop_event = Event()
+        self.motion_thread = None
+        self.moves_sent = 0
+        self.moves_skipped = 0
+        self._lock = Lock()
+        self._wake = Event()
+        self._target: Optional[Tuple[float, float]] = None
+        self._target_time = 0.0
+        self._velocity = (0.0, 0.0)
+        self._update_interval = 1.0 / 30
+        self._position: Optional[Tuple[float, float]] = None
+        self._sent: Optional[Tuple[float, float]] = None
+        self._timer_raised = False
+
+    def set_bounds(self, min_x: float, min_y: float, max_x: float, max_y: float) -> None:
+        """Keep extrapolated positions inside this rectangle."""
+        self.bounds = (min_x, min_y, max_x, max_y)
+
+    def set_target(self, x: float, y: float, timestamp: Optional[float] = None) -> None:
+        """
+        Record a new cursor target from a processed frame.
+
+        Args:
+            x, y: Target position in desktop pixels.
+            timestamp: Capture time of the frame, in `time.time()` seconds;
+                now if None.
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._lock:
+            if self._target is not None:
+                dt = timestamp - self._target_time
+                if 0 < dt < IDLE_TIMEOUT:
+                    vx = (x - self._target[0]) / dt
+                    vy = (y - self._target[1]) / dt
+                    self._velocity = (
+                        self._velocity[0] + VELOCITY_SMOOTHING * (vx - self._velocity[0]),
+                        self._velocity[1] + VELOCITY_SMOOTHING * (vy - self._velocity[1]))
+                    self._update_interval += VELOCITY_SMOOTHING * (dt - self._update_interval)
+                else:
+                    self._velocity = (0.0, 0.0)
+            self._target = (x, y)
+            self._target_time = timestamp
+        if self.refresh_hz <= 0:
+            self._send(x, y)
+        else:
+            self._wake.set()
+
+    def _send(self, x: float, y: float) -> None:
+        if self._sent is not None and math.hypot(x - self._sent[0], y - self._sent[1]) < self.deadband_px:
+            self.moves_skipped += 1
+            return
+        self.output.move_to(x, y)
+        self._sent = (x, y)
+        self.moves_sent += 1
+
+    def _clamp(self, x: float, y: float) -> Tuple[float, float]:
+        if self.bounds is None:
+            return x, y
+        min_x, min_y, max_x, max_y = self.bounds
+        return max(min_x, min(max_x, x)), max(min_y, min(max_y, y))
+
+    def step(self, now: float, dt: float) -> bool:
+        """
+        Advance the cursor by one tick.
+
+        Args:
+            now: Current time on the frame timestamps' clock.
+            dt: Seconds since the previous tick.
+
+        Returns:
+            False once the cursor has settled on a target that is no longer moving.
+        """
+        with self._lock:
+            if self._target is None:
+                return False
+            age = max(0.0, now - self._target_time)
+            # Extrapolate for up to MAX_EXTRAPOLATION, then ease back onto the
+            # last real target if no further update arrives
+            lead = min(age, max(0.0, 2 * MAX_EXTRAPOLATION - age))
+            predicted = self._clamp(self._target[0] + self._velocity[0] * lead,
+                                    self._target[1] + self._velocity[1] * lead)
+            tau = max(self._update_interval / 2, 1e-3)
+        if self._position is None:
+            self._position = predicted
+        else:
+            follow = 1.0 - math.exp(-dt / tau)
+            self._position = (self._position[0] + (predicted[0] - self._position[0]) * follow,
+                              self._position[1] + (predicted[1] - self._position[1]) * follow)
+        self._send(*self._position)
+        settled = math.hypot(predicted[0] - self._position[0],
+                             predicted[1] - self._position[1]) < self.deadband_px
+        return not (settled and age > IDLE_TIMEOUT)
+
+    def motion_loop(self):
+        """Motion loop: tick at refresh rate while the cursor is moving."""
+        period = 1.0 / self.refresh_hz
+        last = time.perf_counter()
+        while not self.stop_event.is_set():
+            # Ticks are paced on the monotonic clock; targets are aged on the frames' clock
+            now = time.perf_counter()
+            self._wake.clear()  # Cleared before stepping so a new target is never missed
+            if not self.step(time.time(), now - last):
+                self._wake.wait()
+                last = time.perf_counter()
+                continue
+            last = now
+            next_tick = now + period - time.perf_counter()
+            if next_tick > 0:
+                self.stop_event.wait(next_tick)
+
+    def _set_timer_resolution(self, raise_it: bool) -> None:
+        # The default Windows timer tick (~15.6 ms) is too coarse for 60 Hz waits
+        if sys.platform != "win32" or raise_it == self._timer_raised:
+            return
+        try:
+            import ctypes
+            if raise_it:
+                ctypes.windll.winmm.timeBeginPeriod(1)
+            else:
+                ctypes.windll.winmm.timeEndPeriod(1)
+            self._timer_raised = raise_it
+        except Exception as e:
+            logger.debug(f"Could not change timer resolution: {e}")
+
+    def start(self):
+        """Start the motion thread."""
+        if self.refresh_hz <= 0:
+            return
+        if self.motion_thread is None or not self.motion_thread.is_alive():
+            self.stop_event.clear()
+            self._set_timer_resolution(True)
+            self.motion_thread = Thread(target=self.motion_loop,
+                                        name="CursorMotionThread")
+            self.motion_thread.daemon = True
+            self.motion_thread.start()
+
+    def stop(self):
+        """Stop the motion thread."""
+        self.stop_event.set()
+        self._wake.set()
+        if self.motion_thread and self.motion_thread.is_alive():
+            self.motion_thread.join(timeout=1)
+        self._set_timer_resolution(False)
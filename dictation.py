@@ -0,0 +1,101 @@
+from typing import List, Optional, Tuple
+from voicecommands import CommandMatcher
+
+# Spoken punctuation, attached to the preceding word
+PUNCTUATION = {
+    "period": ".",
+    "comma": ",",
+    "question mark": "?",
+    "exclamation mark": "!",
+    "colon": ":",
+    "semicolon": ";",
+}
+SENTENCE_END = ".?!"
+LINE_BREAKS = {
+    "new line": "\n",
+    "new paragraph": "\n\n",
+}
+# Editing commands: (input action, arguments), run between the typed text
+EDITS = {
+    "delete word": ("hotkey", ("ctrl", "backspace")),
+}
+EXIT_PHRASES = ("end dictation", "command mode")
+
+
+class Dictation:
+    """
+    Turns recognized speech into typing while dictation mode is on.
+
+    Each recognized phrase becomes as few input actions as possible: words,
+    punctuation and line breaks are joined into one `write`, and only
+    editing commands such as "delete word" split it. Spacing and
+    sentence capitalisation carry over from one phrase to the next.
+    """
+
+    def __init__(self):
+        self.active = False
+        self.matcher = CommandMatcher(list(PUNCTUATION) + list(LINE_BREAKS) + list(EDITS)
+                                      + list(EXIT_PHRASES))
+        self._space = False  # A space goes before the next word
+        self._capitalize = True
+
+    def start(self) -> None:
+        self.active = True
+        self._space = False
+        self._capitalize = True
+
+    def stop(self) -> None:
+        self.active = False
+
+    def _word(self, word: str) -> str:
+        if word == "i":
+            word = "I"
+        elif self._capitalize:
+            word = word[:1].upper() + word[1:]
+        text = " " + word if self._space else word
+        self._space, self._capitalize = True, False
+        return text
+
+    def translate(self, text: str) -> Tuple[List[Tuple[str, tuple]], Optional[str]]:
+        """
+        Translate one recognized phrase into input actions.
+
+        Returns:
+            ([(action, args), ...] in order; the text following an exit
+            phrase, to be run as commands, or None if dictation continues).
+        """
+        words = text.split()
+        actions = []
+        typed = []
+
+        def flush():
+            if typed:
+                actions.append(("write", ("".join(typed),)))
+                typed.clear()
+
+        position = 0
+        for start, end, phrase in self.matcher.scan(text)[0] + [(len(words), len(words), None)]:
+            typed.extend(self._word(word) for word in words[position:start])
+            position = end
+            if phrase is None:
+                break
+            if phrase in PUNCTUATION:
+                mark = PUNCTUATION[phrase]
+                typed.append(mark)
+                self._space = True
+                if mark in SENTENCE_END:
+                    self._capitalize = True
+            elif phrase in LINE_BREAKS:
+                typed.append(LINE_BREAKS[phrase])
+                self._space = False
+            elif phrase in EDITS:
+                flush()
+                actions.append(EDITS[phrase])
+                # Deleting a word leaves the space that preceded it
+                self._space = False
+            else:
+                flush()
+                self.stop()
+                return actions, " ".join(words[end:])
+        flush()
+        return actions, None
@@ -0,0 +1,338 @@
+from threading import Thread, Event
+from bisect import bisect_right
+from typing import Callable, Dict, List, Optional, Tuple
+import logging
+import os
+import re
+import shutil
+import subprocess
+import sys
+
+logger = logging.getLogger(__name__)
+
+DISPLAY_POLL_INTERVAL_DEFAULT = 2.0
+MONITOR_GAIN_DEFAULT = 1.0
+MONITOR_GAIN_MIN = 0.05
+# "xrandr --listmonitors" lines look like " 0: +*DP-1 2560/597x1440/336+0+0  DP-1"
+XRANDR_MONITOR = re.compile(r"^\s*\d+:\s+\+?(\*?)(\S+)\s+(\d+)/\d+x(\d+)/\d+([+-]\d+)([+-]\d+)")
+
+
+class Monitor:
+    """One monitor's rectangle in virtual desktop pixels and its DPI scale (1.0 = 96 DPI)."""
+
+    def __init__(self, name: str, x: int, y: int, width: int, height: int,
+                 scale: float = 1.0, primary: bool = False):
+        self.name = name
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.scale = scale
+        self.primary = primary
+
+    @property
+    def right(self) -> int:
+        return self.x + self.width
+
+    @property
+    def bottom(self) -> int:
+        return self.y + self.height
+
+    def _key(self) -> tuple:
+        return (self.name, self.x, self.y, self.width, self.height, self.scale, self.primary)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Monitor) and self._key() == other._key()
+
+    def __repr__(self) -> str:
+        primary = ", primary" if self.primary else ""
+        return f"{self.name} {self.width}x{self.height}{self.x:+d}{self.y:+d} @{self.scale:g}x{primary}"
+
+
+class DisplayBackend:
+    """Enumerates the monitors making up the desktop."""
+
+    name = "base"
+
+    def monitors(self) -> List[Monitor]:
+        raise NotImplementedError
+
+
+class SingleDisplayBackend(DisplayBackend):
+    """One screen of the size reported by the input backend."""
+
+    name = "single"
+
+    def __init__(self, size: Callable[[], Tuple[int, int]]):
+        self.size = size
+
+    def monitors(self):
+        width, height = self.size()
+        return [Monitor("screen", 0, 0, width, height, primary=True)]
+
+
+class XrandrDisplayBackend(DisplayBackend):
+    """
+    Linux/X11 monitors from the xrandr command line tool; also works on Xvfb.
+
+    X11 scales all monitors alike, so every monitor reports a scale of 1.0.
+    """
+
+    name = "xrandr"
+
+    def __init__(self):
+        if not shutil.which("xrandr"):
+            raise FileNotFoundError("xrandr is not installed")
+
+    def monitors(self):
+        output = subprocess.run(["xrandr", "--listmonitors"], capture_output=True, text=True,
+                                timeout=2, check=True).stdout
+        return parse_xrandr_monitors(output)
+
+
+def parse_xrandr_monitors(output: str) -> List[Monitor]:
+    """Monitors listed in the output of "xrandr --listmonitors"."""
+    monitors = []
+    for line in output.splitlines():
+        match = XRANDR_MONITOR.match(line)
+        if match:
+            primary, name, width, height, x, y = match.groups()
+            monitors.append(Monitor(name, int(x), int(y), int(width), int(height),
+                                    primary=bool(primary)))
+    return monitors
+
+
+class Win32DisplayBackend(DisplayBackend):
+    """Windows monitors from EnumDisplayMonitors, with per-monitor DPI where available."""
+
+    name = "win32"
+    MONITORINFOF_PRIMARY = 1
+    MDT_EFFECTIVE_DPI = 0
+
+    def __init__(self):
+        import ctypes
+        from ctypes import wintypes
+        self.ctypes = ctypes
+        self.user32 = ctypes.windll.user32
+        try:
+            self.shcore = ctypes.windll.shcore
+            # Per-monitor DPI aware, so monitor rectangles are in physical pixels
+            self.shcore.SetProcessDpiAwareness(2)
+        except (AttributeError, OSError):
+            self.shcore = None
+
+        class MONITORINFOEXW(ctypes.Structure):
+            _fields_ = [("cbSize", wintypes.DWORD), ("rcMonitor", wintypes.RECT),
+                        ("rcWork", wintypes.RECT), ("dwFlags", wintypes.DWORD),
+                        ("szDevice", wintypes.WCHAR * 32)]
+
+        self.MONITORINFOEXW = MONITORINFOEXW
+        self.MonitorEnumProc = ctypes.WINFUNCTYPE(wintypes.BOOL, wintypes.HMONITOR, wintypes.HDC,
+                                                  ctypes.POINTER(wintypes.RECT), wintypes.LPARAM)
+
+    def _scale(self, handle) -> float:
+        if self.shcore is None:
+            return 1.0
+        dpi_x, dpi_y = self.ctypes.c_uint(), self.ctypes.c_uint()
+        if self.shcore.GetDpiForMonitor(handle, self.MDT_EFFECTIVE_DPI,
+                                        self.ctypes.byref(dpi_x), self.ctypes.byref(dpi_y)) != 0:
+            return 1.0
+        return dpi_x.value / 96.0
+
+    def monitors(self):
+        monitors = []
+
+        def collect(handle, hdc, rect, data):
+            info = self.MONITORINFOEXW()
+            info.cbSize = self.ctypes.sizeof(info)
+            if self.user32.GetMonitorInfoW(handle, self.ctypes.byref(info)):
+                bounds = info.rcMonitor
+                monitors.append(Monitor(info.szDevice, bounds.left, bounds.top,
+                                        bounds.right - bounds.left, bounds.bottom - bounds.top,
+                                        scale=self._scale(handle),
+                                        primary=bool(info.dwFlags & self.MONITORINFOF_PRIMARY)))
+            return True
+
+        self.user32.EnumDisplayMonitors(None, None, self.MonitorEnumProc(collect), 0)
+        return monitors
+
+
+DISPLAY_BACKENDS = ("auto", Win32DisplayBackend.name, XrandrDisplayBackend.name,
+                    SingleDisplayBackend.name)
+
+
+def create_display_backend(name: str, size: Callable[[], Tuple[int, int]]) -> DisplayBackend:
+    """
+    Create a display backend by name; "auto" enumerates monitors where the
+    platform allows it and otherwise falls back to one screen of `size()`.
+    """
+    if name not in DISPLAY_BACKENDS:
+        raise ValueError(f"Unknown display backend '{name}'. Choose from: {', '.join(DISPLAY_BACKENDS)}")
+    if name == "auto":
+        if sys.platform == "win32":
+            name = Win32DisplayBackend.name
+        elif os.environ.get("DISPLAY") and shutil.which("xrandr"):
+            name = XrandrDisplayBackend.name
+        else:
+            name = SingleDisplayBackend.name
+    if name == Win32DisplayBackend.name:
+        return Win32DisplayBackend()
+    if name == XrandrDisplayBackend.name:
+        return XrandrDisplayBackend()
+    return SingleDisplayBackend(size)
+
+
+def _axis(spans: List[Tuple[int, int, float]]) -> Tuple[List[float], List[float]]:
+    """
+    Piecewise-linear map from [0, 1] to pixels along one axis.
+
+    `spans` are (start, end, weight) per monitor. Stretches covered by no
+    monitor get no input range; the others get input in proportion to their
+    length times the largest weight covering them.
+
+    Returns:
+        (input breakpoints, pixel breakpoints) of equal length.
+    """
+    edges = sorted({edge for start, end, _ in spans for edge in (start, end)})
+    inputs, pixels = [0.0], [float(edges[0])]
+    for low, high in zip(edges, edges[1:]):
+        # A gap between monitors has weight 0, so the map jumps straight across it
+        weight = max((w for start, end, w in spans if start < high and end > low), default=0.0)
+        inputs.append(inputs[-1] + (high - low) * weight)
+        pixels.append(float(high))
+    total = inputs[-1] or 1.0
+    return [value / total for value in inputs], pixels
+
+
+def _interpolate(value: float, inputs: List[float], pixels: List[float]) -> float:
+    value = min(1.0, max(0.0, value))
+    index = min(bisect_right(inputs, value), len(inputs) - 1)
+    low, high = inputs[index - 1], inputs[index]
+    if high <= low:
+        return pixels[index]
+    return pixels[index - 1] + (value - low) / (high - low) * (pixels[index] - pixels[index - 1])
+
+
+class DisplayLayout:
+    """
+    Cached layout of all monitors, for mapping head input onto the whole desktop.
+
+    Head input in [0, 1] on each axis is spread across the combined virtual
+    desktop. Each monitor gets a share of the input in proportion to its size
+    in DPI-independent pixels divided by its gain from `gains` (monitor name ->
+    gain), so a high-DPI monitor takes no more head movement than a regular
+    one of the same physical size, and a monitor with a lower gain takes more
+    head movement to cross and so gives finer control, as it does in the
+    head_velocity cursor mode where the gain scales the cursor speed. Points that would fall outside every monitor are moved to the
+    nearest one, `margin` pixels in from its edges.
+
+    The layout is enumerated once and then re-checked every `poll_interval`
+    seconds on a background thread, never per frame; `layout_listeners` are
+    called with the new monitor list when it changes.
+    """
+
+    def __init__(self, backend: DisplayBackend, gains: Optional[Dict[str, float]] = None,
+                 margin: float = 0, poll_interval: float = DISPLAY_POLL_INTERVAL_DEFAULT):
+        self.backend = backend
+        self.gains = dict(gains or {})
+        self.margin = margin
+        self.poll_interval = poll_interval
+        self.layout_listeners: List[Callable[[List[Monitor]], None]] = []
+        self.monitors: List[Monitor] = []
+        self.stop_event = Event()
+        self.watch_thread = None
+        self._axes = None
+        self.refresh()
+
+    def gain(self, monitor: Monitor) -> float:
+        return max(MONITOR_GAIN_MIN, self.gains.get(monitor.name, MONITOR_GAIN_DEFAULT))
+
+    def input_per_pixel(self, monitor: Monitor) -> float:
+        """Relative head input a pixel takes: less on high-DPI monitors, more on low-gain ones."""
+        return 1.0 / (self.gain(monitor) * monitor.scale)
+
+    def refresh(self) -> bool:
+        """Enumerate the monitors again; returns True if the layout changed."""
+        try:
+            monitors = [m for m in self.backend.monitors() if m.width > 0 and m.height > 0]
+        except Exception as e:
+            logger.warning(f"Could not enumerate monitors with {self.backend.name}: {e}")
+            monitors = []
+        if not monitors:
+            if self.monitors:
+                return False
+            monitors = [Monitor("screen", 0, 0, 1920, 1080, primary=True)]
+        if monitors == self.monitors:
+            return False
+        x_axis = _axis([(m.x, m.right, self.input_per_pixel(m)) for m in monitors])
+        y_axis = _axis([(m.y, m.bottom, self.input_per_pixel(m)) for m in monitors])
+        # Swapped in one assignment so the tracking thread never sees half a layout
+        self._axes = (x_axis, y_axis)
+        self.monitors = monitors
+        logger.info(f"Display layout: {', '.join(map(repr, monitors))}")
+        for listener in self.layout_listeners:
+            listener(monitors)
+        return True
+
+    @property
+    def bounds(self) -> Tuple[int, int, int, int]:
+        """Bounding box of the virtual desktop: min_x, min_y, max_x, max_y."""
+        monitors = self.monitors
+        return (min(m.x for m in monitors), min(m.y for m in monitors),
+                max(m.right for m in monitors), max(m.bottom for m in monitors))
+
+    @property
+    def primary(self) -> Monitor:
+        monitors = self.monitors
+        return next((m for m in monitors if m.primary), monitors[0])
+
+    def monitor_at(self, x: float, y: float) -> Optional[Monitor]:
+        for monitor in self.monitors:
+            if monitor.x <= x < monitor.right and monitor.y <= y < monitor.bottom:
+                return monitor
+        return None
+
+    def clamp(self, x: float, y: float) -> Tuple[float, float]:
+        """The nearest point to (x, y) on any monitor, at least `margin` pixels from its edges."""
+        best, best_distance = (x, y), None
+        for monitor in self.monitors:
+            margin = min(self.margin, monitor.width / 2, monitor.height / 2)
+            px = min(max(x, monitor.x + margin), monitor.right - margin)
+            py = min(max(y, monitor.y + margin), monitor.bottom - margin)
+            distance = (px - x) ** 2 + (py - y) ** 2
+            if distance == 0:
+                return px, py
+            if best_distance is None or distance < best_distance:
+                best, best_distance = (px, py), distance
+        return best
+
+    def map(self, u: float, v: float) -> Tuple[float, float]:
+        """Map head input (0.5, 0.5 = centre of the desktop) to a desktop pixel on a monitor."""
+        (x_inputs, x_pixels), (y_inputs, y_pixels) = self._axes
+        return self.clamp(_interpolate(u, x_inputs, x_pixels), _interpolate(v, y_inputs, y_pixels))
+
+    def center(self) -> Tuple[float, float]:
+        """Centre of the primary monitor."""
+        primary = self.primary
+        return primary.x + primary.width / 2, primary.y + primary.height / 2
+
+    def watch(self):
+        """Re-enumerate the monitors every `poll_interval` seconds until stopped."""
+        while not self.stop_event.wait(self.poll_interval):
+            self.refresh()
+
+    def start(self):
+        """Start watching for layout changes."""
+        if self.poll_interval <= 0 or isinstance(self.backend, SingleDisplayBackend):
+            return
+        if self.watch_thread is None or not self.watch_thread.is_alive():
+            self.stop_event.clear()
+            self.watch_thread = Thread(target=self.watch, name="DisplayWatchThread")
+            self.watch_thread.daemon = True
+            self.watch_thread.start()
+
+    def stop(self):
+        """Stop watching for layout changes."""
+        self.stop_event.set()
+        if self.watch_thread and self.watch_thread.is_alive():
+            self.watch_thread.join(timeout=1)
@@ -1,16 +1,39 @@
-import pyautogui
 from threading import Thread, Event,Lock
-import mediapipe as mp
 from contextlib import contextmanager
+from typing import Callable, List, Optional
 import time
-from pynput import keyboard
 import json
 import os
 import cv2
 import logging
-import win32api
-import win32con
-from virtualkeyboard import VirtualKeyboard
+import numpy as np
+from inputdispatcher import InputDispatcher, FOCUS_SETTLE_DEFAULT
+from filters import (create_filter, MAX_WINDOW, EXPONENTIAL_ALPHA_DEFAULT, ONE_EURO_MIN_CUTOFF_DEFAULT,
+                     ONE_EURO_BETA_DEFAULT)
+from cursormotion import CursorMotion, CURSOR_REFRESH_HZ_DEFAULT, CURSOR_DEADBAND_PX_DEFAULT
+from framecapture import FrameCapture, FrameRingBuffer, open_camera
+from framegovernor import (FrameRateGovernor, TARGET_FPS_DEFAULT, IDLE_FPS_DEFAULT,
+                           TARGET_LATENCY_MS_DEFAULT, FAST_MOTION_SPEED_DEFAULT,
+                           STABLE_MOTION_SPEED_DEFAULT)
+from roitracker import ROI_PADDING_DEFAULT, ROI_INPUT_SIZE_DEFAULT
+from faceworker import FaceMeshWorker, LandmarkDetector, WORKER_STAGES
+from preview import PreviewRenderer, render_overlay, PREVIEW_WINDOW, PREVIEW_FPS_DEFAULT
+from framesource import LandmarkStreamSource
+from scheduler import set_thread_priority, PRIORITY_HIGH
+from displays import DisplayLayout, create_display_backend, DISPLAY_POLL_INTERVAL_DEFAULT
+from headpose import (HeadPoseEstimator, transfer_curve, CURSOR_MODES, HEAD_YAW_RANGE_DEFAULT,
+                      HEAD_PITCH_RANGE_DEFAULT, HEAD_DEADZONE_DEFAULT, HEAD_CURVE_EXPONENT_DEFAULT,
+                      HEAD_MAX_SPEED_DEFAULT)
+from targets import (TargetIndex, TargetSnapper, DwellClicker, AccessibilityTargets, keyboard_targets,
+                     DWELL_TIME_DEFAULT, DWELL_RADIUS_DEFAULT, SNAP_RADIUS_DEFAULT,
+                     SNAP_STRENGTH_DEFAULT, ACCESSIBILITY_INTERVAL_DEFAULT)
+from gestures import (GestureEngine, Hysteresis, face_gestures, FACE_FEATURES, EYE_HYSTERESIS,
+                      MOUTH_HYSTERESIS, DRAG_DURATION_DEFAULT, RIGHT_CLICK_DURATION_DEFAULT)
+from metrics import (MetricsRegistry, RateLimitedLogger, METRICS_PORT_DEFAULT,
+                     METRICS_FILE_DEFAULT, METRICS_INTERVAL_DEFAULT)
+from landmarks import (FaceMeshLoader, NOSE_TIP, UPPER_LIP, LOWER_LIP,
+                       MOUTH_LEFT, MOUTH_RIGHT, LEFT_EYE_TOP, LEFT_EYE_BOTTOM,
+                       RIGHT_EYE_TOP, RIGHT_EYE_BOTTOM, FACE_LEFT, FACE_RIGHT)
 logging.basicConfig(level=logging.INFO,
                     format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -29,16 +52,13 @@ SMOOTHING_WINDOW_SIZE = 1
 MOUTH_OPEN_THRESHOLD=0.5
 MOUTH_OPEN_DURATION=1.0
 class FaceController:
-    def __init__(self):
+    def __init__(self, headless: Optional[bool] = None, preview_fps: Optional[float] = None,
+                 frame_source=None, config_overrides: Optional[dict] = None,
+                 stop_event: Optional[Event] = None,
+                 face_mesh_loader: Optional[FaceMeshLoader] = None,
+                 config_path: str = "face_controller_config.json"):
         # Path for the config file
-        self.config_path = "face_controller_config.json"
-        self.left_eye_closed_start = None
-        self.right_eye_closed_start = None
-        self.is_dragging = False
-        self.drag_start_pos = None
-        self.eyes_closed_start_time = None
-        self.RIGHT_CLICK_DURATION = 2.0 
-        self.drag_cooldown=0.5
+        self.config_path = config_path
         # Default values
         self.default_config = {
             "sensitivity": SENSITIVITY_DEFAULT,
@@ -52,87 +72,295 @@ class FaceController:
             "smoothing_window": SMOOTHING_WINDOW_SIZE,
             "mouth_open_threshold":MOUTH_OPEN_THRESHOLD,
             "mouth_open_duration_threshold":MOUTH_OPEN_DURATION,
-            "right_click_duration": 2.0
+            "right_click_duration": RIGHT_CLICK_DURATION_DEFAULT,
+            "drag_duration": DRAG_DURATION_DEFAULT,
+            "target_fps": TARGET_FPS_DEFAULT,
+            "idle_fps": IDLE_FPS_DEFAULT,
+            "target_latency_ms": TARGET_LATENCY_MS_DEFAULT,
+            "fast_motion_speed": FAST_MOTION_SPEED_DEFAULT,
+            "stable_motion_speed": STABLE_MOTION_SPEED_DEFAULT,
+            "roi_tracking": True,
+            "roi_padding": ROI_PADDING_DEFAULT,
+            "roi_input_size": ROI_INPUT_SIZE_DEFAULT,
+            "headless": False,
+            "preview_fps": PREVIEW_FPS_DEFAULT,
+            "input_backend": "auto",
+            "focus_settle_ms": FOCUS_SETTLE_DEFAULT * 1000,
+            "cursor_refresh_hz": CURSOR_REFRESH_HZ_DEFAULT,
+            "cursor_deadband_px": CURSOR_DEADBAND_PX_DEFAULT,
+            "display_backend": "auto",
+            "monitor_gains": {},
+            "display_poll_interval": DISPLAY_POLL_INTERVAL_DEFAULT,
+            "cursor_mode": "nose",
+            "head_yaw_range": HEAD_YAW_RANGE_DEFAULT,
+            "head_pitch_range": HEAD_PITCH_RANGE_DEFAULT,
+            "head_deadzone": HEAD_DEADZONE_DEFAULT,
+            "head_curve_exponent": HEAD_CURVE_EXPONENT_DEFAULT,
+            "head_max_speed": HEAD_MAX_SPEED_DEFAULT,
+            "dwell_click": False,
+            "dwell_time": DWELL_TIME_DEFAULT,
+            "dwell_radius": DWELL_RADIUS_DEFAULT,
+            "snap_targets": False,
+            "snap_radius": SNAP_RADIUS_DEFAULT,
+            "snap_strength": SNAP_STRENGTH_DEFAULT,
+            "accessibility_targets": False,
+            "accessibility_interval": ACCESSIBILITY_INTERVAL_DEFAULT,
+            "nose_filter": "one_euro",
+            "eye_filter": "moving_average",
+            "mar_filter": "moving_average",
+            "exponential_alpha": EXPONENTIAL_ALPHA_DEFAULT,
+            "one_euro_min_cutoff": ONE_EURO_MIN_CUTOFF_DEFAULT,
+            "one_euro_beta": ONE_EURO_BETA_DEFAULT,
+            "metrics_port": METRICS_PORT_DEFAULT,
+            "metrics_file": METRICS_FILE_DEFAULT,
+            "metrics_interval": METRICS_INTERVAL_DEFAULT,
+            "face_worker": False
         }
 
+        # Settings overridden for this session only; save_config keeps their saved values
+        self.session_keys = set(config_overrides or ())
         # Load saved config or use deaults
         self.load_config()
-        self.drag_duration=0.3
+        # Menu choices override the saved preview settings for this session only
+        if headless is not None:
+            self.headless = headless
+            self.session_keys.add("headless")
+        if preview_fps is not None:
+            self.preview_fps = preview_fps
+            self.session_keys.add("preview_fps")
+        # Replay/benchmark runs override settings without touching the saved file
+        for key, value in (config_overrides or {}).items():
+            setattr(self, key, value)
+        self.frame_source = frame_source
+        self.stage_listeners: List[Callable[[str, float], None]] = []
+        self.metrics = MetricsRegistry()
+        self.log_limiter = RateLimitedLogger(logger)
         # Initialize other attributes
-        self.stop_event = Event()
+        self.stop_event = stop_event or Event()  # Shared with the other controllers when scheduled
+        self.priority = PRIORITY_HIGH
         self.lock=Lock()
-        self.virtual_keyboard=VirtualKeyboard()
-        self.face_mesh = mp.solutions.face_mesh.FaceMesh(
-            refine_landmarks=True,
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5
-        )
+        self.virtual_keyboard = None  # Created on first use, so tkinter is only loaded if needed
+        self.face_mesh_loader = face_mesh_loader or FaceMeshLoader()
+        self.worker = None  # FaceMeshWorker while tracking runs in a separate process
+        self.first_move_listeners: List[Callable[[float], None]] = []
+        self.first_move_at: Optional[float] = None
         self.keyboard_process=None
-        self.screen_w, self.screen_h = pyautogui.size()
+        self.output = InputDispatcher()
+        self.output.use_backend(self.input_backend)
+        self.output.settle_time = self.focus_settle_ms / 1000
+        self.cursor_motion = CursorMotion(self.output, refresh_hz=self.cursor_refresh_hz,
+                                          deadband_px=self.cursor_deadband_px)
+        self.displays = DisplayLayout(create_display_backend(self.display_backend, self.output.size),
+                                      gains=self.monitor_gains, margin=self.safe_margin,
+                                      poll_interval=self.display_poll_interval)
+        self.displays.layout_listeners.append(self.on_layout_change)
+        self.on_layout_change(self.displays.monitors)
+        if self.cursor_mode not in CURSOR_MODES:
+            logger.warning(f"Unknown cursor mode '{self.cursor_mode}', using nose position. "
+                           f"Choose from: {', '.join(CURSOR_MODES)}")
+            self.cursor_mode = "nose"
+        self.head_pose = HeadPoseEstimator()
+        self.head_cursor = None  # Cursor position integrated in head_velocity mode
+        self.head_time = None
+        self.frame_size = None  # (width, height) of the frames the landmarks come from
+        self.targets = TargetIndex()
+        self.snapper = TargetSnapper(self.targets, radius=self.snap_radius, strength=self.snap_strength)
+        self.dwell = DwellClicker(dwell_time=self.dwell_time, radius=self.dwell_radius)
+        self.accessibility = None
+        if self.snap_targets and self.accessibility_targets:
+            try:
+                self.accessibility = AccessibilityTargets(self.targets, self.accessibility_interval)
+            except Exception as e:
+                logger.warning(f"Accessibility targets unavailable ({e}), snapping to the on-screen keyboard only")
         self.prev_nose_y = None
         self.scroll_direction = None
         self.face_thread = None
-        self.frame_skip = 2
-        self.frame_count = 0
-        self.last_click_time = time.time()
-        self.left_eye_closed = False
-        self.right_eye_closed = False
-        self.both_eyes_closed = False
-        self.blink_start_time = 0
-        self.mouth_open_start_time = None
+        self.frame_buffer = FrameRingBuffer()
+        self.governor = FrameRateGovernor(
+            target_fps=self.target_fps,
+            idle_fps=self.idle_fps,
+            target_latency_ms=self.target_latency_ms,
+            fast_motion_speed=self.fast_motion_speed,
+            stable_motion_speed=self.stable_motion_speed
+        )
+        self.detector = LandmarkDetector(self.face_mesh_loader, roi_tracking=self.roi_tracking,
+                                         roi_padding=self.roi_padding,
+                                         roi_input_size=self.roi_input_size,
+                                         stage_observer=self.record_stage)
+        self.preview = None
+        if self.headless and self.preview_fps > 0:
+            self.preview = PreviewRenderer(fps=self.preview_fps, on_exit=self.stop_event.set)
         self.keyboard_opened = False
-        self.waiting_for_mouth_close = False  # Track if we're waiting for mouth to close
-        self.mouth_cycle_complete = False
-        self.eye_distances = {'left': [], 'right': []}
+        self.eye_triggers = (Hysteresis(EYE_HYSTERESIS, below=True),
+                             Hysteresis(EYE_HYSTERESIS, below=True))
+        self.mouth_trigger = Hysteresis(MOUTH_HYSTERESIS)
+        self.gesture_engine = GestureEngine(FACE_FEATURES)
+        self.gesture_actions = {
+            "left_click": self.left_click,
+            "right_click": self.right_click,
+            "drag_start": self.start_drag,
+            "drag_end": self.end_drag,
+            "toggle_keyboard": self.toggle_keyboard,
+        }
+        self.gesture_time = None  # Timestamp of the last frame the gestures saw
+        self.configure_filters()
+        self.configure_gestures()
+        self.metrics.gauge("face.dropped_frames", lambda: self.frame_buffer.dropped)
+        self.metrics.gauge("face.interval_ms", lambda: round(self.governor.interval * 1000, 1))
+        self.metrics.gauge("cursor.moves_sent", lambda: self.cursor_motion.moves_sent)
+
+    def configure_filters(self):
+        """(Re)create the per-signal smoothing filters from the current configuration."""
+        def make(kind):
+            return create_filter(kind, window=self.smoothing_window, alpha=self.exponential_alpha,
+                                 min_cutoff=self.one_euro_min_cutoff, beta=self.one_euro_beta)
+        self.nose_smoothers = (make(self.nose_filter), make(self.nose_filter))
+        self.pose_smoothers = (make(self.nose_filter), make(self.nose_filter))
+        self.eye_smoothers = (make(self.eye_filter), make(self.eye_filter))
+        self.mar_smoother = make(self.mar_filter)
+
+    def configure_gestures(self):
+        """(Re)build the gesture tables from the current timing settings."""
+        self.gesture_engine.configure(face_gestures(
+            blink_duration=self.blink_duration_threshold,
+            click_interval=self.left_click_interval,
+            right_click_duration=self.right_click_duration,
+            drag_duration=self.drag_duration,
+            mouth_open_duration=self.mouth_open_duration_threshold))
+
+    @property
+    def is_dragging(self) -> bool:
+        return self.gesture_engine.state("drag") == "dragging"
+
+    def reset_filters(self):
+        """Forget filter history, e.g. after the face was lost."""
+        for signal_filter in (*self.nose_smoothers, *self.pose_smoothers, *self.eye_smoothers,
+                              self.mar_smoother):
+            signal_filter.reset()
+        self.head_pose.reset()
+        self.head_time = None
 
     @contextmanager
     def camera_context(self):
         """Context manager for camera handling."""
-        for index in range(2): # Try both CAP_DSHOW and default
-           camera = cv2.VideoCapture(0, cv2.CAP_DSHOW if index == 0 else 0)
-           if camera.isOpened():
-               try:
-                   yield camera
-               finally:
-                   camera.release()
-               return 
-        logger.error("Failed to open camera. Please check your camera connection.")
+        if self.frame_source is not None:
+            try:
+                yield self.frame_source
+            finally:
+                self.frame_source.release()
+            return
+        camera = open_camera()
+        if camera is None:
+            logger.error("Failed to open camera. Please check your camera connection.")
+            return
+        try:
+            yield camera
+        finally:
+            camera.release()
+
+    def on_layout_change(self, monitors):
+        """Keep cursor extrapolation on the desktop when monitors are added, removed or moved."""
+        min_x, min_y, max_x, max_y = self.displays.bounds
+        margin = self.safe_margin
+        self.cursor_motion.set_bounds(min_x + margin, min_y + margin, max_x - margin, max_y - margin)
 
     def click(self,x, y):
         """
-        Perform a mouse click at specified coordinates using win32api
+        Queue a mouse click at specified coordinates. The press/release pair is
+        timed by the input dispatcher, so this never blocks the tracking thread.
         """
-        try:
-            win32api.SetCursorPos((int(x), int(y)))
-            win32api.mouse_event(win32con.MOUSEEVENTF_LEFTDOWN, x, y, 0, 0)
-            time.sleep(0.1)  # Small delay between down and up
-            win32api.mouse_event(win32con.MOUSEEVENTF_LEFTUP, x, y, 0, 0)
-        except Exception as e:
-            logger.error(f"Error performing click: {e}")
-    def cursor_movement(self, landmarks):
+        self.output.click(x, y)
+    def cursor_movement(self, points, timestamp=None):
         """
         Calculate cursor position based on nose landmark position and move the cursor accordingly.
 
         Args:
-            landmarks: Facial landmarks detected by MediaPipe.
+            points: (N, 3) array of normalized facial landmarks.
+            timestamp: Capture time of the frame, used by time-based filters.
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        if self.cursor_mode != "nose":
+            self.head_pose_movement(points, timestamp)
+            return
+        nose_x, nose_y = points[NOSE_TIP, :2].tolist()  # Get nose tip coordinates
+        nose_x = self.nose_smoothers[0].filter(nose_x, timestamp)
+        nose_y = self.nose_smoothers[1].filter(nose_y, timestamp)
+
+        # Convert nose position to a point on the desktop, away from monitor edges
+        cursor_x, cursor_y = self.displays.map(
+            0.5 + (nose_x - 0.5) * self.sensitivity / self.movement_range,
+            0.5 + (nose_y - 0.5) * self.sensitivity / self.movement_range)
+
+        # Hand the target to the motion engine, which moves the cursor at display rate
+        self.move_cursor(cursor_x, cursor_y, timestamp)
+
+    def move_cursor(self, x: float, y: float, timestamp: float):
+        """
+        Hand a new cursor target to the motion engine, after snapping it to a
+        nearby clickable target and checking for a dwell click.
         """
-        nose = landmarks[1]  # Get nose tip coordinates
-        nose_x, nose_y = nose.x, nose.y
+        target = None
+        if self.snap_targets:
+            x, y, target = self.snapper.snap(x, y)
+        self.cursor_motion.set_target(x, y, timestamp)
+        if not self.dwell_click:
+            return
+        if self.is_dragging or (self.dwell.target is not None and self.dwell.target not in self.targets):
+            # No dwell clicks mid-drag, and none timed from a target that has gone
+            self.dwell.reset()
+        elif self.dwell.update(x, y, timestamp, target):
+            self.output.click()
+            logger.info(f"Dwell click{f' on {target.name}' if target else ''}")
+
+    def reset_pointing(self):
+        """Forget the snap target and any pending dwell click, e.g. after the face was lost."""
+        self.snapper.current = None
+        self.dwell.reset()
+
+    def on_keyboard_targets(self, buttons):
+        """
+        Snap to the on-screen keyboard's buttons wherever it is shown.
 
-        # Convert nose position to screen coordinates
-        cursor_x = (nose_x - 0.5) * self.sensitivity * \
-            self.screen_w / self.movement_range
-        cursor_y = (nose_y - 0.5) * self.sensitivity * \
-            self.screen_h / self.movement_range
+        Only ever called from the keyboard's thread, so updates arrive in
+        order; once the buttons are gone the tracking thread drops a snap or
+        dwell on them in move_cursor.
+        """
+        self.targets.replace("keyboard", keyboard_targets(buttons))
 
-        # Ensure cursor stays within screen bounds and away from edges
-        cursor_x = max(SAFE_MARGIN, min(self.screen_w -
-                       SAFE_MARGIN, cursor_x + self.screen_w / 2))
-        cursor_y = max(SAFE_MARGIN, min(self.screen_h -
-                       SAFE_MARGIN, cursor_y + self.screen_h / 2))
+    def head_pose_movement(self, points, timestamp: float):
+        """
+        Move the cursor from the head's yaw and pitch instead of the nose position.
 
-        # Update cursor position
-        pyautogui.moveTo(cursor_x, cursor_y)
+        In head_position mode the turn sets the cursor position, in
+        head_velocity mode its speed. Either way it goes through the transfer
+        curve first: nothing within the dead zone, then rising with
+        `head_curve_exponent` up to a full turn of `head_yaw_range` /
+        `head_pitch_range` degrees.
+        """
+        if self.frame_size is None:
+            return
+        pose = self.head_pose.estimate(points, self.frame_size)
+        if pose is None:
+            return
+        yaw, pitch = pose
+        turn_x = transfer_curve(self.pose_smoothers[0].filter(yaw / self.head_yaw_range, timestamp),
+                                self.head_deadzone / self.head_yaw_range, self.head_curve_exponent)
+        turn_y = transfer_curve(self.pose_smoothers[1].filter(pitch / self.head_pitch_range, timestamp),
+                                self.head_deadzone / self.head_pitch_range, self.head_curve_exponent)
+        if self.cursor_mode == "head_position":
+            cursor_x, cursor_y = self.displays.map((1 + turn_x) / 2, (1 + turn_y) / 2)
+        else:
+            if self.head_cursor is None:
+                self.head_cursor = self.displays.center()
+            # Frame gaps longer than this are treated as a pause, not a long push
+            dt = min(timestamp - self.head_time, 0.1) if self.head_time is not None else 0.0
+            monitor = self.displays.monitor_at(*self.head_cursor)
+            speed = self.head_max_speed * (self.displays.gain(monitor) if monitor else 1.0)
+            cursor_x, cursor_y = self.displays.clamp(self.head_cursor[0] + turn_x * speed * dt,
+                                                     self.head_cursor[1] + turn_y * speed * dt)
+        self.head_time = timestamp
+        self.head_cursor = (cursor_x, cursor_y)
+        self.move_cursor(cursor_x, cursor_y, timestamp)
 
     def head_nod_scrolling(self, nose_y: float):
         """
@@ -148,125 +376,70 @@ class FaceController:
             # Trigger scrolling based on movement direction
             if nod_movement > self.nod_threshold:
                 self.scroll_direction = "down"
-                pyautogui.scroll(-SCROLL_AMOUNT)  # Scroll down
+                self.output.scroll(-SCROLL_AMOUNT)  # Scroll down
             elif nod_movement < -self.nod_threshold:
                 self.scroll_direction = "up"
-                pyautogui.scroll(SCROLL_AMOUNT)  # Scroll up
+                self.output.scroll(SCROLL_AMOUNT)  # Scroll up
 
         self.prev_nose_y = nose_y  # Update previous position
-    def blink_detection(self, landmarks):
-        # 1. Landmark assignments
-        LEFT_EYE_TOP, LEFT_EYE_BOTTOM = 145, 159
-        RIGHT_EYE_TOP, RIGHT_EYE_BOTTOM = 374, 386
-        FACE_LEFT, FACE_RIGHT = 234, 454
-        
-        current_time = time.time()
-        
-        try:
-            # 2. Calculate dynamic threshold
-            face_width = abs(landmarks[FACE_RIGHT].x - landmarks[FACE_LEFT].x)
-            dynamic_blink_threshold = self.blink_threshold * face_width
-            
-            # 3. Calculate eye distances
-            left_eye_distance = abs(landmarks[LEFT_EYE_TOP].y - landmarks[LEFT_EYE_BOTTOM].y)
-            right_eye_distance = abs(landmarks[RIGHT_EYE_TOP].y - landmarks[RIGHT_EYE_BOTTOM].y)
-            
-            # Determine eye states
-            left_eye_closed = left_eye_distance < dynamic_blink_threshold
-            right_eye_closed = right_eye_distance < dynamic_blink_threshold
-            both_eyes_closed = left_eye_closed and right_eye_closed
-            
-            # 4. Main logic
-            # a) Both eyes closed - start timer
-            if both_eyes_closed:
-                if self.eyes_closed_start_time is None:
-                    self.eyes_closed_start_time = current_time
-            
-            # b) Both eyes opened - process clicks based on duration
-            elif not left_eye_closed and not right_eye_closed:
-                if self.eyes_closed_start_time is not None:
-                    elapsed_time = current_time - self.eyes_closed_start_time
-                    
-                    # d) Check for right click first
-                    if elapsed_time >= self.RIGHT_CLICK_DURATION:
-                        pyautogui.rightClick()
-                        logger.info("Right click triggered")
-                    # c) Then check for left click
-                    elif elapsed_time < self.left_click_interval:
-                        pyautogui.click()
-                        logger.info("Left click triggered")
-                    
-                    # Reset timer after processing click
-                    self.eyes_closed_start_time = None
-                    self.last_click_time = current_time
-                
-                # f) Stop dragging if active
-                if self.is_dragging:
-                    self.handle_drag(False, current_time)
-                    self.is_dragging = False
-            
-            # e) Left eye closed, right eye open - handle dragging
-            elif left_eye_closed and not right_eye_closed:
-                if self.left_eye_closed_start is None:
-                    self.left_eye_closed_start = current_time
-                elif (current_time - self.left_eye_closed_start >= self.drag_duration):
-                    self.handle_drag(True, current_time)
-            
-            # Reset drag timer if conditions not met
-            else:
-                self.left_eye_closed_start = None
-                
-        except Exception as e:
-            logger.error(f"Error in blink detection: {e}")
-            self.eyes_closed_start_time = None
-            self.left_eye_closed_start = None   
-    def handle_drag(self, should_drag, current_time):
-        """Handle drag operations based on left eye state."""
+    def gesture_features(self, points, timestamp: float) -> tuple:
+        """
+        Reduce one frame's landmarks to the gesture feature vector (FACE_FEATURES order).
+
+        Eye openness is compared with the blink threshold scaled by the face
+        width, and the mouth aspect ratio with the mouth open threshold, each
+        with hysteresis.
+        """
+        face_width = abs(points[FACE_RIGHT, 0] - points[FACE_LEFT, 0])
+        blink_threshold = self.blink_threshold * face_width
+        left_eye_distance = self.eye_smoothers[0].filter(
+            abs(points[LEFT_EYE_TOP, 1] - points[LEFT_EYE_BOTTOM, 1]), timestamp)
+        right_eye_distance = self.eye_smoothers[1].filter(
+            abs(points[RIGHT_EYE_TOP, 1] - points[RIGHT_EYE_BOTTOM, 1]), timestamp)
+        mar = self.mar_smoother.filter(self.calculate_mouth_aspect_ratio(points), timestamp)
+        logger.debug(f"Mouth Aspect Ratio: {mar:.3f}")
+        return (self.eye_triggers[0].update(left_eye_distance, blink_threshold),
+                self.eye_triggers[1].update(right_eye_distance, blink_threshold),
+                self.mouth_trigger.update(mar, self.mouth_open_threshold))
+
+    def detect_gestures(self, points, timestamp: float):
+        """
+        Run the blink, drag and mouth gestures on one frame.
+
+        Args:
+            points: (N, 3) array of normalized facial landmarks.
+            timestamp: Capture time of the frame; all gesture timing is based on it.
+        """
         try:
-            # Start drag
-            if should_drag and not self.is_dragging:
-                if self.left_eye_closed_start is None:
-                    self.left_eye_closed_start = current_time
-                    self.drag_start_pos = win32api.GetCursorPos()
-                elif current_time - self.left_eye_closed_start > 0.3:  # Short delay to confirm intentional drag
-                    pyautogui.mouseDown(button='left')
-                    self.is_dragging = True
-                    logger.info("Started dragging")
-            
-            # End drag
-            elif not should_drag and self.is_dragging:
-                pyautogui.mouseUp(button='left')
-                self.is_dragging = False
-                self.left_eye_closed_start = None
-                self.drag_start_pos = None
-                self.last_click_time = current_time  # Prevent immediate clicks after drag
-                logger.info("Stopped dragging")
-            
-            # Reset if eye opens before drag starts
-            elif not should_drag:
-                self.left_eye_closed_start = None
-                self.drag_start_pos = None
-    
+            self.gesture_time = timestamp
+            for action in self.gesture_engine.update(self.gesture_features(points, timestamp), timestamp):
+                self.gesture_actions[action]()
         except Exception as e:
-            logger.error(f"Error in drag handling: {e}")
-            # Ensure drag state is reset on error
-            self.is_dragging = False
-            self.left_eye_closed_start = None
-            self.drag_start_pos = None
-            pyautogui.mouseUp(button='left')
-
-    def calculate_mouth_aspect_ratio(self, landmarks):
+            self.log_limiter.error("gesture_error", f"Error in gesture detection: {e}")
+
+    def left_click(self):
+        self.output.click()
+        logger.info("Left click triggered")
+
+    def right_click(self):
+        self.output.click(button='right')
+        logger.info("Right click triggered")
+
+    def start_drag(self):
+        self.output.mouse_down(button='left')
+        logger.info("Started dragging")
+
+    def end_drag(self):
+        self.output.mouse_up(button='left')
+        logger.info("Stopped dragging")
+
+    def calculate_mouth_aspect_ratio(self, points):
         """
         Calculate mouth aspect ratio using facial landmarks.
         Uses the ratio of the vertical distance to horizontal distance of the mouth.
         """
-        upper_lip = landmarks[13]  
-        lower_lip = landmarks[14]  
-        left_mouth = landmarks[78]   
-        right_mouth = landmarks[308] 
-    
-        vertical_dist = abs(upper_lip.y - lower_lip.y)
-        horizontal_dist = abs(left_mouth.x - right_mouth.x)
+        vertical_dist = abs(points[UPPER_LIP, 1] - points[LOWER_LIP, 1])
+        horizontal_dist = abs(points[MOUTH_LEFT, 0] - points[MOUTH_RIGHT, 0])
         
         if horizontal_dist==0:
             logger.warning("mouth horizontal distance is 0.skipping MaR calculations")
@@ -275,128 +448,261 @@ class FaceController:
         
         return mar
     
-    def detect_mouth_opening(self, landmarks, current_time):
+    def toggle_keyboard(self):
+        """Open the on-screen keyboard, or close it if it is open."""
+        if self.keyboard_opened:
+            self.get_virtual_keyboard().stop()
+            self.keyboard_opened = False
+            logger.info("virtual keyboard closed")
+        else:
+            self.get_virtual_keyboard().start()
+            self.keyboard_opened = True
+            logger.info("Virtual keyboard opened")
+
+    def get_virtual_keyboard(self):
+        """The on-screen keyboard, created the first time it is opened."""
+        if self.virtual_keyboard is None:
+            from virtualkeyboard import VirtualKeyboard
+            self.virtual_keyboard = VirtualKeyboard()
+            if self.snap_targets:
+                self.virtual_keyboard.target_listeners.append(self.on_keyboard_targets)
+        return self.virtual_keyboard
+
+    def record_stage(self, stage: str, seconds: float):
+        """Report a pipeline stage timing to the governor, the metrics registry and any stage listeners."""
+        if stage == "latency":
+            self.governor.record_latency(seconds)
+        elif stage in self.governor.STAGES:
+            self.governor.record(stage, seconds)
+        self.metrics.observe(f"face.{stage}", seconds)
+        for listener in self.stage_listeners:
+            listener(stage, seconds)
+
+    def timed_stage(self, stage: str, detector: Callable, *args):
+        """Run one gesture detector and record how long it took."""
+        started = time.perf_counter()
+        result = detector(*args)
+        self.record_stage(stage, time.perf_counter() - started)
+        return result
+
+    def detect_landmarks(self, frame, recorded=None):
         """
-        Detect if mouth is open and handle virtual keyboard.
+        Run FaceMesh on a BGR frame and return full-frame normalized landmarks.
+
+        Inference is done by the LandmarkDetector, with ROI tracking if enabled.
+
+        Args:
+            frame: BGR frame.
+            recorded: Landmarks replayed from a landmark stream for this frame;
+                when given, inference is skipped.
+
+        Returns:
+            (N, 3) float32 array of landmarks, or None if no face was found.
         """
-        try:
-            # Calculate mouth aspect ratio
-            mar = self.calculate_mouth_aspect_ratio(landmarks)
-            
-            # Debug logging
-            logger.debug(f"Mouth Aspect Ratio: {mar:.3f}")
-    
-            # Check if mouth is open (MAR exceeds threshold)
-            if mar > self.mouth_open_threshold:
-                if self.mouth_open_start_time is None:
-                    self.mouth_open_start_time = current_time
-                    logger.debug("Mouth opening detected")
-                
-                # If mouth has been open for sufficient duration
-                elif (current_time - self.mouth_open_start_time) > self.mouth_open_duration_threshold:
-                     self.waiting_for_mouth_close=True
-                     logger.debug("waiting for mouth to close")
-            elif mar< self.mouth_open_threshold:
-                if self.waiting_for_mouth_close:
-                    if self.keyboard_opened:
-                        self.virtual_keyboard.stop()
-                        self.keyboard_opened=False
-                        logger.info("virtual keyboard closed")
-                    else:
-                        self.virtual_keyboard.start()
-                        self.keyboard_opened = True
-                        logger.info("Virtual keyboard opened")
-                    self.waiting_for_mouth_close = False
-                    self.mouth_cycle_complete = True
-                self.mouth_open_start_time = None
-    
-        except Exception as e:
-            logger.error(f"Error in mouth detection: {e}")
-    
+        if recorded is not None:
+            points = self.detector.landmark_buffer.points[:len(recorded)]
+            points[:] = recorded
+            return points
+        if isinstance(self.frame_source, LandmarkStreamSource):
+            return None
+        return self.detector.detect(frame)
+
+    def overlay_status(self) -> dict:
+        """Snapshot of the state shown on the camera preview."""
+        hold = None
+        if self.gesture_time is not None and self.gesture_engine.state("blink") == "closed":
+            hold = self.gesture_engine.dwell("blink", self.gesture_time)
+        dwell = None
+        if self.dwell_click and self.gesture_time is not None:
+            dwell = self.dwell.progress(self.gesture_time)
+        return {
+            "dragging": self.is_dragging,
+            "dwell": dwell,
+            "scroll": self.scroll_direction,
+            "hold": hold
+        }
+
     def process_face_tracking(self):
         """Main face tracking loop."""
+        set_thread_priority(self.priority)
+        if self.face_worker and self.frame_source is None:
+            self.track_in_worker()
+            return
         with self.camera_context() as cam:
-            while not self.stop_event.is_set():
-                try:
-                    success, frame = cam.read()
-                    self.frame_count += 1
-
-                    if self.frame_count % self.frame_skip != 0:
+            cam.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # Keep the driver from queueing stale frames
+            capture = FrameCapture(cam, self.frame_buffer)
+            capture.start()
+            self.cursor_motion.start()
+            if self.preview:
+                self.preview.start()
+            try:
+                while not self.stop_event.is_set():
+                    # Always work on the newest captured frame; older ones are dropped
+                    packet = self.frame_buffer.acquire_latest(timeout=1.0)
+                    if packet is None:
+                        if self.frame_buffer.closed:
+                            break
                         continue
+                    frame, timestamp = packet
+                    self.frame_size = (frame.shape[1], frame.shape[0])
+                    frame_started = time.perf_counter()
+                    try:
+                        # Recorded here so the governor is only touched from this thread
+                        self.record_stage("capture", self.frame_buffer.capture_seconds)
+                        points = self.detect_landmarks(frame, self.frame_buffer.payload)
+                        self.handle_landmarks(points, timestamp, time.perf_counter() - frame_started,
+                                              None if capture.realtime else frame_started)
+                        self.render_frame(points, lambda: frame)
+                    except Exception as e:
+                        self.log_limiter.error("loop_error", f"Error in face tracking loop: {e}")
+                    finally:
+                        self.frame_buffer.release()
+
+                    # Wait according to the governor instead of a fixed sleep
+                    delay = self.governor.next_delay(frame_started)
+                    if delay > 0:
+                        self.stop_event.wait(delay)
+            finally:
+                capture.stop()
+                self.finish_tracking()
+                self.stop_event.set()  # Tracking ended on its own too: wake the scheduler
+                if self.frame_buffer.dropped:
+                    logger.info(f"Dropped {self.frame_buffer.dropped} stale frames")
+
+    def track_in_worker(self):
+        """
+        Face tracking loop with capture and FaceMesh running in a worker process.
 
-                    if not success:
-                        logging.error("Failed to read frame from camera")
-                        break
-
-                    frame = cv2.flip(frame, 1)  # Mirror image
-                    rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    output = self.face_mesh.process(rgb_frame)
-                    landmark_points = output.multi_face_landmarks
-                    # frame_h, frame_w, _ = frame.shape
-
-                    if landmark_points:
-                        with self.lock:
-                            landmarks = landmark_points[0].landmark
-                            self.cursor_movement(landmarks)
-                            nose_y = landmarks[1].y
-                            self.head_nod_scrolling(nose_y)
-                            self.blink_detection(landmarks)
-                            current_time = time.time() #moved this line inside the if statement to avoid unnecessary calls
-                            self.detect_mouth_opening(landmarks, current_time)
-                            if self.is_dragging:
-                                cv2.putText(frame, "Dragging...", 
-                                          (10, 120), cv2.FONT_HERSHEY_SIMPLEX, 
-                                          1, (0, 255, 0), 2)
-                            for landmark in landmarks:
-                                pos = (int(landmark.x * frame.shape[1]), int(landmark.y * frame.shape[0]))
-                                cv2.circle(frame, pos, 1, (0, 255, 0), -1)
-                    else:
-                        logger.warning("No face detected in this frame. Skipping.")
-                        cv2.putText(frame, "No face detected", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
-                    
-                    if self.eyes_closed_start_time is not None:
-                        duration = time.time() - self.eyes_closed_start_time
-                        if duration < self.RIGHT_CLICK_DURATION:
-                            cv2.putText(frame, f"Hold for right-click: {duration:.1f}s",
-                                      (10, 90), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-                    # Add visual feedback
-                    cv2.putText(frame, f"Scroll: {self.scroll_direction or 'None'}",
-                                (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-                    cv2.putText(frame, "Press 'ESC' to exit.",
-                                (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-                    cv2.imshow('Head, Eye, and Voice Control', frame)
-
-                    if self.stop_event.isSet() or cv2.waitKey(1)==27:
+        Only landmarks come back; gestures and input injection stay here. The
+        worker paces itself by the governor's interval, and frames are only
+        copied out of shared memory when the preview is drawn.
+        """
+        self.worker = FaceMeshWorker(roi_tracking=self.roi_tracking, roi_padding=self.roi_padding,
+                                     roi_input_size=self.roi_input_size)
+        try:
+            self.worker.start()
+        except Exception as e:
+            logger.error(f"Could not start face worker: {e}")
+            self.worker = None
+            self.stop_event.set()
+            return
+        self.frame_size = (self.worker.frame_shape[1], self.worker.frame_shape[0])
+        self.cursor_motion.start()
+        if self.preview:
+            self.preview.start()
+        try:
+            while not self.stop_event.is_set():
+                result = self.worker.read(timeout=1.0)
+                if result is None:
+                    if self.worker.closed:
                         break
-
-                    time.sleep(0.03)
-
+                    continue
+                points, timestamp, timings = result
+                try:
+                    for stage in WORKER_STAGES:
+                        self.record_stage(stage, timings[stage])
+                    self.handle_landmarks(points, timestamp, timings["convert"] + timings["face_mesh"])
+                    self.render_frame(points, self.worker.frame)
                 except Exception as e:
-                    logging.error(f"Error in face tracking loop: {e}")
-                finally:
-                    try:
-                        for i in range(5):
-                            cv2.waitKey(1)
-                    except:
-                        pass
+                    self.log_limiter.error("loop_error", f"Error in face tracking loop: {e}")
+                self.worker.set_interval(self.governor.interval)
+        finally:
+            self.worker.stop()
+            self.finish_tracking()
+            self.stop_event.set()
+
+    def handle_landmarks(self, points, timestamp: float, inference_seconds: float,
+                         frame_started: Optional[float] = None):
+        """
+        Run the gesture detectors on one frame's landmarks and record its timings.
+
+        Recorded frames carry recording time rather than wall-clock time, so
+        for them `frame_started` (the perf_counter time the frame was picked
+        up) is passed and latency is measured from it instead.
+        """
+        self.record_stage("inference", inference_seconds)
+        stage_started = time.perf_counter()
+        nose_point = None
+        if points is not None:
+            with self.lock:
+                self.timed_stage("cursor", self.cursor_movement, points, timestamp)
+                if self.first_move_at is None:
+                    self.first_move_at = time.perf_counter()
+                    for listener in self.first_move_listeners:
+                        listener(self.first_move_at)
+                nose_x, nose_y = float(points[NOSE_TIP, 0]), float(points[NOSE_TIP, 1])
+                self.timed_stage("scroll", self.head_nod_scrolling, nose_y)
+                self.timed_stage("gestures", self.detect_gestures, points, timestamp)
+                nose_point = (nose_x, nose_y)
+        self.governor.update(nose_point, timestamp)
+        self.record_stage("dispatch", time.perf_counter() - stage_started)
+        if frame_started is None:
+            self.record_stage("latency", time.time() - timestamp)
+        else:
+            self.record_stage("latency", time.perf_counter() - frame_started)
+
+        self.metrics.increment("face.frames")
+        if points is None:
+            self.metrics.increment("face.no_face")
+            self.log_limiter.warning("no_face", "No face detected. Skipping frames until it returns.")
+            self.reset_filters()
+            with self.lock:
+                self.reset_pointing()
+
+    def render_frame(self, points, get_frame: Callable[[], Optional[np.ndarray]]):
+        """Draw the preview if one is due; `get_frame` is only called then."""
+        render_started = time.perf_counter()
+        if self.headless:
+            if self.preview and self.preview.due():
+                frame = get_frame()
+                if frame is not None:
+                    self.preview.submit(frame, points, self.overlay_status())
+                    self.record_stage("render", time.perf_counter() - render_started)
+        elif self.governor.should_render():
+            frame = get_frame()
+            if frame is None:
+                return
+            render_overlay(frame, points, self.overlay_status())
+            cv2.imshow(PREVIEW_WINDOW, frame)
+            if cv2.waitKey(1) == 27:
+                self.stop_event.set()
+            self.record_stage("render", time.perf_counter() - render_started)
+
+    def finish_tracking(self):
+        """Stop the tracking helpers and log a summary."""
+        self.cursor_motion.stop()
+        if self.preview:
+            self.preview.stop()
+        logger.info(f"Frame governor: {self.governor.summary()}")
+        logger.info(f"Cursor moves sent: {self.cursor_motion.moves_sent}, "
+                    f"skipped in deadband: {self.cursor_motion.moves_skipped}")
 
     def start(self):
         """Start the face tracking in a separate thread."""
         if self.face_thread is None or not self.face_thread.is_alive():
-            self.stop_event.clear()
             self.face_thread = Thread(target=self.process_face_tracking,
                                       name="FaceTrackingThread")
             self.face_thread.daemon = True
             self.face_thread.start()
+            self.displays.start()
+            if self.accessibility:
+                self.accessibility.start()
             logging.info("Face tracking thread started")
 
     def stop(self):
         """Stop the face tracking thread."""
         self.stop_event.set()
+        self.frame_buffer.close()  # Wake the loop if it is waiting for a frame
+        self.displays.stop()
+        if self.accessibility:
+            self.accessibility.stop()
+        if self.worker:
+            self.worker.wake()
         if self.face_thread and self.face_thread.is_alive():
             self.face_thread.join(timeout=5)
             logging.info("Face tracking thread stopped")
-        cv2.destroyAllWindows()
+        if not self.headless:
+            cv2.destroyAllWindows()
 
     def load_config(self):
         """Load configuration from JSON file or create with defaults if not exists."""
@@ -426,19 +732,9 @@ class FaceController:
     def save_config(self):
         """Save current configuration to JSON file."""
         try:
-            config = {
-                "sensitivity": self.sensitivity,
-                "movement_range": self.movement_range,
-                "nod_threshold": self.nod_threshold,
-                "blink_threshold": self.blink_threshold,
-                "safe_margin": self.safe_margin,
-                "scroll_amount": self.scroll_amount,
-                "blink_duration_threshold": self.blink_duration_threshold,
-                "left_click_interval": self.left_click_interval,
-                "smoothing_window": self.smoothing_window,
-                "mouth_open_threshold":self.mouth_open_threshold,
-                "mouth_open_duration_threshold":self.mouth_open_duration_threshold
-            }
+            # Every setting in default_config is saved, so a new one cannot be left out
+            config = {key: value if key in self.session_keys else getattr(self, key, value)
+                      for key, value in self.default_config.items()}
 
             with open(self.config_path, 'w') as f:
                 json.dump(config, f, indent=4)
@@ -448,10 +744,12 @@ class FaceController:
             logging.error(f"Error saving configuration: {e}")
     def activate(self):
         print("hotkey used")
-    def update_thresholds(self, key: keyboard.Key):
+    def update_thresholds(self, key: "keyboard.Key"):
         """
         Dynamically update thresholds based on key presses and save to config file.
         """
+        # Imported here so the tracking pipeline also runs on machines without a display
+        from pynput import keyboard
         
         value_changed = True  # Flag to track if any value was changed
 
@@ -520,11 +818,13 @@ class FaceController:
                 self.left_click_interval += 0.1
                 print(f"Click interval increased to: {self.left_click_interval:.1f} (Default: {CLICK_INTERVAL_DEFAULT})")
         elif key == keyboard.Key.page_up:
-            self.smoothing_window = min(10, self.smoothing_window + 1)
+            self.smoothing_window = min(MAX_WINDOW, self.smoothing_window + 1)
+            self.configure_filters()
             print(
                 f"Smoothing window size increased to: {self.smoothing_window} (Default: {SMOOTHING_WINDOW_SIZE})")
         elif key == keyboard.Key.page_down:
             self.smoothing_window = max(1, self.smoothing_window - 1)
+            self.configure_filters()
             print(
                 f"Smoothing window size decreased to: {self.smoothing_window} (Default: {SMOOTHING_WINDOW_SIZE})")
         elif key == keyboard.HotKey(['ctrl','f1'],self.activate):
@@ -553,4 +853,7 @@ class FaceController:
 
         # Save configuration if any value was changed
         if value_changed:
+            self.configure_gestures()
+            self.displays.margin = self.safe_margin
+            self.on_layout_change(self.displays.monitors)
             self.save_config()
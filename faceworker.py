@@ -0,0 +1,347 @@
+from multiprocessing import shared_memory
+from typing import Callable, Dict, Optional, Tuple
+import multiprocessing
+import logging
+import time
+import cv2
+import numpy as np
+from framecapture import open_camera
+from metrics import RateLimitedLogger
+from landmarks import FaceMeshLoader, LandmarkBuffer, NUM_LANDMARKS
+from roitracker import FaceRoiTracker, ROI_PADDING_DEFAULT, ROI_INPUT_SIZE_DEFAULT
+
+logger = logging.getLogger(__name__)
+
+WORKER_STARTUP_TIMEOUT = 15.0
+WORKER_STAGES = ("capture", "convert", "face_mesh")
+SEQLOCK_TIMEOUT = 0.1  # Longest a reader waits for the worker to finish publishing
+
+
+class LandmarkDetector:
+    """
+    FaceMesh inference on BGR frames, returning full-frame normalized landmarks.
+
+    With ROI tracking enabled only the padded face region from the previous
+    frame is converted and processed; if the face is lost inside it, the
+    same frame is retried on the full image. Used by FaceController in
+    process and by the face worker process.
+    """
+
+    def __init__(self, face_mesh_loader: FaceMeshLoader, roi_tracking: bool = True,
+                 roi_padding: float = ROI_PADDING_DEFAULT,
+                 roi_input_size: int = ROI_INPUT_SIZE_DEFAULT,
+                 stage_observer: Optional[Callable[[str, float], None]] = None):
+        self.face_mesh_loader = face_mesh_loader
+        self.face_mesh = None  # Loaded on the first frame unless a prewarm got there first
+        self.roi_tracking = roi_tracking
+        self.roi_tracker = FaceRoiTracker(padding=roi_padding, input_size=roi_input_size)
+        self.landmark_buffer = LandmarkBuffer()
+        self.stage_observer = stage_observer
+
+    def _record(self, stage: str, seconds: float) -> None:
+        if self.stage_observer:
+            self.stage_observer(stage, seconds)
+
+    def detect(self, frame: np.ndarray) -> Optional[np.ndarray]:
+        """
+        Returns:
+            (N, 3) float32 array of landmarks, or None if no face was found.
+        """
+        if self.face_mesh is None:
+            self.face_mesh = self.face_mesh_loader.get()
+
+        if self.roi_tracking and self.roi_tracker.box is not None:
+            started = time.perf_counter()
+            crop = self.roi_tracker.prepare(frame)
+            converted = time.perf_counter()
+            output = self.face_mesh.process(crop)
+            self._record("convert", converted - started)
+            self._record("face_mesh", time.perf_counter() - converted)
+            if output.multi_face_landmarks:
+                points = self.landmark_buffer.load(output.multi_face_landmarks[0].landmark)
+                self.roi_tracker.reproject(points, frame.shape)
+                self.roi_tracker.update(points, frame.shape)
+                return points
+            logger.debug("Face lost inside tracked region, falling back to full frame")
+            self.roi_tracker.reset()
+
+        started = time.perf_counter()
+        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        converted = time.perf_counter()
+        output = self.face_mesh.process(rgb_frame)
+        self._record("convert", converted - started)
+        self._record("face_mesh", time.perf_counter() - converted)
+        if not output.multi_face_landmarks:
+            return None
+        points = self.landmark_buffer.load(output.multi_face_landmarks[0].landmark)
+        if self.roi_tracking:
+            self.roi_tracker.update(points, frame.shape)
+        return points
+
+
+class LandmarkChannel:
+    """
+    Shared-memory channel from the face worker process to the controller.
+
+    One block holds a small header, the latest landmarks and two frame
+    slots. The worker captures into one slot while the other holds the
+    frame of the latest published landmarks, so frames are never copied
+    between processes. Publishing is a seqlock: the sequence number is odd
+    while the worker writes and is bumped again when it is done. The reader
+    copies the landmarks and retries if the sequence moved underneath it,
+    so neither side ever takes a lock. Retries yield the CPU to the worker
+    and give up after a timeout, so a worker that died mid-publish cannot
+    hang the reader.
+    """
+
+    # Header fields (int64)
+    SEQ, SLOT, COUNT = range(3)
+    # Float fields (float64): capture time, stage timings of the frame, and
+    # the processing interval the controller asks the worker to keep
+    TIMESTAMP, CAPTURE, CONVERT, FACE_MESH, INTERVAL = range(5)
+    HEADER_FIELDS = 4
+    FLOAT_FIELDS = 5
+
+    def __init__(self, buffer, shape: Tuple[int, ...]):
+        offset = 0
+        self.header = np.ndarray((self.HEADER_FIELDS,), dtype=np.int64, buffer=buffer, offset=offset)
+        offset += self.header.nbytes
+        self.values = np.ndarray((self.FLOAT_FIELDS,), dtype=np.float64, buffer=buffer, offset=offset)
+        offset += self.values.nbytes
+        self.landmarks = np.ndarray((NUM_LANDMARKS, 3), dtype=np.float32, buffer=buffer, offset=offset)
+        offset += self.landmarks.nbytes
+        self.frames = np.ndarray((2,) + tuple(shape), dtype=np.uint8, buffer=buffer, offset=offset)
+
+    @classmethod
+    def size(cls, shape: Tuple[int, ...]) -> int:
+        return (cls.HEADER_FIELDS * 8 + cls.FLOAT_FIELDS * 8 + NUM_LANDMARKS * 3 * 4
+                + 2 * int(np.prod(shape)))
+
+    def publish(self, slot: int, points: Optional[np.ndarray], timestamp: float,
+                timings: Dict[str, float]) -> None:
+        """Worker side: make a frame's landmarks the latest."""
+        self.header[self.SEQ] += 1
+        count = 0 if points is None else min(len(points), NUM_LANDMARKS)
+        if count:
+            self.landmarks[:count] = points[:count]
+        self.header[self.SLOT] = slot
+        self.header[self.COUNT] = count
+        self.values[self.TIMESTAMP] = timestamp
+        self.values[self.CAPTURE] = timings.get("capture", 0.0)
+        self.values[self.CONVERT] = timings.get("convert", 0.0)
+        self.values[self.FACE_MESH] = timings.get("face_mesh", 0.0)
+        self.header[self.SEQ] += 1
+
+    def read(self, points: np.ndarray, timeout: float = SEQLOCK_TIMEOUT
+             ) -> Optional[Tuple[int, int, int, float, Dict[str, float]]]:
+        """
+        Reader side: copy the latest landmarks into `points`.
+
+        Returns:
+            (sequence number, frame slot, landmark count, capture timestamp,
+            stage timings), or None if no consistent copy could be taken
+            within `timeout` seconds.
+        """
+        deadline = time.perf_counter() + timeout
+        while True:
+            seq = int(self.header[self.SEQ])
+            if not seq & 1:
+                count = int(self.header[self.COUNT])
+                points[:count] = self.landmarks[:count]
+                slot = int(self.header[self.SLOT])
+                timestamp = float(self.values[self.TIMESTAMP])
+                timings = {"capture": float(self.values[self.CAPTURE]),
+                           "convert": float(self.values[self.CONVERT]),
+                           "face_mesh": float(self.values[self.FACE_MESH])}
+                if int(self.header[self.SEQ]) == seq:
+                    return seq, slot, count, timestamp, timings
+            if time.perf_counter() >= deadline:
+                return None
+            time.sleep(0)  # Let the worker finish publishing
+
+    def frame(self, seq: int, slot: int) -> Optional[np.ndarray]:
+        """
+        Reader side: copy of the frame published with sequence number `seq`.
+
+        Returns None if the worker has already started capturing over it.
+        """
+        frame = self.frames[slot].copy()
+        # The slot is only reused after the next frame is published
+        if int(self.header[self.SEQ]) >= seq + 2:
+            return None
+        return frame
+
+
+def _track(camera, scratch: np.ndarray, channel: LandmarkChannel, stop_event, frame_ready,
+           mirror: bool, detector: "LandmarkDetector", timings: Dict[str, float]) -> None:
+    slot = 0
+    while not stop_event.is_set():
+        started = time.perf_counter()
+        success, scratch = camera.read(scratch)
+        if not success:
+            logger.error("Failed to read frame from camera")
+            break
+        timestamp = time.time()
+        frame = channel.frames[slot]
+        if mirror:
+            cv2.flip(scratch, 1, dst=frame)
+        else:
+            np.copyto(frame, scratch)
+        timings["capture"] = time.perf_counter() - started
+        points = detector.detect(frame)
+        channel.publish(slot, points, timestamp, timings)
+        frame_ready.set()
+        slot ^= 1
+        delay = channel.values[LandmarkChannel.INTERVAL] - (time.perf_counter() - started)
+        if delay > 0:
+            stop_event.wait(delay)
+
+
+def run_worker(connection, stop_event, frame_ready, log_level: int, mirror: bool,
+               roi_tracking: bool, roi_padding: float, roi_input_size: int) -> None:
+    """Worker process: capture frames into shared memory and publish their landmarks."""
+    # A spawned process starts with no logging configured, so set it up like the parent's
+    logging.basicConfig(level=log_level,
+                        format='%(asctime)s - %(levelname)s - %(processName)s - %(message)s')
+    camera = open_camera()
+    if camera is None:
+        connection.send(("error", "Failed to open camera. Please check your camera connection."))
+        return
+    memory = None
+    try:
+        camera.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        success, scratch = camera.read()
+        if not success:
+            connection.send(("error", "Failed to read frame from camera"))
+            return
+        connection.send(("shape", scratch.shape))
+        memory = shared_memory.SharedMemory(name=connection.recv())
+        timings: Dict[str, float] = {}
+        detector = LandmarkDetector(FaceMeshLoader(), roi_tracking, roi_padding, roi_input_size,
+                                    stage_observer=timings.__setitem__)
+        # The channel's views into the shared memory go away when _track returns
+        _track(camera, scratch, LandmarkChannel(memory.buf, scratch.shape), stop_event,
+               frame_ready, mirror, detector, timings)
+    except Exception as e:
+        logger.error(f"Error in face worker: {e}")
+    finally:
+        camera.release()
+        if memory is not None:
+            memory.close()
+        frame_ready.set()  # Wake the reader so it notices the worker has gone
+
+
+class FaceMeshWorker:
+    """
+    Runs camera capture and FaceMesh inference in a separate process.
+
+    Inference then no longer competes for the GIL with voice recognition,
+    the keyboard listener or the on-screen keyboard. Only landmark arrays
+    and a few timings come back through a LandmarkChannel; frames stay in
+    shared memory and are only copied out when the preview is drawn.
+    """
+
+    def __init__(self, mirror: bool = True, roi_tracking: bool = True,
+                 roi_padding: float = ROI_PADDING_DEFAULT,
+                 roi_input_size: int = ROI_INPUT_SIZE_DEFAULT):
+        self.options = (mirror, roi_tracking, roi_padding, roi_input_size)
+        self.closed = True
+        self.process = None
+        self.memory = None
+        self.channel: Optional[LandmarkChannel] = None
+        self.frame_shape: Optional[Tuple[int, ...]] = None  # Shape of the camera frames, once started
+        self.points = np.zeros((NUM_LANDMARKS, 3), dtype=np.float32)
+        self.log_limiter = RateLimitedLogger(logger)
+        # Spawned rather than forked: forking a process with camera and GUI threads is unsafe
+        self._context = multiprocessing.get_context("spawn")
+        self.stop_event = self._context.Event()
+        self.frame_ready = self._context.Event()
+        self._seq = 0
+        self._slot = 0
+
+    def start(self, timeout: float = WORKER_STARTUP_TIMEOUT) -> None:
+        """
+        Start the worker and wait until it has opened the camera.
+
+        Raises:
+            RuntimeError: The worker could not open the camera in time.
+        """
+        connection, worker_connection = self._context.Pipe()
+        self.stop_event.clear()
+        self.frame_ready.clear()
+        self.process = self._context.Process(
+            target=run_worker, name="FaceMeshWorker",
+            args=(worker_connection, self.stop_event, self.frame_ready,
+                  logging.getLogger().getEffectiveLevel()) + self.options)
+        self.process.daemon = True
+        self.process.start()
+        if not connection.poll(timeout):
+            self.stop()
+            raise RuntimeError("Face worker did not start in time")
+        kind, value = connection.recv()
+        if kind == "error":
+            self.stop()
+            raise RuntimeError(value)
+        self.memory = shared_memory.SharedMemory(create=True, size=LandmarkChannel.size(value))
+        self.channel = LandmarkChannel(self.memory.buf, value)
+        self.frame_shape = tuple(value)
+        connection.send(self.memory.name)
+        self.closed = False
+        logger.info(f"Face worker started (pid {self.process.pid})")
+
+    def set_interval(self, seconds: float) -> None:
+        """Ask the worker to process at most one frame every `seconds`."""
+        if self.channel is not None:
+            self.channel.values[LandmarkChannel.INTERVAL] = seconds
+
+    def read(self, timeout: Optional[float] = None
+             ) -> Optional[Tuple[Optional[np.ndarray], float, Dict[str, float]]]:
+        """
+        Wait for landmarks newer than the last ones read.
+
+        Returns:
+            (landmarks or None if no face was found, capture timestamp, stage
+            timings), or None on timeout or once the worker has stopped.
+        """
+        while not self.closed:
+            if self.process is None or not self.process.is_alive():
+                self.closed = True
+                break
+            if not self.frame_ready.wait(timeout):
+                return None
+            self.frame_ready.clear()
+            latest = self.channel.read(self.points)
+            if latest is None:
+                self.log_limiter.warning("seqlock", "Face worker did not finish publishing landmarks in time")
+                continue
+            seq, slot, count, timestamp, timings = latest
+            if seq == self._seq:
+                continue
+            self._seq, self._slot = seq, slot
+            return (self.points[:count] if count else None), timestamp, timings
+        return None
+
+    def frame(self) -> Optional[np.ndarray]:
+        """Copy of the frame the last landmarks came from, or None if it was already replaced."""
+        if self.channel is None:
+            return None
+        return self.channel.frame(self._seq, self._slot)
+
+    def wake(self) -> None:
+        """Wake a reader blocked in read()."""
+        self.frame_ready.set()
+
+    def stop(self) -> None:
+        """Stop the worker process and release the shared memory."""
+        self.closed = True
+        self.stop_event.set()
+        self.frame_ready.set()
+        if self.process is not None:
+            self.process.join(timeout=2)
+            if self.process.is_alive():
+                self.process.terminate()
+        if self.memory is not None:
+            self.channel = None
+            self.memory.close()
+            self.memory.unlink()
+            self.memory = None
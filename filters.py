@@ -0,0 +1,129 @@
+import math
+from typing import Optional
+
+MAX_WINDOW = 10
+EXPONENTIAL_ALPHA_DEFAULT = 0.5
+ONE_EURO_MIN_CUTOFF_DEFAULT = 1.5
+ONE_EURO_BETA_DEFAULT = 10.0
+ONE_EURO_D_CUTOFF_DEFAULT = 1.0
+
+
+class SignalFilter:
+    """Base class for scalar filters with O(1) cost per sample and no per-sample allocation."""
+
+    def filter(self, value: float, timestamp: float) -> float:
+        return value
+
+    def reset(self) -> None:
+        pass
+
+
+class MovingAverageFilter(SignalFilter):
+    """Moving average over the last `window` samples, kept in a fixed ring buffer with a running sum."""
+
+    def __init__(self, window: int = 1, capacity: int = MAX_WINDOW):
+        self.capacity = max(capacity, window)
+        self.samples = [0.0] * self.capacity
+        self.window = max(1, window)
+        self.reset()
+
+    def set_window(self, window: int) -> None:
+        self.window = max(1, min(self.capacity, window))
+        self.reset()
+
+    def reset(self) -> None:
+        self.index = 0
+        self.count = 0
+        self.total = 0.0
+
+    def filter(self, value: float, timestamp: float) -> float:
+        if self.count == self.window:
+            self.total -= self.samples[self.index]
+        else:
+            self.count += 1
+        self.samples[self.index] = value
+        self.total += value
+        self.index = (self.index + 1) % self.window
+        return self.total / self.count
+
+
+class ExponentialFilter(SignalFilter):
+    """Exponential smoothing: y = y + alpha * (x - y)."""
+
+    def __init__(self, alpha: float = EXPONENTIAL_ALPHA_DEFAULT):
+        self.alpha = alpha
+        self.value: Optional[float] = None
+
+    def reset(self) -> None:
+        self.value = None
+
+    def filter(self, value: float, timestamp: float) -> float:
+        if self.value is None:
+            self.value = value
+        else:
+            self.value += self.alpha * (value - self.value)
+        return self.value
+
+
+class OneEuroFilter(SignalFilter):
+    """
+    One Euro filter (Casiez et al.): a low-pass filter whose cutoff rises with speed.
+
+    Slow movements are smoothed heavily to remove jitter while fast movements
+    pass through with little lag. Cutoffs are in Hz; `beta` scales how much
+    the cutoff rises per unit/s of speed.
+    """
+
+    def __init__(self, min_cutoff: float = ONE_EURO_MIN_CUTOFF_DEFAULT,
+                 beta: float = ONE_EURO_BETA_DEFAULT,
+                 d_cutoff: float = ONE_EURO_D_CUTOFF_DEFAULT):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.reset()
+
+    def reset(self) -> None:
+        self.value: Optional[float] = None
+        self.derivative = 0.0
+        self.timestamp = 0.0
+
+    @staticmethod
+    def _alpha(cutoff: float, dt: float) -> float:
+        tau = 1.0 / (2 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def filter(self, value: float, timestamp: float) -> float:
+        if self.value is None:
+            self.value = value
+            self.timestamp = timestamp
+            return value
+        dt = timestamp - self.timestamp
+        if dt <= 0:
+            return self.value
+        self.timestamp = timestamp
+
+        derivative = (value - self.value) / dt
+        self.derivative += self._alpha(self.d_cutoff, dt) * (derivative - self.derivative)
+        cutoff = self.min_cutoff + self.beta * abs(self.derivative)
+        self.value += self._alpha(cutoff, dt) * (value - self.value)
+        return self.value
+
+
+FILTER_TYPES = ("none", "moving_average", "exponential", "one_euro")
+
+
+def create_filter(kind: str, window: int = 1,
+                  alpha: float = EXPONENTIAL_ALPHA_DEFAULT,
+                  min_cutoff: float = ONE_EURO_MIN_CUTOFF_DEFAULT,
+                  beta: float = ONE_EURO_BETA_DEFAULT,
+                  d_cutoff: float = ONE_EURO_D_CUTOFF_DEFAULT) -> SignalFilter:
+    """Create a filter by name; see FILTER_TYPES."""
+    if kind == "none":
+        return SignalFilter()
+    if kind == "moving_average":
+        return MovingAverageFilter(window)
+    if kind == "exponential":
+        return ExponentialFilter(alpha)
+    if kind == "one_euro":
+        return OneEuroFilter(min_cutoff, beta, d_cutoff)
+    raise ValueError(f"Unknown filter '{kind}'. Choose from: {', '.join(FILTER_TYPES)}")
@@ -0,0 +1,207 @@
+from threading import Thread, Event, Condition
+from typing import Optional, Tuple
+import logging
+import time
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+RING_BUFFER_SLOTS = 3
+
+
+def open_camera():
+    """Open the default webcam, trying DirectShow first; None if no camera could be opened."""
+    for index in range(2):  # Try both CAP_DSHOW and default
+        camera = cv2.VideoCapture(0, cv2.CAP_DSHOW if index == 0 else 0)
+        if camera.isOpened():
+            return camera
+    return None
+
+
+class FrameRingBuffer:
+    """
+    Preallocated ring of frame slots shared by one writer and one reader.
+
+    The writer always fills a slot that is neither the newest published frame
+    nor the frame currently held by the reader, so neither side ever waits on
+    the other. The reader only ever receives the newest frame; frames that were
+    overwritten before being read are counted in `dropped` instead of queued.
+    Each frame carries its timestamp, an optional payload and how long the
+    writer took to capture it, so the reader can account for it on its own
+    thread.
+    """
+
+    def __init__(self, slots: int = RING_BUFFER_SLOTS):
+        if slots < 3:
+            raise ValueError("FrameRingBuffer needs at least 3 slots")
+        self.slots = slots
+        self.frames: Optional[np.ndarray] = None
+        self.timestamps = [0.0] * slots
+        self.payloads = [None] * slots
+        self.capture_times = [0.0] * slots
+        self.dropped = 0
+        self.closed = False
+        self._cond = Condition()
+        self._latest = -1
+        self._reading = -1
+        self._seq = 0
+        self._read_seq = 0
+
+    def allocate(self, shape: Tuple[int, ...], dtype=np.uint8) -> None:
+        """Allocate storage for all slots once the frame geometry is known."""
+        with self._cond:
+            if self.frames is None or self.frames.shape[1:] != tuple(shape):
+                self.frames = np.empty((self.slots, *shape), dtype=dtype)
+                self._latest = -1
+
+    def claim(self) -> Tuple[int, np.ndarray]:
+        """Return a free slot index and its frame view for the writer to fill."""
+        with self._cond:
+            for offset in range(1, self.slots + 1):
+                index = (self._latest + offset) % self.slots
+                if index != self._latest and index != self._reading:
+                    return index, self.frames[index]
+        raise RuntimeError("No free slot in frame ring buffer")
+
+    def publish(self, index: int, timestamp: float, payload=None, capture_seconds: float = 0.0) -> None:
+        """Mark a filled slot as the newest frame and wake the reader."""
+        with self._cond:
+            if self._seq > self._read_seq:
+                self.dropped += 1
+            self.timestamps[index] = timestamp
+            self.payloads[index] = payload
+            self.capture_times[index] = capture_seconds
+            self._latest = index
+            self._seq += 1
+            self._cond.notify_all()
+
+    def acquire_latest(self, timeout: Optional[float] = None) -> Optional[Tuple[np.ndarray, float]]:
+        """
+        Wait for a frame newer than the last one read and hold it until release().
+
+        Returns:
+            (frame, timestamp) for the newest frame, or None on timeout/close.
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._seq > self._read_seq or self.closed, timeout):
+                return None
+            if self._seq <= self._read_seq:
+                return None
+            self._reading = self._latest
+            self._read_seq = self._seq
+            self._cond.notify_all()  # Wake a lockstep writer waiting in wait_consumed()
+            return self.frames[self._reading], self.timestamps[self._reading]
+
+    def wait_consumed(self, timeout: Optional[float] = None) -> bool:
+        """Block the writer until the newest frame has been taken by the reader."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._seq == self._read_seq or self.closed, timeout)
+
+    @property
+    def payload(self):
+        """Payload published with the frame currently held by the reader."""
+        return self.payloads[self._reading] if self._reading >= 0 else None
+
+    @property
+    def capture_seconds(self) -> float:
+        """Time the writer spent reading and copying the frame currently held by the reader."""
+        return self.capture_times[self._reading] if self._reading >= 0 else 0.0
+
+    @property
+    def reading_index(self) -> int:
+        """Slot index currently held by the reader, or -1."""
+        return self._reading
+
+    def release(self) -> None:
+        """Give the slot held by the reader back to the writer."""
+        with self._cond:
+            self._reading = -1
+
+    def close(self) -> None:
+        """Wake any waiting reader; no more frames will be published."""
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    def reset(self) -> None:
+        """Forget all published frames so the buffer can be reused."""
+        with self._cond:
+            self.closed = False
+            self.dropped = 0
+            self._latest = -1
+            self._reading = -1
+            self._seq = 0
+            self._read_seq = 0
+
+
+class FrameCapture:
+    """
+    Reads and mirrors camera frames on a dedicated thread into a FrameRingBuffer.
+
+    Sources with `realtime = False` (recordings, see framesource.py) are read
+    in lockstep with the reader so no frame is dropped, and are stamped with
+    the source's own recording `timestamp` instead of the wall clock. Any
+    `payload` the source attaches to a frame is published alongside it, as
+    is the frame's capture time; nothing is reported from the capture thread
+    itself.
+    """
+
+    def __init__(self, camera, frame_buffer: FrameRingBuffer, mirror: bool = True):
+        self.camera = camera
+        self.frame_buffer = frame_buffer
+        self.mirror = mirror
+        self.realtime = getattr(camera, "realtime", True)
+        self.stop_event = Event()
+        self.capture_thread = None
+        self._scratch: Optional[np.ndarray] = None
+
+    def capture_frames(self):
+        """Capture loop: read into a scratch frame, flip into a free slot, publish."""
+        try:
+            while not self.stop_event.is_set():
+                if not self.realtime:
+                    self.frame_buffer.wait_consumed()
+                    if self.frame_buffer.closed:
+                        break
+                read_started = time.perf_counter()
+                success, frame = self.camera.read(self._scratch)
+                if not success:
+                    if self.realtime:
+                        logger.error("Failed to read frame from camera")
+                    else:
+                        logger.info("End of recorded frame source")
+                    break
+                timestamp = time.time() if self.realtime else self.camera.timestamp
+                if self._scratch is None or frame is not self._scratch:
+                    self._scratch = frame
+                    self.frame_buffer.allocate(frame.shape, frame.dtype)
+
+                index, slot = self.frame_buffer.claim()
+                if self.mirror:
+                    cv2.flip(frame, 1, dst=slot)
+                else:
+                    np.copyto(slot, frame)
+                self.frame_buffer.publish(index, timestamp, getattr(self.camera, "payload", None),
+                                          time.perf_counter() - read_started)
+        except Exception as e:
+            logger.error(f"Error in frame capture loop: {e}")
+        finally:
+            self.frame_buffer.close()
+
+    def start(self):
+        """Start capturing frames in a separate thread."""
+        if self.capture_thread is None or not self.capture_thread.is_alive():
+            self.stop_event.clear()
+            self.frame_buffer.reset()
+            self.capture_thread = Thread(target=self.capture_frames,
+                                         name="FrameCaptureThread")
+            self.capture_thread.daemon = True
+            self.capture_thread.start()
+
+    def stop(self):
+        """Stop the capture thread."""
+        self.stop_event.set()
+        self.frame_buffer.close()
+        if self.capture_thread and self.capture_thread.is_alive():
+            self.capture_thread.join(timeout=2)
@@ -0,0 +1,158 @@
+import logging
+import time
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+TARGET_FPS_DEFAULT = 30
+IDLE_FPS_DEFAULT = 5
+TARGET_LATENCY_MS_DEFAULT = 60
+FAST_MOTION_SPEED_DEFAULT = 0.25
+STABLE_MOTION_SPEED_DEFAULT = 0.02
+MAX_RENDER_DIVISOR = 4
+MAX_BACKOFF = 3.0  # Longest the interval is stretched to get back under the latency target
+BACKOFF_GROWTH = 1.25
+BACKOFF_DECAY = 1.1
+
+
+class FrameRateGovernor:
+    """
+    Adapts the face tracking processing rate to what the pipeline is doing.
+
+    Per-stage timings (capture, inference, dispatch, render) are tracked as
+    exponential moving averages. Each processed frame the governor picks a
+    frame interval: every camera frame during fast head motion, `target_fps`
+    during normal use and `idle_fps` while the face is absent or held still.
+
+    Processing also adapts to `target_latency_ms`. While end-to-end latency
+    or the inference plus dispatch time of a frame is over the target, the
+    interval is stretched (up to MAX_BACKOFF times) and never shorter than
+    that processing time, so frames are no longer taken faster than they
+    can be handled and do not wait behind each other; once back under the
+    target the stretch decays again. The preview is also rendered less often
+    meanwhile. A target of 0 turns latency adaptation off.
+
+    The governor is not locked: record timings and ask for delays from the
+    tracking thread only. Work done on other threads, like frame capture,
+    hands its timings over with the frame.
+    """
+
+    STAGES = ("capture", "inference", "dispatch", "render")
+
+    def __init__(self, target_fps: float = TARGET_FPS_DEFAULT,
+                 idle_fps: float = IDLE_FPS_DEFAULT,
+                 target_latency_ms: float = TARGET_LATENCY_MS_DEFAULT,
+                 fast_motion_speed: float = FAST_MOTION_SPEED_DEFAULT,
+                 stable_motion_speed: float = STABLE_MOTION_SPEED_DEFAULT,
+                 smoothing: float = 0.2,
+                 idle_after: float = 0.5):
+        self.target_fps = target_fps
+        self.idle_fps = idle_fps
+        self.target_latency = target_latency_ms / 1000.0
+        self.fast_motion_speed = fast_motion_speed
+        self.stable_motion_speed = stable_motion_speed
+        self.smoothing = smoothing
+        self.idle_after = idle_after
+
+        self.stage_times: Dict[str, float] = {stage: 0.0 for stage in self.STAGES}
+        self.latency = 0.0
+        self.interval = self._interval_for(target_fps)
+        self.mode = "active"
+        self.render_divisor = 1
+        self.backoff = 1.0
+        self._render_count = 0
+        self._quiet_since: Optional[float] = None
+        self._prev_point = None
+        self._prev_time: Optional[float] = None
+
+    @staticmethod
+    def _interval_for(fps: float) -> float:
+        return 1.0 / fps if fps and fps > 0 else 0.0
+
+    def record(self, stage: str, seconds: float) -> None:
+        """Fold a stage timing into its moving average."""
+        previous = self.stage_times.get(stage, 0.0)
+        self.stage_times[stage] = previous + self.smoothing * (seconds - previous)
+
+    def record_latency(self, seconds: float) -> None:
+        """Fold the capture-to-dispatch latency of a frame into its moving average."""
+        self.latency += self.smoothing * (seconds - self.latency)
+
+    def update(self, point, now: Optional[float] = None) -> None:
+        """
+        Update the processing mode from the tracked point of the latest frame.
+
+        Args:
+            point: (x, y) normalized nose position, or None if no face was found.
+            now: Frame timestamp in seconds.
+        """
+        now = time.time() if now is None else now
+        speed = 0.0
+        if point is not None and self._prev_point is not None and self._prev_time is not None:
+            dt = now - self._prev_time
+            if dt > 0:
+                dx = point[0] - self._prev_point[0]
+                dy = point[1] - self._prev_point[1]
+                speed = (dx * dx + dy * dy) ** 0.5 / dt
+        self._prev_point = point
+        self._prev_time = now
+
+        if point is not None and speed >= self.fast_motion_speed:
+            self.mode = "fast"
+            self._quiet_since = None
+            self.interval = 0.0
+            self._fit_latency()
+            return
+
+        if point is None or speed < self.stable_motion_speed:
+            if self._quiet_since is None:
+                self._quiet_since = now
+        else:
+            self._quiet_since = None
+
+        if self._quiet_since is not None and now - self._quiet_since >= self.idle_after:
+            # Back off gradually so a brief pause does not make the cursor sluggish
+            self.mode = "idle"
+            idle_interval = self._interval_for(self.idle_fps)
+            self.interval = min(idle_interval, max(self.interval, self._interval_for(self.target_fps)) * 1.5)
+        else:
+            self.mode = "active"
+            self.interval = self._interval_for(self.target_fps)
+        self._fit_latency()
+
+    @property
+    def processing_time(self) -> float:
+        """Average time spent on a frame after capture: inference plus dispatch."""
+        return self.stage_times["inference"] + self.stage_times["dispatch"]
+
+    def over_budget(self) -> bool:
+        if self.target_latency <= 0:
+            return False
+        return self.latency > self.target_latency or self.processing_time > self.target_latency
+
+    def _fit_latency(self) -> None:
+        """Stretch the chosen interval while the pipeline cannot keep up with the latency target."""
+        if self.over_budget():
+            self.backoff = min(MAX_BACKOFF, self.backoff * BACKOFF_GROWTH)
+        else:
+            self.backoff = max(1.0, self.backoff / BACKOFF_DECAY)
+        if self.backoff > 1.0:
+            self.interval = max(self.interval, self.processing_time) * self.backoff
+
+    def should_render(self) -> bool:
+        """Return True if the preview should be drawn for the current frame."""
+        if self.over_budget():
+            self.render_divisor = min(MAX_RENDER_DIVISOR, self.render_divisor + 1)
+        elif self.render_divisor > 1:
+            self.render_divisor -= 1
+        self._render_count += 1
+        return self._render_count % self.render_divisor == 0
+
+    def next_delay(self, frame_started: float, now: Optional[float] = None) -> float:
+        """Seconds to wait before taking the next frame so the chosen rate is met."""
+        now = time.perf_counter() if now is None else now
+        return max(0.0, self.interval - (now - frame_started))
+
+    def summary(self) -> str:
+        stages = ", ".join(f"{stage}={seconds * 1000:.1f}ms" for stage, seconds in self.stage_times.items())
+        return f"mode={self.mode} backoff={self.backoff:.2f} interval={self.interval * 1000:.0f}ms latency={self.latency * 1000:.1f}ms {stages}"
@@ -0,0 +1,166 @@
+import logging
+import os
+from pathlib import Path
+from typing import Optional
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.bmp'}
+RECORDED_FPS_DEFAULT = 30.0  # Frame rate assumed for recordings that do not carry their own timing
+
+
+class FrameSource:
+    """
+    Minimal cv2.VideoCapture-compatible frame source.
+
+    `realtime` sources (cameras) let the capture thread drop stale frames;
+    recorded sources are read in lockstep with processing so every frame is
+    seen exactly once and runs are reproducible. Sources that already carry
+    landmarks expose them for the last frame read through `payload`, which
+    lets the face pipeline skip FaceMesh inference.
+
+    `timestamp` is the recording time of the last frame read, in seconds
+    from the start of the recording. It is published with the frame instead
+    of the wall clock, so gesture timing, filters and dwell see the pace the
+    recording was made at however fast it is replayed.
+    """
+
+    realtime = False
+
+    def __init__(self):
+        self.payload = None
+        self.timestamp = 0.0
+
+    def isOpened(self) -> bool:
+        return True
+
+    def read(self, image: Optional[np.ndarray] = None):
+        raise NotImplementedError
+
+    def set(self, prop_id: int, value) -> bool:
+        return False
+
+    def release(self) -> None:
+        pass
+
+
+class VideoFileSource(FrameSource):
+    """Frames decoded from a recorded video file."""
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        self.capture = cv2.VideoCapture(path)
+        self.fps = self.capture.get(cv2.CAP_PROP_FPS) or RECORDED_FPS_DEFAULT
+        self.index = 0
+
+    def isOpened(self):
+        return self.capture.isOpened()
+
+    def read(self, image=None):
+        success, frame = self.capture.read(image)
+        if success:
+            # Position of the frame just decoded; not every backend reports it
+            position = self.capture.get(cv2.CAP_PROP_POS_MSEC) / 1000
+            self.timestamp = position if position > 0 or self.index == 0 else self.index / self.fps
+            self.index += 1
+        return success, frame
+
+    def release(self):
+        self.capture.release()
+
+
+class ImageDirectorySource(FrameSource):
+    """Frames loaded from the images in a directory, in file-name order, taken `fps` apart."""
+
+    def __init__(self, path: str, fps: float = RECORDED_FPS_DEFAULT):
+        super().__init__()
+        self.files = sorted(p for p in Path(path).iterdir()
+                            if p.suffix.lower() in IMAGE_EXTENSIONS)
+        self.fps = fps
+        self.index = 0
+
+    def isOpened(self):
+        return bool(self.files)
+
+    def read(self, image=None):
+        if self.index >= len(self.files):
+            return False, None
+        frame = cv2.imread(str(self.files[self.index]))
+        self.timestamp = self.index / self.fps
+        self.index += 1
+        if frame is None:
+            return False, None
+        return True, frame
+
+
+class LandmarkStreamSource(FrameSource):
+    """
+    Replays a landmark dump written by `save_landmark_stream`.
+
+    Each read yields a blank frame of the recorded size and sets `payload`
+    to that frame's (N, 3) landmarks, or None where no face was detected.
+    Frame times come from the dump's `timestamps`; older dumps without them
+    are replayed at RECORDED_FPS_DEFAULT.
+    """
+
+    def __init__(self, path: str):
+        super().__init__()
+        data = np.load(path)
+        self.landmarks = data["landmarks"].astype(np.float32)
+        width, height = (int(v) for v in data["frame_size"]) if "frame_size" in data else (640, 480)
+        self.frame = np.zeros((height, width, 3), dtype=np.uint8)
+        if "timestamps" in data:
+            self.timestamps = data["timestamps"].astype(np.float64)
+        else:
+            self.timestamps = np.arange(len(self.landmarks)) / RECORDED_FPS_DEFAULT
+        self.index = 0
+
+    def isOpened(self):
+        return len(self.landmarks) > 0
+
+    def read(self, image=None):
+        if self.index >= len(self.landmarks):
+            return False, None
+        points = self.landmarks[self.index]
+        self.timestamp = float(self.timestamps[self.index])
+        self.index += 1
+        self.payload = None if np.isnan(points).any() else points
+        # The frame buffer keeps its own copy, so the same blank frame is reused
+        return True, self.frame
+
+
+def save_landmark_stream(path: str, frames, frame_size, timestamps=None) -> None:
+    """
+    Write per-frame landmarks for LandmarkStreamSource.
+
+    Args:
+        frames: Sequence of (N, 3) arrays, or None for frames without a face.
+        frame_size: (width, height) of the recorded frames.
+        timestamps: Time of each frame in seconds; frames are assumed to be
+            RECORDED_FPS_DEFAULT apart if omitted.
+    """
+    count = max((len(points) for points in frames if points is not None), default=0)
+    landmarks = np.full((len(frames), count, 3), np.nan, dtype=np.float32)
+    for index, points in enumerate(frames):
+        if points is not None:
+            landmarks[index, :len(points)] = points
+    if timestamps is None:
+        timestamps = np.arange(len(frames)) / RECORDED_FPS_DEFAULT
+    np.savez_compressed(path, landmarks=landmarks, frame_size=np.array(frame_size),
+                        timestamps=np.asarray(timestamps, dtype=np.float64))
+
+
+def open_frame_source(spec: str) -> FrameSource:
+    """Open a frame source from a video path, image directory or .npz landmark dump."""
+    if os.path.isdir(spec):
+        source = ImageDirectorySource(spec)
+    elif spec.endswith('.npz'):
+        source = LandmarkStreamSource(spec)
+    else:
+        source = VideoFileSource(spec)
+    if not source.isOpened():
+        raise ValueError(f"Could not open frame source '{spec}'")
+    return source
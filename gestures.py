@@ -0,0 +1,230 @@
+from typing import Dict, List, Optional, Sequence
+
+# Per-frame features the face gestures are defined over, in feature vector order
+FACE_FEATURES = ("left_eye_closed", "right_eye_closed", "mouth_open")
+# An eye counts as closed below the blink threshold and as open again only
+# once it is this fraction above it, so lid jitter at the threshold cannot
+# chatter between open and closed
+EYE_HYSTERESIS = 0.15
+MOUTH_HYSTERESIS = 0.1
+DRAG_DURATION_DEFAULT = 0.3
+RIGHT_CLICK_DURATION_DEFAULT = 2.0
+
+
+class Hysteresis:
+    """
+    Schmitt trigger turning a continuous measurement into an on/off feature.
+
+    Turns on once the value crosses `threshold` and back off only once it is
+    `band` (a fraction of the threshold) back on the other side. With
+    `below=True` the feature is on while the value is low, e.g. eye openness.
+    """
+
+    def __init__(self, band: float, below: bool = False):
+        self.band = band
+        self.below = below
+        self.on = False
+
+    def update(self, value: float, threshold: float) -> bool:
+        if self.below:
+            limit = threshold * (1 + self.band) if self.on else threshold
+            self.on = value < limit
+        else:
+            limit = threshold * (1 - self.band) if self.on else threshold
+            self.on = value > limit
+        return self.on
+
+    def reset(self) -> None:
+        self.on = False
+
+
+class Transition:
+    """
+    One row of a gesture table.
+
+    Taken from `source` to `target` on a frame whose features match
+    `condition` (feature name -> required value; features not named are
+    ignored), provided the gesture has been in `source` for at least
+    `min_seconds` and less than `max_seconds`. `action` names what the
+    transition fires, if anything.
+    """
+
+    def __init__(self, source: str, condition: Dict[str, bool], target: str,
+                 action: Optional[str] = None, min_seconds: float = 0.0,
+                 max_seconds: float = float("inf")):
+        self.source = source
+        self.condition = condition
+        self.target = target
+        self.action = action
+        self.min_seconds = min_seconds
+        self.max_seconds = max_seconds
+
+
+class Gesture:
+    """A named finite-state machine given as a table of transitions."""
+
+    def __init__(self, name: str, initial: str, transitions: Sequence[Transition]):
+        self.name = name
+        self.initial = initial
+        self.transitions = list(transitions)
+
+    def compile(self, features: Sequence[str]) -> Dict[str, List[tuple]]:
+        """
+        Compile the table into state -> candidate transitions for every
+        combination of feature values, indexed by the feature bitmask.
+        """
+        bits = {name: 1 << i for i, name in enumerate(features)}
+        for transition in self.transitions:
+            unknown = set(transition.condition) - set(bits)
+            if unknown:
+                raise ValueError(f"Gesture '{self.name}' uses unknown features: {', '.join(sorted(unknown))}")
+        states = {self.initial} | {t.source for t in self.transitions} | {t.target for t in self.transitions}
+        table = {state: [[] for _ in range(1 << len(features))] for state in states}
+        for transition in self.transitions:
+            care = sum(bits[name] for name in transition.condition)
+            value = sum(bits[name] for name, on in transition.condition.items() if on)
+            for mask, candidates in enumerate(table[transition.source]):
+                if mask & care == value:
+                    candidates.append(transition)
+        return {state: [tuple(candidates) for candidates in rows] for state, rows in table.items()}
+
+
+class GestureEngine:
+    """
+    Runs any number of gesture state machines over per-frame feature vectors.
+
+    Each frame's features are packed into one bitmask, and each gesture looks
+    up the transitions possible from its current state for that mask in its
+    compiled table, so a frame costs one table lookup per gesture however many
+    rows the tables have. Of the candidates, the first whose time window
+    contains the time spent in the current state is taken; if the features
+    match but the state has not been held long enough yet, the gesture waits.
+    That wait is the debounce: a drag needs the eye closed for the whole
+    drag duration, and a blink shorter than the blink duration is ignored.
+
+    All timing comes from the frame timestamps passed to `update`, so a
+    recorded feature trace replays to exactly the same actions.
+    """
+
+    def __init__(self, features: Sequence[str], gestures: Sequence[Gesture] = ()):
+        self.features = tuple(features)
+        self.gestures: List[Gesture] = []
+        self.tables: List[Dict[str, List[tuple]]] = []
+        self.states: Dict[str, str] = {}
+        self.entered: Dict[str, Optional[float]] = {}
+        self.configure(gestures)
+
+    def configure(self, gestures: Sequence[Gesture]) -> None:
+        """
+        Replace the gesture tables, e.g. after a timing setting changed.
+
+        Gestures that keep their name and current state carry on where they
+        were, so a drag in progress is not forgotten.
+        """
+        tables = [gesture.compile(self.features) for gesture in gestures]
+        states, entered = {}, {}
+        for gesture, table in zip(gestures, tables):
+            state = self.states.get(gesture.name)
+            if state in table:
+                states[gesture.name] = state
+                entered[gesture.name] = self.entered[gesture.name]
+            else:
+                states[gesture.name] = gesture.initial
+                entered[gesture.name] = None
+        self.gestures, self.tables = list(gestures), tables
+        self.states, self.entered = states, entered
+
+    def reset(self) -> None:
+        """Return every gesture to its initial state."""
+        for gesture in self.gestures:
+            self.states[gesture.name] = gesture.initial
+            self.entered[gesture.name] = None
+
+    def mask(self, values: Sequence[bool]) -> int:
+        """Pack a feature vector, in `features` order, into a bitmask."""
+        mask = 0
+        for i, on in enumerate(values):
+            if on:
+                mask |= 1 << i
+        return mask
+
+    def update(self, values: Sequence[bool], timestamp: float) -> List[str]:
+        """
+        Advance every gesture by one frame.
+
+        Args:
+            values: Feature vector in `features` order.
+            timestamp: Capture time of the frame in seconds.
+
+        Returns:
+            Actions fired on this frame, in gesture order.
+        """
+        mask = self.mask(values)
+        actions = []
+        for gesture, table in zip(self.gestures, self.tables):
+            name = gesture.name
+            entered = self.entered[name]
+            if entered is None:
+                entered = self.entered[name] = timestamp
+            dwell = timestamp - entered
+            for transition in table[self.states[name]][mask]:
+                if transition.min_seconds <= dwell < transition.max_seconds:
+                    if transition.target != self.states[name]:
+                        self.states[name] = transition.target
+                        self.entered[name] = timestamp
+                    if transition.action:
+                        actions.append(transition.action)
+                    break
+        return actions
+
+    def state(self, name: str) -> str:
+        return self.states[name]
+
+    def dwell(self, name: str, timestamp: float) -> float:
+        """Seconds gesture `name` has been in its current state at `timestamp`."""
+        entered = self.entered[name]
+        return 0.0 if entered is None else timestamp - entered
+
+
+def face_gestures(blink_duration: float, click_interval: float,
+                  right_click_duration: float = RIGHT_CLICK_DURATION_DEFAULT,
+                  drag_duration: float = DRAG_DURATION_DEFAULT,
+                  mouth_open_duration: float = 1.0) -> List[Gesture]:
+    """
+    The face controller's gestures, over FACE_FEATURES.
+
+    - blink: both eyes closed for at least `blink_duration` and less than
+      `click_interval` is a left click; closed for `right_click_duration` or
+      longer is a right click when they open. Shorter blinks are ignored as
+      natural ones, and closures in between do nothing.
+    - drag: the left eye alone closed for `drag_duration` presses the left
+      button; it is released when both eyes are open again.
+    - mouth: the mouth held open for `mouth_open_duration` toggles the
+      on-screen keyboard when it closes.
+    """
+    both_closed = {"left_eye_closed": True, "right_eye_closed": True}
+    both_open = {"left_eye_closed": False, "right_eye_closed": False}
+    left_only = {"left_eye_closed": True, "right_eye_closed": False}
+    return [
+        Gesture("blink", "open", [
+            Transition("open", both_closed, "closed"),
+            Transition("closed", both_open, "open", "left_click",
+                       min_seconds=blink_duration, max_seconds=click_interval),
+            Transition("closed", both_open, "open"),
+            Transition("closed", both_closed, "held", min_seconds=right_click_duration),
+            Transition("held", both_open, "open", "right_click"),
+        ]),
+        Gesture("drag", "idle", [
+            Transition("idle", left_only, "pending"),
+            Transition("pending", left_only, "dragging", "drag_start", min_seconds=drag_duration),
+            Transition("pending", {"left_eye_closed": False}, "idle"),
+            Transition("pending", {"right_eye_closed": True}, "idle"),
+            Transition("dragging", both_open, "idle", "drag_end"),
+        ]),
+        Gesture("mouth", "closed", [
+            Transition("closed", {"mouth_open": True}, "opening"),
+            Transition("opening", {"mouth_open": True}, "armed", min_seconds=mouth_open_duration),
+            Transition("opening", {"mouth_open": False}, "closed"),
+            Transition("armed", {"mouth_open": False}, "closed", "toggle_keyboard"),
+        ]),
+    ]
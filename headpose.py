@@ -0,0 +1,136 @@
+import math
+from typing import Optional, Tuple
+import cv2
+import numpy as np
+from landmarks import (NOSE_TIP, CHIN, EYE_OUTER_LEFT, EYE_OUTER_RIGHT, MOUTH_CORNER_LEFT,
+                       MOUTH_CORNER_RIGHT)
+
+CURSOR_MODES = ("nose", "head_position", "head_velocity")
+HEAD_YAW_RANGE_DEFAULT = 20.0  # Degrees of head turn that reach the screen edge / full speed
+HEAD_PITCH_RANGE_DEFAULT = 12.0
+HEAD_DEADZONE_DEFAULT = 1.0  # Degrees around the neutral pose that are ignored
+HEAD_CURVE_EXPONENT_DEFAULT = 1.5
+HEAD_MAX_SPEED_DEFAULT = 1500.0  # Pixels per second at full turn in velocity mode
+CALIBRATION_FRAMES = 15
+REFINE_CRITERIA = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_COUNT, 5, 1e-6)
+
+POSE_LANDMARKS = np.array([NOSE_TIP, CHIN, EYE_OUTER_LEFT, EYE_OUTER_RIGHT,
+                           MOUTH_CORNER_LEFT, MOUTH_CORNER_RIGHT])
+# Generic face model in the same order, in camera axes (x right, y down, z away
+# from the camera) with the face looking straight at the camera
+MODEL_POINTS = np.array([
+    (0.0, 0.0, 0.0),
+    (0.0, 330.0, 65.0),
+    (-225.0, -170.0, 135.0),
+    (225.0, -170.0, 135.0),
+    (-150.0, 150.0, 125.0),
+    (150.0, 150.0, 125.0),
+])
+
+
+def transfer_curve(value: float, deadzone: float, exponent: float) -> float:
+    """
+    Map a normalized head turn (1.0 = full range) to a cursor command in [-1, 1].
+
+    Turns within `deadzone` give 0; beyond it the output rises as a power
+    curve, so small turns give fine control and large turns reach the edge.
+    """
+    magnitude = (abs(value) - deadzone) / (1.0 - deadzone) if deadzone < 1.0 else 0.0
+    magnitude = min(1.0, max(0.0, magnitude)) ** exponent
+    return math.copysign(magnitude, value)
+
+
+class HeadPoseEstimator:
+    """
+    Estimates head yaw and pitch from a few FaceMesh landmarks with solvePnP.
+
+    Rotating the head changes the estimate while leaning or shifting the body
+    mostly does not, so the cursor no longer drifts with posture. The camera
+    matrix is cached per frame size and each solve starts from the previous
+    frame's pose, so a frame costs a few iterations on six points. Angles are
+    reported relative to a neutral pose averaged over the first
+    CALIBRATION_FRAMES frames.
+    """
+
+    def __init__(self, calibration_frames: int = CALIBRATION_FRAMES):
+        self.calibration_frames = calibration_frames
+        self.neutral: Optional[Tuple[float, float]] = None
+        self._calibrated = 0
+        self._camera = None
+        self._camera_size = None
+        self._distortion = np.zeros(4)
+        self._image_points = np.empty((len(POSE_LANDMARKS), 2))
+        self._rvec = None
+        self._tvec = None
+
+    def camera_matrix(self, width: int, height: int) -> np.ndarray:
+        """Pinhole camera matrix for a frame size, approximating the focal length by the width."""
+        if self._camera_size != (width, height):
+            self._camera = np.array([[width, 0.0, width / 2],
+                                     [0.0, width, height / 2],
+                                     [0.0, 0.0, 1.0]])
+            self._camera_size = (width, height)
+        return self._camera
+
+    def reset(self) -> None:
+        """Drop the warm start, e.g. after the face was lost."""
+        self._rvec = self._tvec = None
+
+    def recenter(self) -> None:
+        """Take the neutral pose again from the next frames."""
+        self.neutral = None
+        self._calibrated = 0
+
+    def solve(self, points: np.ndarray, frame_size: Tuple[int, int]) -> Optional[Tuple[float, float]]:
+        """
+        Absolute head pose of one frame.
+
+        Args:
+            points: (N, 3) array of normalized facial landmarks.
+            frame_size: (width, height) of the frame they were found in.
+
+        Returns:
+            (yaw, pitch) in degrees, positive when the nose turns towards the
+            right of / down the image, or None if no pose was found.
+        """
+        width, height = frame_size
+        image = self._image_points
+        np.multiply(points[POSE_LANDMARKS, :2], (width, height), out=image)
+        # The model expects an unmirrored face; solve on one and mirror the yaw back
+        mirrored = image[2, 0] > image[3, 0]
+        if mirrored:
+            np.subtract(width, image[:, 0], out=image[:, 0])
+        camera = self.camera_matrix(width, height)
+        if self._rvec is None:
+            ok, self._rvec, self._tvec = cv2.solvePnP(MODEL_POINTS, image, camera, self._distortion,
+                                                      flags=cv2.SOLVEPNP_EPNP)
+            if not ok:
+                self.reset()
+                return None
+        # A few refinement steps from the last pose; the head moves little between frames
+        cv2.solvePnPRefineVVS(MODEL_POINTS, image, camera, self._distortion,
+                              self._rvec, self._tvec, REFINE_CRITERIA)
+        if not np.isfinite(self._tvec).all() or self._tvec[2, 0] <= 0:
+            self.reset()
+            return None
+        rotation, _ = cv2.Rodrigues(self._rvec)
+        # Direction the face looks in: the model's -z axis
+        forward_x, forward_y, forward_z = -rotation[:, 2]
+        yaw = math.degrees(math.atan2(forward_x, -forward_z))
+        pitch = math.degrees(math.atan2(forward_y, -forward_z))
+        return (-yaw if mirrored else yaw), pitch
+
+    def estimate(self, points: np.ndarray, frame_size: Tuple[int, int]) -> Optional[Tuple[float, float]]:
+        """(yaw, pitch) in degrees relative to the neutral pose, or None if no pose was found."""
+        pose = self.solve(points, frame_size)
+        if pose is None:
+            return None
+        if self._calibrated < self.calibration_frames:
+            self._calibrated += 1
+            if self.neutral is None:
+                self.neutral = pose
+            else:
+                weight = 1.0 / self._calibrated
+                self.neutral = (self.neutral[0] + (pose[0] - self.neutral[0]) * weight,
+                                self.neutral[1] + (pose[1] - self.neutral[1]) * weight)
+        return pose[0] - self.neutral[0], pose[1] - self.neutral[1]
@@ -0,0 +1,501 @@
+from threading import Thread, Event, Condition, Lock
+from collections import deque
+from typing import List, Optional, Tuple
+import atexit
+import logging
+import shutil
+import subprocess
+import sys
+import time
+from metrics import MetricsRegistry, RateLimitedLogger
+from scheduler import set_thread_priority, PRIORITY_HIGH
+
+logger = logging.getLogger(__name__)
+
+CLICK_HOLD_DEFAULT = 0.05
+CLICK_INTERVAL_DEFAULT = 0.05
+FOCUS_SETTLE_DEFAULT = 0.1  # Seconds for a window switch to take effect before the next event
+SETTLE_OPS = ("hotkey",)  # Events that may move the keyboard focus to another window
+SCROLL_NOTCH = 120  # Wheel delta of one scroll notch
+
+
+class InputBackend:
+    """Interface for injecting mouse and keyboard events into the OS."""
+
+    name = "base"
+
+    def move_to(self, x: int, y: int) -> None:
+        raise NotImplementedError
+
+    def move_rel(self, dx: int, dy: int) -> None:
+        x, y = self.position()
+        self.move_to(x + dx, y + dy)
+
+    def mouse_down(self, button: str = 'left') -> None:
+        raise NotImplementedError
+
+    def mouse_up(self, button: str = 'left') -> None:
+        raise NotImplementedError
+
+    def scroll(self, amount: int) -> None:
+        raise NotImplementedError
+
+    def press(self, key: str) -> None:
+        raise NotImplementedError
+
+    def hotkey(self, *keys: str) -> None:
+        raise NotImplementedError
+
+    def write(self, text: str) -> None:
+        raise NotImplementedError
+
+    def position(self) -> Tuple[int, int]:
+        raise NotImplementedError
+
+    def size(self) -> Tuple[int, int]:
+        raise NotImplementedError
+
+
+class PyAutoGUIBackend(InputBackend):
+    """Cross-platform backend built on pyautogui."""
+
+    name = "pyautogui"
+
+    def __init__(self):
+        import pyautogui
+        self.pyautogui = pyautogui
+        pyautogui.FAILSAFE = True
+        pyautogui.PAUSE = 0  # Pacing is done by the dispatcher, never by sleeping in pyautogui
+
+    def move_to(self, x, y):
+        self.pyautogui.moveTo(x, y)
+
+    def move_rel(self, dx, dy):
+        self.pyautogui.moveRel(dx, dy)
+
+    def mouse_down(self, button='left'):
+        self.pyautogui.mouseDown(button=button)
+
+    def mouse_up(self, button='left'):
+        self.pyautogui.mouseUp(button=button)
+
+    def scroll(self, amount):
+        self.pyautogui.scroll(amount)
+
+    def press(self, key):
+        self.pyautogui.press(key)
+
+    def hotkey(self, *keys):
+        self.pyautogui.hotkey(*keys)
+
+    def write(self, text):
+        self.pyautogui.write(text)
+
+    def position(self):
+        x, y = self.pyautogui.position()
+        return int(x), int(y)
+
+    def size(self):
+        width, height = self.pyautogui.size()
+        return int(width), int(height)
+
+
+class Win32Backend(PyAutoGUIBackend):
+    """Windows backend: mouse events go straight to win32api, keys through pyautogui."""
+
+    name = "win32"
+
+    def __init__(self):
+        super().__init__()
+        import win32api
+        import win32con
+        self.win32api = win32api
+        self.win32con = win32con
+        self._buttons = {
+            'left': (win32con.MOUSEEVENTF_LEFTDOWN, win32con.MOUSEEVENTF_LEFTUP),
+            'right': (win32con.MOUSEEVENTF_RIGHTDOWN, win32con.MOUSEEVENTF_RIGHTUP),
+            'middle': (win32con.MOUSEEVENTF_MIDDLEDOWN, win32con.MOUSEEVENTF_MIDDLEUP),
+        }
+
+    def move_to(self, x, y):
+        self.win32api.SetCursorPos((int(x), int(y)))
+
+    def mouse_down(self, button='left'):
+        self.win32api.mouse_event(self._buttons[button][0], 0, 0, 0, 0)
+
+    def mouse_up(self, button='left'):
+        self.win32api.mouse_event(self._buttons[button][1], 0, 0, 0, 0)
+
+    def scroll(self, amount):
+        self.win32api.mouse_event(self.win32con.MOUSEEVENTF_WHEEL, 0, 0, int(amount), 0)
+
+    def position(self):
+        return self.win32api.GetCursorPos()
+
+    def size(self):
+        return (self.win32api.GetSystemMetrics(self.win32con.SM_CXSCREEN),
+                self.win32api.GetSystemMetrics(self.win32con.SM_CYSCREEN))
+
+
+class XdotoolBackend(InputBackend):
+    """Linux/X11 backend driving the xdotool command line tool."""
+
+    name = "xdotool"
+    BUTTONS = {'left': '1', 'middle': '2', 'right': '3'}
+    KEYS = {
+        'enter': 'Return', 'return': 'Return', 'backspace': 'BackSpace', 'tab': 'Tab',
+        'space': 'space', 'esc': 'Escape', 'escape': 'Escape', 'delete': 'Delete',
+        'ctrl': 'ctrl', 'alt': 'alt', 'shift': 'shift', 'win': 'super',
+        'left': 'Left', 'right': 'Right', 'up': 'Up', 'down': 'Down',
+        'pgup': 'Page_Up', 'pgdn': 'Page_Down', 'pageup': 'Page_Up', 'pagedown': 'Page_Down',
+        'home': 'Home', 'end': 'End',
+        'volumeup': 'XF86AudioRaiseVolume', 'volumedown': 'XF86AudioLowerVolume',
+        'volumemute': 'XF86AudioMute', 'playpause': 'XF86AudioPlay',
+    }
+
+    def __init__(self):
+        self.executable = shutil.which("xdotool")
+        if self.executable is None:
+            raise RuntimeError("xdotool is not installed")
+
+    def _run(self, *args: str, capture: bool = False) -> str:
+        result = subprocess.run([self.executable, *args], check=True,
+                                stdout=subprocess.PIPE if capture else subprocess.DEVNULL,
+                                text=True)
+        return result.stdout if capture else ""
+
+    def _key(self, key: str) -> str:
+        if key.lower().startswith('f') and key[1:].isdigit():
+            return key.upper()
+        return self.KEYS.get(key.lower(), key)
+
+    def move_to(self, x, y):
+        self._run("mousemove", str(int(x)), str(int(y)))
+
+    def move_rel(self, dx, dy):
+        self._run("mousemove_relative", "--", str(int(dx)), str(int(dy)))
+
+    def mouse_down(self, button='left'):
+        self._run("mousedown", self.BUTTONS[button])
+
+    def mouse_up(self, button='left'):
+        self._run("mouseup", self.BUTTONS[button])
+
+    def scroll(self, amount):
+        # Amounts are wheel deltas as on Windows; X11 scrolls in whole notches
+        notches = max(1, round(abs(amount) / SCROLL_NOTCH))
+        self._run("click", "--repeat", str(notches), "4" if amount > 0 else "5")
+
+    def press(self, key):
+        self._run("key", self._key(key))
+
+    def hotkey(self, *keys):
+        self._run("key", "+".join(self._key(key) for key in keys))
+
+    def write(self, text):
+        self._run("type", "--delay", "0", "--", text)
+
+    def position(self):
+        fields = dict(line.split("=", 1) for line in
+                      self._run("getmouselocation", "--shell", capture=True).split())
+        return int(fields["X"]), int(fields["Y"])
+
+    def size(self):
+        width, height = self._run("getdisplaygeometry", capture=True).split()
+        return int(width), int(height)
+
+
+class RecordingBackend(InputBackend):
+    """In-memory backend that records every injected event; used for tests and benchmarks."""
+
+    name = "recorder"
+
+    def __init__(self, width: int = 1920, height: int = 1080):
+        self.width = width
+        self.height = height
+        self.cursor = (width // 2, height // 2)
+        self.events: List[Tuple[float, str, tuple]] = []
+        self._lock = Lock()
+
+    def _record(self, op: str, *args) -> None:
+        with self._lock:
+            self.events.append((time.perf_counter(), op, args))
+
+    def move_to(self, x, y):
+        self.cursor = (int(x), int(y))
+        self._record("move_to", *self.cursor)
+
+    def move_rel(self, dx, dy):
+        self.cursor = (self.cursor[0] + int(dx), self.cursor[1] + int(dy))
+        self._record("move_rel", int(dx), int(dy))
+
+    def mouse_down(self, button='left'):
+        self._record("mouse_down", button)
+
+    def mouse_up(self, button='left'):
+        self._record("mouse_up", button)
+
+    def scroll(self, amount):
+        self._record("scroll", amount)
+
+    def press(self, key):
+        self._record("press", key)
+
+    def hotkey(self, *keys):
+        self._record("hotkey", *keys)
+
+    def write(self, text):
+        self._record("write", text)
+
+    def position(self):
+        return self.cursor
+
+    def size(self):
+        return self.width, self.height
+
+    def counts(self) -> dict:
+        """Number of recorded events per operation."""
+        with self._lock:
+            totals = {}
+            for _, op, _ in self.events:
+                totals[op] = totals.get(op, 0) + 1
+            return totals
+
+
+BACKENDS = {
+    PyAutoGUIBackend.name: PyAutoGUIBackend,
+    Win32Backend.name: Win32Backend,
+    XdotoolBackend.name: XdotoolBackend,
+    RecordingBackend.name: RecordingBackend,
+}
+
+
+def create_backend(name: str = "auto") -> InputBackend:
+    """Create an input backend by name; "auto" picks the best one for this platform."""
+    if name == "auto":
+        name = "win32" if sys.platform == "win32" else "pyautogui"
+        try:
+            return BACKENDS[name]()
+        except ImportError as e:
+            logger.warning(f"Input backend '{name}' unavailable ({e}), using pyautogui")
+            return PyAutoGUIBackend()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown input backend '{name}'. Choose from: {', '.join(BACKENDS)}")
+    return BACKENDS[name]()
+
+
+class InputDispatcher:
+    """
+    Shared, non-blocking output queue for all controllers.
+
+    Producers only append to a queue and return. A dispatcher thread drains
+    it in order and drives the backend. Cursor moves are coalesced so only the
+    latest target is injected. Press/release pairs of a click are scheduled
+    with a due time instead of sleeping, and cursor moves are held back while
+    a click is in progress so it does not turn into a drag. After an event
+    that can switch windows (SETTLE_OPS) the queue waits `settle_time`
+    seconds, so a key press sent right after Alt+Tab reaches the new window.
+
+    There is one dispatcher per process; every `InputDispatcher()` returns
+    it. The backend is chosen with `use_backend` or `set_backend`, and
+    defaults to the "auto" backend, created on first use.
+    """
+    _instance = None
+    _lock = Lock()
+
+    def __new__(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = super().__new__(cls)
+            return cls._instance
+
+    def __init__(self):
+        if not hasattr(self, '_initialized'):
+            self._backend: Optional[InputBackend] = None
+            self.click_hold = CLICK_HOLD_DEFAULT
+            self.settle_time = FOCUS_SETTLE_DEFAULT
+            self.stop_event = Event()
+            self.dispatch_thread = None
+            self.coalesced_moves = 0
+            self.dispatched = 0
+            self._cond = Condition()
+            self._queue = deque()  # (due, op, args, holds_moves)
+            self._pending_move: Optional[Tuple[int, int]] = None
+            self._busy = False
+            self._settle_until = 0.0
+            self.metrics = MetricsRegistry()
+            self.metrics.gauge("input.dispatched", lambda: self.dispatched)
+            self.metrics.gauge("input.coalesced_moves", lambda: self.coalesced_moves)
+            self.log_limiter = RateLimitedLogger(logger)
+            atexit.register(self.stop)
+            self._initialized = True
+            self.start()
+
+    @property
+    def backend(self) -> InputBackend:
+        with self._cond:
+            if self._backend is None:
+                self._backend = create_backend("auto")
+            return self._backend
+
+    def set_backend(self, backend: InputBackend) -> None:
+        """Swap the backend; queued events are delivered to the new one."""
+        with self._cond:
+            self._backend = backend
+
+    def use_backend(self, name: str) -> None:
+        """
+        Switch to the backend called `name` unless one of that kind is already
+        in use; "auto" keeps whatever backend was chosen before.
+        """
+        with self._cond:
+            if name == "auto" or (self._backend is not None and self._backend.name == name):
+                return
+            self._backend = create_backend(name)
+
+    # Producer API: never blocks on the backend
+
+    def move_to(self, x: float, y: float) -> None:
+        with self._cond:
+            if self._pending_move is not None:
+                self.coalesced_moves += 1
+            self._pending_move = (int(x), int(y))
+            self._cond.notify()
+
+    def move_rel(self, dx: int, dy: int) -> None:
+        self._enqueue("move_rel", dx, dy)
+
+    def mouse_down(self, button: str = 'left') -> None:
+        self._enqueue("mouse_down", button)
+
+    def mouse_up(self, button: str = 'left') -> None:
+        self._enqueue("mouse_up", button)
+
+    def click(self, x: Optional[float] = None, y: Optional[float] = None,
+              button: str = 'left', clicks: int = 1,
+              interval: float = CLICK_INTERVAL_DEFAULT) -> None:
+        """Queue one or more clicks, optionally at a position."""
+        with self._cond:
+            if x is not None and y is not None:
+                self._pending_move = (int(x), int(y))
+            self._flush_move()
+            # Due times are relative to when the previous event runs, so the
+            # dispatcher spaces the pairs out without the caller waiting.
+            for n in range(clicks):
+                self._queue.append((interval if n else 0.0, "mouse_down", (button,), True))
+                self._queue.append((self.click_hold, "mouse_up", (button,), n < clicks - 1))
+            self._cond.notify()
+
+    def scroll(self, amount: int) -> None:
+        self._enqueue("scroll", amount)
+
+    def press(self, key: str) -> None:
+        self._enqueue("press", key)
+
+    def hotkey(self, *keys: str) -> None:
+        self._enqueue("hotkey", *keys)
+
+    def write(self, text: str) -> None:
+        self._enqueue("write", text)
+
+    def position(self) -> Tuple[int, int]:
+        """Cursor position, including a move that is queued but not yet injected."""
+        with self._cond:
+            if self._pending_move is not None:
+                return self._pending_move
+        return self.backend.position()
+
+    def size(self) -> Tuple[int, int]:
+        return self.backend.size()
+
+    def flush(self, timeout: float = 1.0) -> bool:
+        """Wait until every queued event has been dispatched."""
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: not self._queue and self._pending_move is None and not self._busy,
+                timeout)
+
+    def _flush_move(self) -> None:
+        # Keep a pending move ahead of the event being queued
+        if self._pending_move is not None:
+            self._queue.append((0.0, "move_to", self._pending_move, False))
+            self._pending_move = None
+
+    def _enqueue(self, op: str, *args) -> None:
+        with self._cond:
+            self._flush_move()
+            self._queue.append((0.0, op, args, False))
+            self._cond.notify()
+
+    # Dispatcher thread
+
+    def _next_event(self, allow_moves: bool = True):
+        """
+        Block until an event is due and return (op, args, holds_moves).
+
+        While a click is held (`allow_moves` False) pending cursor moves are
+        left alone so the press and release land on the same spot.
+        """
+        with self._cond:
+            ready_at = None
+            while not self.stop_event.is_set():
+                now = time.perf_counter()
+                if self._queue:
+                    delay, op, args, holds_moves = self._queue[0]
+                    if ready_at is None:
+                        ready_at = max(now + delay, self._settle_until)
+                    if now >= ready_at:
+                        self._queue.popleft()
+                        self._busy = True
+                        return op, args, holds_moves
+                    self._cond.wait(ready_at - now)
+                elif allow_moves and self._pending_move is not None:
+                    move = self._pending_move
+                    self._pending_move = None
+                    self._busy = True
+                    return "move_to", move, False
+                else:
+                    self._cond.notify_all()  # Wake flush() waiters
+                    self._cond.wait()
+            return None
+
+    def dispatch_events(self):
+        """Dispatcher loop: inject queued events in order."""
+        set_thread_priority(PRIORITY_HIGH)
+        holding = False
+        while not self.stop_event.is_set():
+            event = self._next_event(allow_moves=not holding)
+            if event is None:
+                break
+            op, args, holding = event
+            started = time.perf_counter()
+            try:
+                getattr(self.backend, op)(*args)
+                self.dispatched += 1
+                self.metrics.observe(f"input.{op}", time.perf_counter() - started)
+            except Exception as e:
+                self.log_limiter.error(op, f"Error injecting {op}{args}: {e}")
+            finally:
+                with self._cond:
+                    if op in SETTLE_OPS:
+                        self._settle_until = time.perf_counter() + self.settle_time
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def start(self):
+        """Start the dispatcher thread."""
+        if self.dispatch_thread is None or not self.dispatch_thread.is_alive():
+            self.stop_event.clear()
+            self.dispatch_thread = Thread(target=self.dispatch_events,
+                                          name="InputDispatchThread")
+            self.dispatch_thread.daemon = True
+            self.dispatch_thread.start()
+
+    def stop(self):
+        """Deliver what is queued, then stop the dispatcher thread."""
+        if self.dispatch_thread and self.dispatch_thread.is_alive():
+            self.flush(timeout=1.0)
+            self.stop_event.set()
+            with self._cond:
+                self._cond.notify_all()
+            self.dispatch_thread.join(timeout=1.0)
@@ -0,0 +1,112 @@
+from threading import Thread, Lock
+import logging
+import time
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# FaceMesh with refine_landmarks=True returns 468 face points plus 10 iris points
+NUM_LANDMARKS = 478
+
+NOSE_TIP = 1
+UPPER_LIP, LOWER_LIP = 13, 14
+MOUTH_LEFT, MOUTH_RIGHT = 78, 308
+LEFT_EYE_TOP, LEFT_EYE_BOTTOM = 145, 159
+RIGHT_EYE_TOP, RIGHT_EYE_BOTTOM = 374, 386
+FACE_LEFT, FACE_RIGHT = 234, 454
+CHIN = 152
+EYE_OUTER_LEFT, EYE_OUTER_RIGHT = 33, 263  # Outer eye corners, left and right in an unmirrored image
+MOUTH_CORNER_LEFT, MOUTH_CORNER_RIGHT = 61, 291
+
+FACE_MESH_OPTIONS = {
+    "refine_landmarks": True,
+    "min_detection_confidence": 0.5,
+    "min_tracking_confidence": 0.5,
+}
+
+# Offsets of the pixels drawn for each landmark in the overlay (a small plus sign)
+_DOT_OFFSETS = np.array([(0, 0), (1, 0), (-1, 0), (0, 1), (0, -1)], dtype=np.int32)
+
+
+class FaceMeshLoader:
+    """
+    Builds the MediaPipe FaceMesh graph on first use.
+
+    Importing mediapipe and loading the graph takes seconds, so `prewarm`
+    can do it on a background thread ahead of time, e.g. while the startup
+    menu is shown. `get` waits for a prewarm in progress instead of loading
+    a second graph.
+    """
+
+    def __init__(self):
+        self.prewarm_thread = None
+        self._face_mesh = None
+        self._lock = Lock()
+
+    def get(self):
+        """The FaceMesh graph, loading it now if needed."""
+        with self._lock:
+            if self._face_mesh is None:
+                started = time.perf_counter()
+                import mediapipe as mp
+                self._face_mesh = mp.solutions.face_mesh.FaceMesh(**FACE_MESH_OPTIONS)
+                logger.info(f"FaceMesh loaded in {(time.perf_counter() - started) * 1000:.0f} ms")
+            return self._face_mesh
+
+    def _prewarm(self):
+        try:
+            self.get()
+        except Exception as e:
+            logger.warning(f"FaceMesh prewarm failed: {e}")
+
+    def prewarm(self):
+        """Start loading the graph in a separate thread."""
+        if self.prewarm_thread is None:
+            self.prewarm_thread = Thread(target=self._prewarm, name="FaceMeshPrewarmThread")
+            self.prewarm_thread.daemon = True
+            self.prewarm_thread.start()
+
+
+class LandmarkBuffer:
+    """Reusable (N, 3) float32 array holding one frame's landmarks as x, y, z rows."""
+
+    def __init__(self, size: int = NUM_LANDMARKS):
+        self._allocate(size)
+        self.count = 0
+
+    def _allocate(self, size: int) -> None:
+        self.points = np.zeros((size, 3), dtype=np.float32)
+        # Flat float view of the same memory; item assignment through it
+        # writes straight into the array without creating numpy scalars
+        self._flat = memoryview(self.points).cast("B").cast("f")
+
+    def load(self, landmarks) -> np.ndarray:
+        """
+        Copy MediaPipe landmark protos into the buffer in place, in a single pass.
+
+        Returns:
+            A view of the filled rows of the buffer.
+        """
+        count = len(landmarks)
+        if count > len(self.points):
+            self._allocate(count)
+        flat = self._flat
+        i = 0
+        for lm in landmarks:
+            flat[i] = lm.x
+            flat[i + 1] = lm.y
+            flat[i + 2] = lm.z
+            i += 3
+        self.count = count
+        return self.points[:count]
+
+
+def draw_landmarks(frame: np.ndarray, points: np.ndarray, color=(0, 255, 0)) -> None:
+    """Draw every landmark onto a frame in one vectorized write."""
+    frame_h, frame_w = frame.shape[:2]
+    pixels = (points[:, :2] * (frame_w, frame_h)).astype(np.int32)
+    pixels = (pixels[:, None, :] + _DOT_OFFSETS[None, :, :]).reshape(-1, 2)
+    inside = (pixels[:, 0] >= 0) & (pixels[:, 0] < frame_w) & \
+             (pixels[:, 1] >= 0) & (pixels[:, 1] < frame_h)
+    pixels = pixels[inside]
+    frame[pixels[:, 1], pixels[:, 0]] = color
@@ -1,16 +1,14 @@
-import cv2
-import mediapipe as mp
-import pyautogui
+import time
+
+PROCESS_STARTED = time.perf_counter()
+
+import argparse
 import signal
-import sys
 import os
-import time
 import logging
-from threading import Lock, Thread, Event
-from contextlib import contextmanager
 from pynput import keyboard
 import json
-from typing import List, Optional
+from typing import Optional, TYPE_CHECKING
 
 # Set up logging configuration
 logging.basicConfig(
@@ -23,17 +21,47 @@ logger = logging.getLogger(__name__)
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
 os.environ['TF_ENABLE_ONEDNN_OPTS'] = '0'
 
-# Import custom controllers
-from facecontroller import FaceController
-from voicecontroller import VoiceController
+# Controllers are imported once chosen, so only their own dependencies
+# (OpenCV and MediaPipe, or speech recognition) are loaded
+from landmarks import FaceMeshLoader
+from metrics import (MetricsExporter, MetricsRegistry, METRICS_PORT_DEFAULT, METRICS_FILE_DEFAULT,
+                     METRICS_INTERVAL_DEFAULT)
+from scheduler import ControllerScheduler
+
+if TYPE_CHECKING:
+    from facecontroller import FaceController
+    from voicecontroller import VoiceController
+
+FACE_CONFIG_PATH = "face_controller_config.json"
+
+
+def load_face_settings(defaults: dict, path: str = FACE_CONFIG_PATH) -> dict:
+    """
+    Read a few settings from the face controller config without creating a
+    FaceController. Metrics settings live there whatever the mode.
+    """
+    settings = dict(defaults)
+    try:
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                saved = json.load(f)
+            settings.update({key: saved[key] for key in settings if key in saved})
+    except Exception as e:
+        logger.error(f"Error loading face controller settings: {e}")
+    return settings
+
 
 class ApplicationController:
-    def __init__(self):
+    def __init__(self, prewarm: bool = True):
         self.capslock = False
-        self.face_controller: Optional[FaceController] = None
-        self.voice_controller: Optional[VoiceController] = None
-        self.active_controllers: List = []
+        self.face_controller: Optional["FaceController"] = None
+        self.voice_controller: Optional["VoiceController"] = None
+        self.prewarm = prewarm
+        self.face_mesh_loader = FaceMeshLoader()
+        self.menu_seconds = 0.0  # Time spent waiting for the user, left out of the cold start time
+        self.scheduler = ControllerScheduler()
         self.keyboard_listener: Optional[keyboard.Listener] = None
+        self.metrics_exporter: Optional[MetricsExporter] = None
 
     def on_press(self, key: keyboard.Key) -> None:
         """Handle keyboard press events."""
@@ -49,37 +77,69 @@ class ApplicationController:
     def on_release(self, key: keyboard.Key) -> bool:
         """Handle keyboard release events."""
         if key == keyboard.Key.esc:
-            self.stop_all_controllers()
+            self.scheduler.request_stop()
             return False
         return True
 
     def stop_all_controllers(self) -> None:
         """Stop all active controllers."""
-        for controller in self.active_controllers:
-            if hasattr(controller, 'stop_event'):
-                controller.stop_event.set()
-            if hasattr(controller, 'stop'):
-                controller.stop()
+        self.scheduler.shutdown()
 
     def signal_handler(self, signum: int, frame: object) -> None:
         """Handle system signals for clean shutdown."""
         logger.info(f"Received shutdown signal: {signum}")
-        self.stop_all_controllers()
-        sys.exit(0)
+        # The main thread wakes up and shuts down
+        self.scheduler.request_stop()
 
-    def initialize_controllers(self, choice: int) -> None:
+    def initialize_controllers(self, choice: int, preview_choice: Optional[int] = None) -> None:
         """Initialize controllers based on user choice."""
-        self.face_controller = FaceController()
-        self.voice_controller = VoiceController()
-
-        if choice == 1:
-            self.active_controllers = [self.face_controller]
-        elif choice == 2:
-            self.active_controllers = [self.voice_controller]
-        elif choice == 3:
-            self.active_controllers = [self.voice_controller, self.face_controller]
-        else:
+        headless, preview_fps = None, None
+        if preview_choice == 1:
+            headless = False
+        elif preview_choice == 2:
+            headless = True
+        elif preview_choice == 3:
+            headless, preview_fps = True, 0
+        if choice not in (1, 2, 3):
             raise ValueError("Invalid choice. Please select 1, 2, or 3.")
+        started = time.perf_counter()
+        stop_event = self.scheduler.stop_event
+        if choice in (2, 3):
+            from voicecontroller import VoiceController
+            self.voice_controller = VoiceController(stop_event=stop_event)
+            self.scheduler.add(self.voice_controller)
+        if choice in (1, 3):
+            from facecontroller import FaceController
+            self.face_controller = FaceController(headless=headless, preview_fps=preview_fps,
+                                                  stop_event=stop_event,
+                                                  face_mesh_loader=self.face_mesh_loader)
+            self.face_controller.first_move_listeners.append(self.report_cold_start)
+            self.scheduler.add(self.face_controller)
+        logger.info(f"Controllers created in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+        settings = load_face_settings({
+            "metrics_port": METRICS_PORT_DEFAULT,
+            "metrics_file": METRICS_FILE_DEFAULT,
+            "metrics_interval": METRICS_INTERVAL_DEFAULT
+        })
+        self.metrics_exporter = MetricsExporter(port=settings["metrics_port"],
+                                                path=settings["metrics_file"],
+                                                interval=settings["metrics_interval"])
+
+    def report_cold_start(self, moved_at: float) -> None:
+        """Log and record how long it took from launch to the first cursor movement."""
+        cold_start = moved_at - PROCESS_STARTED - self.menu_seconds
+        MetricsRegistry().observe("app.cold_start", cold_start)
+        logger.info(f"Cold start: first cursor movement {cold_start * 1000:.0f} ms after launch "
+                    f"(not counting {self.menu_seconds:.1f} s in the menu)")
+
+    def ask(self, prompt: str) -> str:
+        """Read a menu answer, keeping track of how long the user took."""
+        started = time.perf_counter()
+        try:
+            return input(prompt)
+        finally:
+            self.menu_seconds += time.perf_counter() - started
 
     def run(self) -> None:
         """Run the application."""
@@ -89,8 +149,23 @@ class ApplicationController:
             print("2. Only voice controller")
             print("3. Both face and voice controller")
             
-            choice = int(input("Enter your choice (1-3): "))
-            self.initialize_controllers(choice)
+            choice = int(self.ask("Enter your choice (1-3): "))
+            preview_choice = None
+            if choice in (1, 3):
+                # Load the FaceMesh graph while the remaining questions are
+                # answered, unless a worker process will load its own
+                if self.prewarm and not load_face_settings({"face_worker": False})["face_worker"]:
+                    self.face_mesh_loader.prewarm()
+                print("Camera preview:")
+                print("1. Full preview")
+                print("2. Low-rate preview (headless tracking)")
+                print("3. No preview (headless tracking)")
+                answer = self.ask("Enter your choice (1-3, Enter for saved setting): ").strip()
+                if answer:
+                    preview_choice = int(answer)
+                    if preview_choice not in (1, 2, 3):
+                        raise ValueError("Invalid preview choice. Please select 1, 2, or 3.")
+            self.initialize_controllers(choice, preview_choice)
 
             # Set up keyboard listener
             self.keyboard_listener = keyboard.Listener(
@@ -104,15 +179,12 @@ class ApplicationController:
             signal.signal(signal.SIGTERM, self.signal_handler)
 
             # Start active controllers
-            for controller in self.active_controllers:
-                controller.start()
-
-            logger.info("Main thread monitoring controllers")
+            self.metrics_exporter.start()
+            self.scheduler.start()
 
-            # Monitor controllers
-            while all(not controller.stop_event.is_set() 
-                     for controller in self.active_controllers):
-                time.sleep(0.1)
+            logger.info("Main thread waiting for controllers")
+            # Sleeps until a controller stops or a stop is requested
+            self.scheduler.wait()
 
         except ValueError as ve:
             logger.error(f"Invalid input: {ve}")
@@ -124,10 +196,19 @@ class ApplicationController:
             self.stop_all_controllers()
             if self.keyboard_listener:
                 self.keyboard_listener.stop()
+            if self.metrics_exporter:
+                self.metrics_exporter.stop()
+                summary = MetricsRegistry().summary()
+                if summary:
+                    logger.info(f"Stage latencies:\n{summary}")
             logger.info("Application shutting down.")
 
 def main():
-    app = ApplicationController()
+    parser = argparse.ArgumentParser(description="Control the computer with head movements and voice.")
+    parser.add_argument("--no-prewarm", action="store_true",
+                        help="Do not load the face tracking model while the menu is shown")
+    args = parser.parse_args()
+    app = ApplicationController(prewarm=not args.no_prewarm)
     app.run()
 
 if __name__ == "__main__":
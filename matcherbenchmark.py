@@ -0,0 +1,77 @@
+"""
+Micro-benchmark for voice command matching.
+
+Compares the indexed CommandMatcher with a linear substring scan over the
+command table, for synthetic tables of increasing size:
+
+    python matcherbenchmark.py
+    python matcherbenchmark.py --sizes 100 1000 10000 100000 --utterances 2000
+"""
+import argparse
+import random
+import sys
+import time
+
+from voicecommands import CommandMatcher
+
+WORDS_PER_PHRASE = (1, 4)
+WORDS_PER_UTTERANCE = (1, 8)
+
+
+def synthetic_phrases(count: int, rng: random.Random):
+    """`count` distinct phrases drawn from a vocabulary that grows with the table."""
+    vocabulary = [f"w{index}" for index in range(max(50, count // 4))]
+    phrases = set()
+    while len(phrases) < count:
+        phrases.add(" ".join(rng.choices(vocabulary, k=rng.randint(*WORDS_PER_PHRASE))))
+    return sorted(phrases), vocabulary
+
+
+def synthetic_utterances(phrases, vocabulary, count: int, rng: random.Random):
+    """Utterances mixing filler words with zero to two phrases."""
+    utterances = []
+    for _ in range(count):
+        words = rng.choices(vocabulary, k=rng.randint(*WORDS_PER_UTTERANCE))
+        for _ in range(rng.randint(0, 2)):
+            words.insert(rng.randint(0, len(words)), rng.choice(phrases))
+        utterances.append(" ".join(words))
+    return utterances
+
+
+def linear_scan(phrases, text):
+    """The matching VoiceController used to do: test every phrase against the text."""
+    return [phrase for phrase in phrases if phrase in text]
+
+
+def time_per_call(match, utterances) -> float:
+    started = time.perf_counter()
+    for text in utterances:
+        match(text)
+    return (time.perf_counter() - started) / len(utterances)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark voice command matching.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 50000],
+                        help="Command table sizes to test")
+    parser.add_argument("--utterances", type=int, default=1000, help="Utterances per size")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    print(f"{'commands':>10}{'build ms':>12}{'indexed us':>14}{'linear us':>14}{'speedup':>10}")
+    for size in args.sizes:
+        phrases, vocabulary = synthetic_phrases(size, rng)
+        utterances = synthetic_utterances(phrases, vocabulary, args.utterances, rng)
+        started = time.perf_counter()
+        matcher = CommandMatcher(phrases)
+        build = time.perf_counter() - started
+        indexed = time_per_call(matcher.find, utterances)
+        linear = time_per_call(lambda text: linear_scan(phrases, text), utterances)
+        print(f"{size:>10}{build * 1000:>12.1f}{indexed * 1e6:>14.1f}{linear * 1e6:>14.1f}"
+              f"{linear / indexed:>9.0f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,293 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread, Event, Lock
+from typing import Callable, Dict, Optional
+import json
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+METRICS_PORT_DEFAULT = 0  # 0 disables the HTTP endpoint
+METRICS_FILE_DEFAULT = ""  # "" disables the summary file
+METRICS_INTERVAL_DEFAULT = 10.0
+LOG_INTERVAL_DEFAULT = 5.0
+PERCENTILES = (50, 90, 99)
+
+# Geometric bucket upper bounds from 50 us to ~15 s, 25% apart
+BUCKET_BOUNDS = tuple(50e-6 * 1.25 ** i for i in range(57))
+
+
+class LatencyHistogram:
+    """
+    Fixed-size latency histogram with geometric buckets.
+
+    Recording is a binary search and an increment, so it is cheap enough for
+    every frame and never grows. Percentiles are reported as the upper bound
+    of the bucket they fall in, i.e. to within 25%.
+    """
+
+    def __init__(self, bounds=BUCKET_BOUNDS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # Last bucket holds overflows
+        self._lock = Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counts[:] = [0] * len(self.counts)
+            self.count = 0
+            self.total = 0.0
+            self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self.counts[bisect_left(self.bounds, seconds)] += 1
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def percentile(self, p: float) -> float:
+        """Upper bound in seconds of the bucket holding the p-th percentile."""
+        with self._lock:
+            if not self.count:
+                return 0.0
+            rank = p / 100.0 * self.count
+            seen = 0
+            for index, count in enumerate(self.counts):
+                seen += count
+                if count and seen >= rank:
+                    return min(self.bounds[index], self.max) if index < len(self.bounds) else self.max
+            return self.max
+
+    def snapshot(self) -> dict:
+        """Count, mean, percentiles and max in milliseconds."""
+        stats = {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count * 1000, 3) if self.count else 0.0,
+        }
+        for p in PERCENTILES:
+            stats[f"p{p}_ms"] = round(self.percentile(p) * 1000, 3)
+        stats["max_ms"] = round(self.max * 1000, 3)
+        return stats
+
+
+class MetricsRegistry:
+    """
+    Process-wide collection of latency histograms, counters and gauges.
+
+    Like InputDispatcher it is a singleton, so every controller records into
+    the same registry and one exporter publishes all of it.
+    """
+    _instance = None
+    _lock = Lock()
+
+    def __new__(cls, *args, **kwargs):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = super().__new__(cls)
+            return cls._instance
+
+    def __init__(self):
+        if not hasattr(self, '_initialized'):
+            self.histograms: Dict[str, LatencyHistogram] = {}
+            self.counters: Dict[str, int] = {}
+            self.gauges: Dict[str, Callable[[], float]] = {}
+            self.started = time.time()
+            self._registry_lock = Lock()
+            self._initialized = True
+
+    def histogram(self, name: str) -> LatencyHistogram:
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            with self._registry_lock:
+                histogram = self.histograms.setdefault(name, LatencyHistogram())
+        return histogram
+
+    def observe(self, name: str, seconds: float) -> None:
+        """Record one latency sample in seconds."""
+        self.histogram(name).observe(seconds)
+
+    @contextmanager
+    def timer(self, name: str):
+        """Record the time spent inside the block."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started)
+
+    def increment(self, name: str, amount: int = 1) -> None:
+        with self._registry_lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def gauge(self, name: str, read: Callable[[], float]) -> None:
+        """Register a callable that is read whenever a snapshot is taken."""
+        with self._registry_lock:
+            self.gauges[name] = read
+
+    def reset(self) -> None:
+        with self._registry_lock:
+            for histogram in self.histograms.values():
+                histogram.reset()
+            self.counters.clear()
+            self.started = time.time()
+
+    def snapshot(self) -> dict:
+        with self._registry_lock:
+            histograms = dict(self.histograms)
+            counters = dict(self.counters)
+            gauges = dict(self.gauges)
+        values = {}
+        for name, read in gauges.items():
+            try:
+                values[name] = read()
+            except Exception as e:
+                logger.debug(f"Could not read gauge {name}: {e}")
+        return {
+            "uptime_s": round(time.time() - self.started, 1),
+            "latency": {name: histogram.snapshot() for name, histogram in sorted(histograms.items())},
+            "counters": dict(sorted(counters.items())),
+            "gauges": dict(sorted(values.items())),
+        }
+
+    def summary(self) -> str:
+        """One line per histogram, for the log."""
+        lines = []
+        for name, stats in self.snapshot()["latency"].items():
+            if stats["count"]:
+                lines.append(f"{name}: n={stats['count']} mean={stats['mean_ms']:.1f}ms "
+                             f"p50={stats['p50_ms']:.1f}ms p99={stats['p99_ms']:.1f}ms "
+                             f"max={stats['max_ms']:.1f}ms")
+        return "\n".join(lines)
+
+
+class RateLimitedLogger:
+    """
+    Logs each kind of message at most once per `interval` seconds.
+
+    Repeats in between are counted and reported with the next message of the
+    same key, so per-frame conditions cost one log line per interval.
+    """
+
+    def __init__(self, target: logging.Logger, interval: float = LOG_INTERVAL_DEFAULT):
+        self.target = target
+        self.interval = interval
+        self._last: Dict[str, float] = {}
+        self._suppressed: Dict[str, int] = {}
+        self._lock = Lock()
+
+    def log(self, level: int, key: str, message: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            last = self._last.get(key)
+            if last is not None and now - last < self.interval:
+                self._suppressed[key] = self._suppressed.get(key, 0) + 1
+                return
+            self._last[key] = now
+            suppressed = self._suppressed.pop(key, 0)
+        if suppressed:
+            message = f"{message} ({suppressed} similar messages suppressed)"
+        self.target.log(level, message)
+
+    def info(self, key: str, message: str) -> None:
+        self.log(logging.INFO, key, message)
+
+    def warning(self, key: str, message: str) -> None:
+        self.log(logging.WARNING, key, message)
+
+    def error(self, key: str, message: str) -> None:
+        self.log(logging.ERROR, key, message)
+
+
+class MetricsExporter:
+    """
+    Publishes the metrics registry as JSON.
+
+    With `port` set, `http://127.0.0.1:<port>/metrics` serves a live snapshot.
+    With `path` set, a snapshot is written there every `interval` seconds and
+    once more on stop. Both are off by default.
+    """
+
+    def __init__(self, registry: Optional[MetricsRegistry] = None,
+                 port: int = METRICS_PORT_DEFAULT, path: str = METRICS_FILE_DEFAULT,
+                 interval: float = METRICS_INTERVAL_DEFAULT):
+        self.registry = registry or MetricsRegistry()
+        self.port = port
+        self.path = path
+        self.interval = interval
+        self.stop_event = Event()
+        self.server = None
+        self.server_thread = None
+        self.writer_thread = None
+
+    def write_summary(self) -> None:
+        """Write a snapshot to the summary file, replacing it atomically."""
+        temp_path = f"{self.path}.tmp"
+        try:
+            with open(temp_path, 'w') as f:
+                json.dump(self.registry.snapshot(), f, indent=4)
+            os.replace(temp_path, self.path)
+        except Exception as e:
+            logger.error(f"Error writing metrics summary: {e}")
+
+    def write_summaries(self):
+        """Writer loop: refresh the summary file every interval."""
+        while not self.stop_event.wait(self.interval):
+            self.write_summary()
+
+    def _make_handler(self):
+        registry = self.registry
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip('/') not in ('', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = json.dumps(registry.snapshot(), indent=4).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+        return MetricsHandler
+
+    def start(self):
+        """Start the endpoint and/or summary writer if configured."""
+        self.stop_event.clear()
+        if self.port and self.server is None:
+            try:
+                self.server = ThreadingHTTPServer(("127.0.0.1", self.port), self._make_handler())
+                self.server.daemon_threads = True
+                self.server_thread = Thread(target=self.server.serve_forever,
+                                            name="MetricsServerThread")
+                self.server_thread.daemon = True
+                self.server_thread.start()
+                logger.info(f"Metrics available at http://127.0.0.1:{self.port}/metrics")
+            except OSError as e:
+                logger.error(f"Could not start metrics endpoint on port {self.port}: {e}")
+                self.server = None
+        if self.path and (self.writer_thread is None or not self.writer_thread.is_alive()):
+            self.writer_thread = Thread(target=self.write_summaries,
+                                        name="MetricsWriterThread")
+            self.writer_thread.daemon = True
+            self.writer_thread.start()
+
+    def stop(self):
+        """Stop exporting and write a final summary."""
+        self.stop_event.set()
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+        if self.writer_thread and self.writer_thread.is_alive():
+            self.writer_thread.join(timeout=2)
+        if self.path:
+            self.write_summary()
@@ -0,0 +1,125 @@
+from threading import Thread, Event
+from typing import Callable, Optional
+import logging
+import time
+import cv2
+import numpy as np
+from framecapture import FrameRingBuffer
+from landmarks import draw_landmarks, NUM_LANDMARKS
+
+logger = logging.getLogger(__name__)
+
+PREVIEW_WINDOW = 'Head, Eye, and Voice Control'
+PREVIEW_FPS_DEFAULT = 5
+
+
+def render_overlay(frame: np.ndarray, points: Optional[np.ndarray], status: dict) -> None:
+    """Draw landmarks and the status text onto a frame."""
+    if points is not None:
+        if status.get("dragging"):
+            cv2.putText(frame, "Dragging...",
+                        (10, 120), cv2.FONT_HERSHEY_SIMPLEX,
+                        1, (0, 255, 0), 2)
+        draw_landmarks(frame, points)
+    else:
+        cv2.putText(frame, "No face detected", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
+
+    hold = status.get("hold")
+    if hold is not None:
+        cv2.putText(frame, f"Hold for right-click: {hold:.1f}s",
+                    (10, 90), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+    dwell = status.get("dwell")
+    if dwell is not None and dwell > 0:
+        cv2.putText(frame, f"Dwell click: {dwell:.0%}",
+                    (10, 150), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+    # Add visual feedback
+    cv2.putText(frame, f"Scroll: {status.get('scroll') or 'None'}",
+                (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+    cv2.putText(frame, "Press 'ESC' to exit.",
+                (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+
+
+class PreviewRenderer:
+    """
+    Low-rate camera preview for headless face tracking.
+
+    The tracking loop hands over a snapshot of the frame, landmarks and status
+    at most `fps` times per second; all drawing, imshow and waitKey calls
+    happen on the preview thread so they never delay tracking.
+    """
+
+    def __init__(self, fps: float = PREVIEW_FPS_DEFAULT,
+                 on_exit: Optional[Callable[[], None]] = None):
+        self.interval = 1.0 / fps if fps > 0 else 0.0
+        self.on_exit = on_exit
+        self.stop_event = Event()
+        self.preview_thread = None
+        self.snapshots = FrameRingBuffer()
+        self._points = np.zeros((self.snapshots.slots, NUM_LANDMARKS, 3), dtype=np.float32)
+        self._status = [None] * self.snapshots.slots
+        self._last_submit = 0.0
+
+    def due(self, now: Optional[float] = None) -> bool:
+        """True if enough time has passed since the last snapshot."""
+        now = time.perf_counter() if now is None else now
+        return now - self._last_submit >= self.interval
+
+    def submit(self, frame: np.ndarray, points: Optional[np.ndarray], status: dict) -> None:
+        """Copy the current frame, landmarks and status into a free snapshot slot."""
+        self._last_submit = time.perf_counter()
+        self.snapshots.allocate(frame.shape, frame.dtype)
+        index, slot = self.snapshots.claim()
+        np.copyto(slot, frame)
+        if points is not None:
+            count = min(len(points), NUM_LANDMARKS)
+            self._points[index, :count] = points[:count]
+            status = dict(status, count=count)
+        self._status[index] = status
+        self.snapshots.publish(index, time.time())
+
+    def render_snapshots(self):
+        """Preview loop: render the newest snapshot whenever one arrives."""
+        try:
+            while not self.stop_event.is_set():
+                packet = self.snapshots.acquire_latest(timeout=0.5)
+                if packet is None:
+                    if self.snapshots.closed:
+                        break
+                    cv2.waitKey(1)  # Keep the window responsive while idle
+                    continue
+                frame, _ = packet
+                try:
+                    index = self.snapshots.reading_index
+                    status = self._status[index]
+                    count = status.get("count")
+                    points = self._points[index, :count] if count else None
+                    render_overlay(frame, points, status)
+                    cv2.imshow(PREVIEW_WINDOW, frame)
+                finally:
+                    self.snapshots.release()
+                if cv2.waitKey(1) == 27 and self.on_exit:
+                    self.on_exit()
+        except Exception as e:
+            logger.error(f"Error in preview loop: {e}")
+        finally:
+            try:
+                cv2.destroyWindow(PREVIEW_WINDOW)
+            except cv2.error:
+                pass
+
+    def start(self):
+        """Start the preview in a separate thread."""
+        if self.preview_thread is None or not self.preview_thread.is_alive():
+            self.stop_event.clear()
+            self.snapshots.reset()
+            self.preview_thread = Thread(target=self.render_snapshots,
+                                         name="PreviewThread")
+            self.preview_thread.daemon = True
+            self.preview_thread.start()
+
+    def stop(self):
+        """Stop the preview thread and close its window."""
+        self.stop_event.set()
+        self.snapshots.close()
+        if self.preview_thread and self.preview_thread.is_alive():
+            self.preview_thread.join(timeout=2)
@@ -0,0 +1,171 @@
+from threading import Lock
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Optional, Tuple
+import numpy as np
+
+CACHE_SIZE_DEFAULT = 64
+SIMILARITY_THRESHOLD_DEFAULT = 0.9
+SIMILARITY_MARGIN = 0.03  # Best match must beat the best match for any other text by this much
+MAX_SECONDS_DEFAULT = 1.5  # Only short utterances are cached
+DURATION_TOLERANCE = 0.35
+FRAME_SECONDS = 0.025
+HOP_SECONDS = 0.010
+MEL_FILTERS = 26
+MFCC_COEFFICIENTS = 13
+TEMPLATE_SEGMENTS = 8
+VOICED_RATIO = 0.1  # Frames quieter than this fraction of the loudest are trimmed from the ends
+
+
+@lru_cache(maxsize=4)
+def _mel_filterbank(sample_rate: int, n_fft: int) -> np.ndarray:
+    def to_mel(hz):
+        return 2595.0 * np.log10(1.0 + hz / 700.0)
+
+    def to_hz(mel):
+        return 700.0 * (10.0 ** (mel / 2595.0) - 1.0)
+
+    edges = to_hz(np.linspace(to_mel(0.0), to_mel(sample_rate / 2), MEL_FILTERS + 2))
+    bins = np.floor((n_fft + 1) * edges / sample_rate).astype(int)
+    filters = np.zeros((MEL_FILTERS, n_fft // 2 + 1))
+    for i in range(MEL_FILTERS):
+        left, center, right = bins[i], bins[i + 1], bins[i + 2]
+        if center > left:
+            filters[i, left:center] = (np.arange(left, center) - left) / (center - left)
+        if right > center:
+            filters[i, center:right] = (right - np.arange(center, right)) / (right - center)
+    return filters
+
+
+@lru_cache(maxsize=1)
+def _dct_matrix() -> np.ndarray:
+    n = np.arange(MEL_FILTERS)
+    return np.cos(np.pi / MEL_FILTERS * (n + 0.5)[None, :] * np.arange(MFCC_COEFFICIENTS)[:, None])
+
+
+def mfcc(samples: np.ndarray, sample_rate: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Mel-frequency cepstral coefficients of a mono signal.
+
+    Returns:
+        (frames x MFCC_COEFFICIENTS coefficients, RMS energy of each frame).
+    """
+    frame = int(sample_rate * FRAME_SECONDS)
+    hop = int(sample_rate * HOP_SECONDS)
+    if len(samples) < frame:
+        return np.zeros((0, MFCC_COEFFICIENTS)), np.zeros(0)
+    emphasized = np.append(samples[0], samples[1:] - 0.97 * samples[:-1])
+    count = 1 + (len(emphasized) - frame) // hop
+    index = np.arange(frame)[None, :] + hop * np.arange(count)[:, None]
+    frames = emphasized[index] * np.hamming(frame)
+    n_fft = 1 << (frame - 1).bit_length()
+    power = np.abs(np.fft.rfft(frames, n_fft)) ** 2 / n_fft
+    energies = np.log(power @ _mel_filterbank(sample_rate, n_fft).T + 1e-10)
+    rms = np.sqrt(np.mean(samples[index] ** 2, axis=1))
+    return energies @ _dct_matrix().T, rms
+
+
+class RecognitionCache:
+    """
+    Remembers what recently confirmed short commands sounded like.
+
+    Each utterance is reduced to a fingerprint: its MFCCs, trimmed of
+    silence, averaged over TEMPLATE_SEGMENTS equal slices of the utterance
+    plus their spread, normalised so a louder or quieter repeat still
+    matches. An utterance whose fingerprint is close enough to a cached one
+    is given that entry's text without running the recognizer. Anything
+    less certain, including a near tie between two different commands, is
+    a miss and goes to the full recognizer. The least recently matched
+    entries are evicted first.
+    """
+
+    def __init__(self, capacity: int = CACHE_SIZE_DEFAULT,
+                 threshold: float = SIMILARITY_THRESHOLD_DEFAULT,
+                 max_seconds: float = MAX_SECONDS_DEFAULT):
+        self.capacity = capacity
+        self.threshold = threshold
+        self.max_seconds = max_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[int, Tuple[np.ndarray, float, str]]" = OrderedDict()
+        self._next_id = 0
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def fingerprint(self, pcm: bytes, sample_rate: int) -> Optional[Tuple[np.ndarray, float]]:
+        """
+        Fingerprint 16-bit mono PCM.
+
+        Returns:
+            (unit vector, voiced duration in seconds), or None if the audio is
+            silent or too long to be a cacheable command.
+        """
+        samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float64)
+        coefficients, rms = mfcc(samples, sample_rate)
+        if not len(rms) or rms.max() <= 0:
+            return None
+        voiced = np.flatnonzero(rms >= rms.max() * VOICED_RATIO)
+        coefficients = coefficients[voiced[0]:voiced[-1] + 1, 1:]  # c0 is loudness
+        duration = len(coefficients) * HOP_SECONDS
+        if len(coefficients) < TEMPLATE_SEGMENTS or duration > self.max_seconds:
+            return None
+        coefficients = coefficients - coefficients.mean(axis=0)
+        segments = [segment.mean(axis=0)
+                    for segment in np.array_split(coefficients, TEMPLATE_SEGMENTS)]
+        vector = np.concatenate(segments + [coefficients.std(axis=0)])
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            return None
+        return vector / norm, duration
+
+    def lookup(self, fingerprint: Optional[Tuple[np.ndarray, float]]) -> Optional[str]:
+        """Text of a confidently matching cached utterance, or None on a miss."""
+        with self._lock:
+            text = self._match(fingerprint)
+            if text is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return text
+
+    def _match(self, fingerprint) -> Optional[str]:
+        if fingerprint is None or not self._entries:
+            return None
+        vector, duration = fingerprint
+        best = {}  # Text -> (similarity, entry id)
+        for entry_id, (cached, cached_duration, text) in self._entries.items():
+            if abs(duration - cached_duration) > DURATION_TOLERANCE * max(duration, cached_duration):
+                continue
+            similarity = float(vector @ cached)
+            if similarity > best.get(text, (-1.0, None))[0]:
+                best[text] = (similarity, entry_id)
+        if not best:
+            return None
+        ranked = sorted(best.items(), key=lambda item: item[1][0], reverse=True)
+        text, (similarity, entry_id) = ranked[0]
+        runner_up = ranked[1][1][0] if len(ranked) > 1 else -1.0
+        if similarity < self.threshold or similarity - runner_up < SIMILARITY_MARGIN:
+            return None
+        self._entries.move_to_end(entry_id)
+        return text
+
+    def store(self, fingerprint: Optional[Tuple[np.ndarray, float]], text: str) -> None:
+        """Remember that this utterance was confirmed to be `text`."""
+        if fingerprint is None:
+            return
+        with self._lock:
+            self._entries[self._next_id] = (fingerprint[0], fingerprint[1], text)
+            self._next_id += 1
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
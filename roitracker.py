@@ -0,0 +1,92 @@
+import logging
+from typing import Optional, Tuple
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ROI_PADDING_DEFAULT = 0.3
+ROI_INPUT_SIZE_DEFAULT = 256
+ROI_RECENTER_MARGIN = 0.15
+
+
+class FaceRoiTracker:
+    """
+    Tracks a padded, square face region so FaceMesh only sees a small crop.
+
+    The region is derived from the previous frame's landmarks and only moves
+    when the face drifts towards its border, which keeps the crop stable for
+    MediaPipe's own tracker. Crops larger than `input_size` are downscaled
+    before colour conversion so the per-frame cost no longer depends on the
+    camera resolution.
+    """
+
+    def __init__(self, padding: float = ROI_PADDING_DEFAULT,
+                 input_size: int = ROI_INPUT_SIZE_DEFAULT):
+        self.padding = padding
+        self.input_size = input_size
+        self.box: Optional[Tuple[int, int, int, int]] = None  # x0, y0, x1, y1 in pixels
+        self._resized = np.empty((input_size, input_size, 3), dtype=np.uint8)
+        self._rgb = np.empty((input_size, input_size, 3), dtype=np.uint8)
+
+    def reset(self) -> None:
+        """Forget the tracked region so the next frame uses full-frame detection."""
+        self.box = None
+
+    def prepare(self, frame: np.ndarray) -> np.ndarray:
+        """Crop the tracked region out of a BGR frame and return it as RGB."""
+        x0, y0, x1, y1 = self.box
+        crop = frame[y0:y1, x0:x1]
+        if crop.shape[0] == self.input_size and crop.shape[1] == self.input_size:
+            return cv2.cvtColor(crop, cv2.COLOR_BGR2RGB, dst=self._rgb)
+        if crop.shape[0] > self.input_size and crop.shape[1] > self.input_size \
+                and crop.shape[0] == crop.shape[1]:
+            cv2.resize(crop, (self.input_size, self.input_size), dst=self._resized,
+                       interpolation=cv2.INTER_AREA)
+            return cv2.cvtColor(self._resized, cv2.COLOR_BGR2RGB, dst=self._rgb)
+        # Small or edge-clipped crops keep their own size
+        return cv2.cvtColor(crop, cv2.COLOR_BGR2RGB)
+
+    def reproject(self, points: np.ndarray, frame_shape) -> None:
+        """Map (N, 3) landmarks detected in the crop back to full-frame normalized coordinates in place."""
+        frame_h, frame_w = frame_shape[:2]
+        x0, y0, x1, y1 = self.box
+        scale_x, scale_y = (x1 - x0) / frame_w, (y1 - y0) / frame_h
+        points[:, 0] *= scale_x
+        points[:, 0] += x0 / frame_w
+        points[:, 1] *= scale_y
+        points[:, 1] += y0 / frame_h
+        points[:, 2] *= scale_x
+
+    def update(self, points: np.ndarray, frame_shape) -> None:
+        """Recompute the tracked region from full-frame normalized (N, 3) landmarks."""
+        frame_h, frame_w = frame_shape[:2]
+        low = points[:, :2].min(axis=0)
+        high = points[:, :2].max(axis=0)
+        left, right = float(low[0]) * frame_w, float(high[0]) * frame_w
+        top, bottom = float(low[1]) * frame_h, float(high[1]) * frame_h
+
+        if self.box is not None and self._contains(left, top, right, bottom):
+            return
+
+        side = max(right - left, bottom - top) * (1 + 2 * self.padding)
+        side = int(min(side, frame_w, frame_h))
+        if side <= 0:
+            self.reset()
+            return
+        center_x, center_y = (left + right) / 2, (top + bottom) / 2
+        # Shift rather than clip at the frame border so the crop stays square
+        x0 = int(min(max(center_x - side / 2, 0), frame_w - side))
+        y0 = int(min(max(center_y - side / 2, 0), frame_h - side))
+        self.box = (x0, y0, x0 + side, y0 + side)
+
+    def _contains(self, left: float, top: float, right: float, bottom: float) -> bool:
+        """True if the face box sits inside the inner margin of the tracked region
+        and still fills roughly the same share of it."""
+        x0, y0, x1, y1 = self.box
+        side = x1 - x0
+        margin = side * ROI_RECENTER_MARGIN
+        if left < x0 + margin or right > x1 - margin or top < y0 + margin or bottom > y1 - margin:
+            return False
+        face_side = max(right - left, bottom - top) * (1 + 2 * self.padding)
+        return abs(face_side - side) <= side * ROI_RECENTER_MARGIN
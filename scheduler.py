@@ -0,0 +1,118 @@
+from threading import Thread, Event, get_native_id
+from typing import List, Optional, Tuple
+import logging
+import os
+import sys
+import time
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_HIGH = 0  # Cursor tracking and input injection
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2  # Voice recognition, on-screen keyboard
+# Offsets from the process's own niceness on Linux. Raising priority needs
+# CAP_SYS_NICE or an RLIMIT_NICE allowance; without it HIGH stays at the base
+NICE_OFFSETS = {PRIORITY_HIGH: -5, PRIORITY_NORMAL: 5, PRIORITY_LOW: 10}
+# THREAD_PRIORITY_ABOVE_NORMAL, THREAD_PRIORITY_NORMAL, THREAD_PRIORITY_BELOW_NORMAL
+WINDOWS_PRIORITIES = {PRIORITY_HIGH: 1, PRIORITY_NORMAL: 0, PRIORITY_LOW: -1}
+SHUTDOWN_TIMEOUT_DEFAULT = 5.0
+
+# Recorded once, so every thread's niceness is relative to where the process
+# started rather than to whichever thread happened to spawn it
+BASE_NICE = os.getpriority(os.PRIO_PROCESS, 0) if sys.platform.startswith("linux") else 0
+_boost_warned = False
+
+
+def set_thread_priority(priority: int) -> None:
+    """
+    Set the OS scheduling priority of the calling thread.
+
+    On Linux the niceness is BASE_NICE plus the priority's offset, so setting
+    it again, or from a thread that was already lowered, does not stack. A
+    HIGH thread is raised above the base when the process is allowed to;
+    otherwise it stays at the base and the failure is logged once. Threads
+    started from this thread inherit the priority. Other platforms are left
+    alone.
+    """
+    global _boost_warned
+    try:
+        if sys.platform.startswith("linux"):
+            nice = BASE_NICE + NICE_OFFSETS[priority]
+            try:
+                os.setpriority(os.PRIO_PROCESS, get_native_id(), nice)
+            except PermissionError as e:
+                if nice >= BASE_NICE:
+                    raise
+                if not _boost_warned:
+                    _boost_warned = True
+                    logger.info(f"Could not raise thread priority ({e}); high-priority threads "
+                                f"run at the process's own priority")
+                os.setpriority(os.PRIO_PROCESS, get_native_id(), BASE_NICE)
+        elif os.name == "nt":
+            import ctypes
+            kernel32 = ctypes.windll.kernel32
+            kernel32.SetThreadPriority(kernel32.GetCurrentThread(), WINDOWS_PRIORITIES[priority])
+    except Exception as e:
+        logger.debug(f"Could not set thread priority: {e}")
+
+
+class ControllerScheduler:
+    """
+    Owns the lifecycles of the application's controllers.
+
+    Controllers share the scheduler's `stop_event`: when any of them stops
+    (Esc, "stop listening", the camera going away) or shutdown is requested,
+    every controller loop waiting on the event and the main thread wake at
+    once, instead of noticing on their next poll. Controllers are started in
+    priority order and stopped together, so shutdown takes as long as the
+    slowest controller rather than the sum of all of them.
+
+    Each controller's `priority` sets the OS priority of its threads, so
+    cursor tracking keeps getting the CPU while speech is being recognized.
+    """
+
+    def __init__(self):
+        self.stop_event = Event()
+        self.controllers: List[Tuple[int, object]] = []
+
+    def add(self, controller, priority: Optional[int] = None) -> None:
+        """Register a controller; `priority` overrides the controller's own."""
+        if priority is not None:
+            controller.priority = priority
+        self.controllers.append((getattr(controller, "priority", PRIORITY_NORMAL), controller))
+        self.controllers.sort(key=lambda entry: entry[0])
+
+    def start(self) -> None:
+        """Start all controllers, most important first."""
+        self.stop_event.clear()
+        for _, controller in self.controllers:
+            controller.start()
+
+    def request_stop(self) -> None:
+        """Ask everything to stop; safe to call from any thread or signal handler."""
+        self.stop_event.set()
+
+    def wait(self) -> None:
+        """Block until a controller stops or a stop is requested."""
+        # A blocking wait cannot be interrupted by Ctrl+C on Windows, so wake
+        # up now and then there; elsewhere sleep until the event is set
+        timeout = 1.0 if os.name == "nt" else None
+        while not self.stop_event.wait(timeout):
+            pass
+
+    def shutdown(self, timeout: float = SHUTDOWN_TIMEOUT_DEFAULT) -> None:
+        """Stop all controllers concurrently and wait up to `timeout` seconds for them."""
+        self.stop_event.set()
+        started = time.perf_counter()
+        stoppers = []
+        for _, controller in self.controllers:
+            stopper = Thread(target=controller.stop, name=f"Stop{type(controller).__name__}")
+            stopper.daemon = True
+            stopper.start()
+            stoppers.append((controller, stopper))
+        deadline = started + timeout
+        for controller, stopper in stoppers:
+            stopper.join(timeout=max(0.0, deadline - time.perf_counter()))
+            if stopper.is_alive():
+                logger.warning(f"{type(controller).__name__} did not stop within {timeout:.0f} s")
+        logger.info(f"Controllers stopped in {(time.perf_counter() - started) * 1000:.0f} ms")
@@ -0,0 +1,154 @@
+import json
+import logging
+import os
+from typing import List, Optional
+from voicecommands import UNKNOWN_WORD
+
+logger = logging.getLogger(__name__)
+
+VOSK_MODEL_PATH_DEFAULT = "model"
+
+
+class SpeechEngine:
+    """
+    Speech-to-text backend used by VoiceController.
+
+    Batch engines only implement `recognize`, which decodes a complete
+    utterance. Streaming engines (`streaming = True`) are also fed raw 16-bit
+    mono PCM as it is captured: `accept` returns True once the engine has
+    detected the end of an utterance, `partial` returns the hypothesis so far
+    and `result`/`final` return the finished text.
+
+    Engines that support it restrict decoding to the phrases given to
+    `set_grammar`, which is much faster than open-vocabulary decoding and
+    keeps unrelated speech from turning into commands.
+    """
+
+    name = "base"
+    streaming = False
+    concurrent = False  # True if recognize() may run on several threads at once
+
+    def set_grammar(self, grammar: Optional[List[str]]) -> None:
+        """Restrict decoding to these phrases, or lift the restriction with None."""
+
+    def recognize(self, audio) -> str:
+        raise NotImplementedError
+
+    def start(self, sample_rate: int) -> None:
+        raise NotImplementedError(f"{self.name} does not support streaming")
+
+    def accept(self, chunk: bytes) -> bool:
+        raise NotImplementedError(f"{self.name} does not support streaming")
+
+    def partial(self) -> str:
+        return ""
+
+    def result(self) -> str:
+        return ""
+
+    def final(self) -> str:
+        """Flush the decoder at the end of the stream and return the remaining text."""
+        return self.result()
+
+
+class GoogleEngine(SpeechEngine):
+    """Google Web Speech API through speech_recognition. Needs network access."""
+
+    name = "google"
+    concurrent = True
+
+    def __init__(self, recognizer):
+        self.recognizer = recognizer
+
+    def recognize(self, audio) -> str:
+        return self.recognizer.recognize_google(audio)
+
+
+class VoskEngine(SpeechEngine):
+    """
+    Offline streaming recognizer using a local Vosk (Kaldi) model.
+
+    Download a model from https://alphacephei.com/vosk/models and point
+    `model_path` at the unpacked directory. Small English models decode
+    faster than real time on one CPU core.
+    """
+
+    name = "vosk"
+    streaming = True
+
+    def __init__(self, model_path: str = VOSK_MODEL_PATH_DEFAULT):
+        import vosk
+        if not os.path.isdir(model_path):
+            raise FileNotFoundError(f"Vosk model directory '{model_path}' not found")
+        vosk.SetLogLevel(-1)
+        self._vosk = vosk
+        self.model = vosk.Model(model_path)
+        self.decoder = None
+        self.grammar: Optional[str] = None
+        self.sample_rate = None
+        self._grammar_changed = False
+        self._restart = False
+
+    def set_grammar(self, grammar):
+        # May be called from another thread (command reloads, dictation), so
+        # the decoder is only replaced from accept() on the decoding thread
+        self.grammar = json.dumps(grammar) if grammar else None
+        self._grammar_changed = True
+
+    def start(self, sample_rate: int) -> None:
+        self.sample_rate = sample_rate
+        self._grammar_changed = self._restart = False
+        if self.grammar:
+            self.decoder = self._vosk.KaldiRecognizer(self.model, sample_rate, self.grammar)
+        else:
+            self.decoder = self._vosk.KaldiRecognizer(self.model, sample_rate)
+
+    def accept(self, chunk: bytes) -> bool:
+        if self._restart:
+            self.start(self.sample_rate)
+        ended = bool(self.decoder.AcceptWaveform(chunk))
+        if self._grammar_changed:
+            # A grammar cannot be lifted from a live decoder: end the
+            # utterance here and go on with a fresh decoder. Models without
+            # a dynamic graph ignore grammars and keep decoding open vocabulary
+            self._grammar_changed = False
+            self._restart = True
+            return True
+        return ended
+
+    @staticmethod
+    def _text(result: str, key: str) -> str:
+        text = json.loads(result).get(key, "")
+        return " ".join(word for word in text.split() if word != UNKNOWN_WORD)
+
+    def partial(self) -> str:
+        return self._text(self.decoder.PartialResult(), "partial")
+
+    def result(self) -> str:
+        return self._text(self.decoder.Result(), "text")
+
+    def final(self) -> str:
+        return self._text(self.decoder.FinalResult(), "text")
+
+    def recognize(self, audio) -> str:
+        self.start(audio.sample_rate)
+        self.accept(audio.get_raw_data(convert_width=2))
+        return self.final()
+
+
+ENGINES = ("auto", "vosk", "google")
+
+
+def create_engine(name: str = "auto", recognizer=None,
+                  model_path: str = VOSK_MODEL_PATH_DEFAULT) -> SpeechEngine:
+    """Create a speech engine by name; "auto" prefers the offline engine when a model is installed."""
+    if name not in ENGINES:
+        raise ValueError(f"Unknown speech engine '{name}'. Choose from: {', '.join(ENGINES)}")
+    if name in ("auto", "vosk"):
+        try:
+            return VoskEngine(model_path)
+        except Exception as e:
+            if name == "vosk":
+                raise
+            logger.warning(f"Offline speech engine unavailable ({e}), using Google speech recognition")
+    return GoogleEngine(recognizer)
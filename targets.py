@@ -0,0 +1,249 @@
+from threading import Thread, Event, Lock
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+import logging
+import math
+import sys
+
+logger = logging.getLogger(__name__)
+
+DWELL_TIME_DEFAULT = 0.8
+DWELL_RADIUS_DEFAULT = 30.0  # Pixels the cursor may wander while dwelling
+SNAP_RADIUS_DEFAULT = 60.0  # Targets further than this from the cursor do not attract it
+SNAP_STRENGTH_DEFAULT = 0.6  # Fraction of the way to a target's centre the cursor is pulled
+SNAP_HYSTERESIS = 8.0  # A new target must be this many pixels nearer to take over
+CELL_SIZE = 128  # Spatial index grid cell, in pixels
+ACCESSIBILITY_INTERVAL_DEFAULT = 1.0
+ACCESSIBILITY_MAX_DEPTH = 12
+ACCESSIBILITY_CONTROL_TYPES = ("ButtonControl", "HyperlinkControl", "MenuItemControl",
+                               "CheckBoxControl", "RadioButtonControl", "TabItemControl",
+                               "ListItemControl", "TreeItemControl", "ComboBoxControl",
+                               "EditControl")
+
+
+class Target:
+    """A clickable screen rectangle in desktop pixels."""
+
+    def __init__(self, name: str, x0: float, y0: float, x1: float, y1: float):
+        self.name = name
+        self.x0, self.y0, self.x1, self.y1 = x0, y0, x1, y1
+
+    @property
+    def center(self) -> Tuple[float, float]:
+        return (self.x0 + self.x1) / 2, (self.y0 + self.y1) / 2
+
+    def distance(self, x: float, y: float) -> float:
+        """Distance from a point to the rectangle; 0 inside it."""
+        dx = max(self.x0 - x, 0.0, x - self.x1)
+        dy = max(self.y0 - y, 0.0, y - self.y1)
+        return math.hypot(dx, dy)
+
+    def __repr__(self) -> str:
+        return f"Target({self.name!r}, {self.x0}, {self.y0}, {self.x1}, {self.y1})"
+
+
+class TargetIndex:
+    """
+    Uniform-grid spatial index over the clickable targets of several sources.
+
+    Sources (the on-screen keyboard, the accessibility tree) replace their
+    own targets whenever their layout changes, from any thread; the grid is
+    rebuilt then and swapped in whole. A query only looks at the grid cells
+    within the search radius, so its cost does not grow with the number of
+    targets on screen.
+    """
+
+    def __init__(self, cell_size: int = CELL_SIZE):
+        self.cell_size = cell_size
+        self._sources: Dict[str, List[Target]] = {}
+        self._grid: Dict[Tuple[int, int], List[Target]] = {}
+        self._members: Set[Target] = set()
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return sum(len(targets) for targets in self._sources.values())
+
+    def __contains__(self, target: Target) -> bool:
+        """Whether `target` is still on screen, i.e. was not replaced since it was found."""
+        return target in self._members
+
+    def replace(self, source: str, targets: Sequence[Target]) -> None:
+        """Replace all targets from `source`."""
+        with self._lock:
+            self._sources[source] = list(targets)
+            grid = {}
+            members = set()
+            size = self.cell_size
+            for source_targets in self._sources.values():
+                members.update(source_targets)
+                for target in source_targets:
+                    for cx in range(int(target.x0 // size), int(target.x1 // size) + 1):
+                        for cy in range(int(target.y0 // size), int(target.y1 // size) + 1):
+                            grid.setdefault((cx, cy), []).append(target)
+            self._grid = grid
+            self._members = members
+
+    def nearest(self, x: float, y: float, radius: float) -> Tuple[Optional[Target], float]:
+        """The target nearest to (x, y) within `radius`, and its distance."""
+        grid = self._grid
+        size = self.cell_size
+        best, best_distance = None, radius
+        for cx in range(int((x - radius) // size), int((x + radius) // size) + 1):
+            for cy in range(int((y - radius) // size), int((y + radius) // size) + 1):
+                for target in grid.get((cx, cy), ()):
+                    distance = target.distance(x, y)
+                    if distance <= best_distance:
+                        best, best_distance = target, distance
+        return best, best_distance
+
+
+class TargetSnapper:
+    """
+    Pulls the cursor towards the nearest clickable target.
+
+    Within `radius` of a target the cursor is moved `strength` of the way to
+    the target's centre, less the further away it is, so the cursor settles
+    on buttons instead of jittering across their edges. The raw head
+    position is never changed, so moving on escapes the pull. The current
+    target is kept until another one is SNAP_HYSTERESIS pixels nearer, so
+    the cursor does not flicker between neighbouring keys, and dropped once
+    it leaves the index, e.g. when the keyboard is closed.
+    """
+
+    def __init__(self, index: TargetIndex, radius: float = SNAP_RADIUS_DEFAULT,
+                 strength: float = SNAP_STRENGTH_DEFAULT):
+        self.index = index
+        self.radius = radius
+        self.strength = strength
+        self.current: Optional[Target] = None
+
+    def snap(self, x: float, y: float) -> Tuple[float, float, Optional[Target]]:
+        """Snapped cursor position and the target it is attracted to, if any."""
+        target, distance = self.index.nearest(x, y, self.radius)
+        current = self.current
+        if current is not None and current not in self.index:
+            current = None
+        if current is not None and target is not current:
+            current_distance = current.distance(x, y)
+            if current_distance <= self.radius and (
+                    target is None or distance + SNAP_HYSTERESIS > current_distance):
+                target, distance = current, current_distance
+        self.current = target
+        if target is None:
+            return x, y, None
+        pull = self.strength * (1.0 - distance / self.radius)
+        center_x, center_y = target.center
+        return x + (center_x - x) * pull, y + (center_y - y) * pull, target
+
+
+class DwellClicker:
+    """
+    Fires a click when the cursor rests in one place for `dwell_time` seconds.
+
+    The cursor counts as resting while it stays within `radius` pixels of
+    where it stopped, or on the same snap target. Each rest clicks once;
+    the cursor has to move away before it can click again. Timing comes from
+    the frame timestamps passed to `update`.
+    """
+
+    def __init__(self, dwell_time: float = DWELL_TIME_DEFAULT,
+                 radius: float = DWELL_RADIUS_DEFAULT):
+        self.dwell_time = dwell_time
+        self.radius = radius
+        self.reset()
+
+    def reset(self) -> None:
+        self.anchor: Optional[Tuple[float, float]] = None
+        self.target: Optional[Target] = None
+        self.started = 0.0
+        self.fired = False
+
+    def update(self, x: float, y: float, timestamp: float,
+               target: Optional[Target] = None) -> bool:
+        """Advance by one frame; returns True when a click is due."""
+        if target is not None and target is self.target:
+            resting = True
+        else:
+            resting = (target is None and self.target is None and self.anchor is not None
+                       and math.hypot(x - self.anchor[0], y - self.anchor[1]) <= self.radius)
+        if not resting:
+            self.anchor, self.target = (x, y), target
+            self.started, self.fired = timestamp, False
+            return False
+        if not self.fired and timestamp - self.started >= self.dwell_time:
+            self.fired = True
+            return True
+        return False
+
+    def progress(self, timestamp: float) -> Optional[float]:
+        """Fraction of the dwell time elapsed, or None if no click is pending."""
+        if self.anchor is None or self.fired:
+            return None
+        return min(1.0, (timestamp - self.started) / self.dwell_time)
+
+
+class AccessibilityTargets:
+    """
+    Feeds the clickable controls of the foreground window into a TargetIndex.
+
+    Uses Windows UI Automation through the optional `uiautomation` package
+    (`pip install uiautomation`). The tree is walked on a background thread
+    every `interval` seconds and only when the foreground window changed or
+    was moved, so it never runs on the tracking thread.
+    """
+
+    SOURCE = "accessibility"
+
+    def __init__(self, index: TargetIndex, interval: float = ACCESSIBILITY_INTERVAL_DEFAULT):
+        if sys.platform != "win32":
+            raise RuntimeError("accessibility targets are only supported on Windows")
+        import uiautomation
+        self.automation = uiautomation
+        self.index = index
+        self.interval = interval
+        self.stop_event = Event()
+        self.poll_thread = None
+        self._window_key = None
+
+    def collect(self, control, depth: int = 0) -> List[Target]:
+        targets = []
+        for child in control.GetChildren():
+            if child.ControlTypeName in ACCESSIBILITY_CONTROL_TYPES and not child.IsOffscreen:
+                rect = child.BoundingRectangle
+                if rect.width() > 0 and rect.height() > 0:
+                    targets.append(Target(child.Name or child.ControlTypeName,
+                                          rect.left, rect.top, rect.right, rect.bottom))
+            if depth < ACCESSIBILITY_MAX_DEPTH:
+                targets.extend(self.collect(child, depth + 1))
+        return targets
+
+    def poll(self):
+        with self.automation.UIAutomationInitializerInThread():
+            while not self.stop_event.is_set():
+                try:
+                    window = self.automation.GetForegroundControl()
+                    rect = window.BoundingRectangle
+                    key = (window.NativeWindowHandle, rect.left, rect.top, rect.right, rect.bottom)
+                    if key != self._window_key:
+                        self._window_key = key
+                        self.index.replace(self.SOURCE, self.collect(window))
+                except Exception as e:
+                    logger.debug(f"Could not read accessibility targets: {e}")
+                self.stop_event.wait(self.interval)
+
+    def start(self):
+        if self.poll_thread is None or not self.poll_thread.is_alive():
+            self.stop_event.clear()
+            self.poll_thread = Thread(target=self.poll, name="AccessibilityTargetThread")
+            self.poll_thread.daemon = True
+            self.poll_thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.poll_thread and self.poll_thread.is_alive():
+            self.poll_thread.join(timeout=2)
+        self.index.replace(self.SOURCE, [])
+
+
+def keyboard_targets(buttons: Sequence[Tuple[str, int, int, int, int]]) -> List[Target]:
+    """Targets for on-screen keyboard buttons given as (key, x, y, width, height)."""
+    return [Target(key, x, y, x + width, y + height) for key, x, y, width, height in buttons]
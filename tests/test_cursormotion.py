@@ -0,0 +1,54 @@
+"""Tests of cursor extrapolation timed by frame timestamps."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cursormotion import CursorMotion
+
+
+class Output:
+    def __init__(self):
+        self.moves = []
+
+    def move_to(self, x, y):
+        self.moves.append((x, y))
+
+
+def test_velocity_follows_frame_timestamps_not_arrival():
+    motion = CursorMotion(Output(), deadband_px=0)
+    # Frames captured 1/30 s apart, 100 px apart, whenever they are handed over
+    motion.set_target(0.0, 0.0, 100.0)
+    motion.set_target(100.0, 0.0, 100.0 + 1 / 30)
+    assert motion._velocity[0] == pytest.approx(0.5 * 3000)
+    assert motion._update_interval == pytest.approx(1 / 30)
+
+
+def test_extrapolation_covers_time_since_capture():
+    output = Output()
+    motion = CursorMotion(output, deadband_px=0)
+    for frame in range(10):
+        motion.set_target(frame * 10.0, 0.0, 100.0 + frame / 30)
+    captured = 100.0 + 9 / 30
+    motion.step(captured + 0.05, 0.0)  # First tick snaps to the prediction
+    x, _ = output.moves[-1]
+    assert x == pytest.approx(90.0 + motion._velocity[0] * 0.05)
+    assert x > 90.0
+
+
+def test_targets_from_the_future_are_not_extrapolated_backwards():
+    output = Output()
+    motion = CursorMotion(output, deadband_px=0)
+    motion.set_target(0.0, 0.0, 100.0)
+    motion.set_target(30.0, 0.0, 100.0 + 1 / 30)
+    motion.step(99.0, 0.0)
+    assert output.moves[-1] == (30.0, 0.0)
+
+
+def test_without_refresh_rate_targets_are_sent_at_once():
+    output = Output()
+    motion = CursorMotion(output, refresh_hz=0)
+    motion.set_target(5.0, 6.0, 1.0)
+    assert output.moves == [(5.0, 6.0)]
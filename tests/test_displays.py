@@ -0,0 +1,91 @@
+"""Tests of the multi-monitor layout, on a fake display backend."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from displays import DisplayBackend, DisplayLayout, Monitor, parse_xrandr_monitors
+
+
+class FakeDisplayBackend(DisplayBackend):
+    name = "fake"
+
+    def __init__(self, monitors):
+        self.layout = list(monitors)
+
+    def monitors(self):
+        return list(self.layout)
+
+
+def side_by_side(**kwargs):
+    return [Monitor("A", 0, 0, 1920, 1080, primary=True, **kwargs),
+            Monitor("B", 1920, 0, 1920, 1080, **kwargs)]
+
+
+def test_equal_monitors_split_input_evenly():
+    layout = DisplayLayout(FakeDisplayBackend(side_by_side()))
+    assert layout.map(0.0, 0.0) == (0.0, 0.0)
+    assert layout.map(0.25, 0.5) == (960.0, 540.0)
+    assert layout.map(0.5, 0.5) == (1920.0, 540.0)
+    assert layout.map(1.0, 1.0) == (3840.0, 1080.0)
+
+
+def test_lower_gain_takes_more_input_to_cross():
+    layout = DisplayLayout(FakeDisplayBackend(side_by_side()), gains={"B": 0.5})
+    # B counts double: A gets the first third of the input range, B the rest
+    x, _ = layout.map(1 / 3, 0.5)
+    assert abs(x - 1920) < 1e-6
+    x, _ = layout.map(2 / 3, 0.5)
+    assert abs(x - 2880) < 1e-6
+
+
+def test_high_dpi_monitor_takes_input_by_logical_size():
+    monitors = [Monitor("A", 0, 0, 1920, 1080, primary=True),
+                Monitor("B", 1920, 0, 3840, 2160, scale=2.0)]
+    layout = DisplayLayout(FakeDisplayBackend(monitors))
+    x, _ = layout.map(0.5, 0.5)
+    assert abs(x - 1920) < 1e-6
+
+
+def test_points_in_gaps_land_on_a_monitor_inside_the_margin():
+    monitors = [Monitor("A", 0, 0, 1920, 1080, primary=True),
+                Monitor("B", 1920, 0, 1280, 720)]
+    layout = DisplayLayout(FakeDisplayBackend(monitors), margin=10)
+    x, y = layout.map(1.0, 1.0)
+    assert layout.monitor_at(x, y).name == "B"
+    assert x == 3200 - 10 and y == 720 - 10
+
+
+def test_refresh_reports_layout_changes():
+    backend = FakeDisplayBackend(side_by_side())
+    layout = DisplayLayout(backend)
+    seen = []
+    layout.layout_listeners.append(seen.append)
+    assert not layout.refresh()
+    backend.layout = backend.layout[:1]
+    assert layout.refresh()
+    assert seen == [backend.layout]
+    assert layout.bounds == (0, 0, 1920, 1080)
+
+
+def test_failed_enumeration_keeps_the_last_layout():
+    backend = FakeDisplayBackend(side_by_side())
+    layout = DisplayLayout(backend)
+    backend.layout = []
+    assert not layout.refresh()
+    assert len(layout.monitors) == 2
+
+
+def test_parse_xrandr_monitors():
+    output = ("Monitors: 3\n"
+              " 0: +*DP-1 2560/597x1440/336+0+0  DP-1\n"
+              " 1: +HDMI-1 1920/527x1080/296+2560+180  HDMI-1\n"
+              " 2: +eDP-1 1920/344x1200/215-1920+0  eDP-1\n")
+    monitors = parse_xrandr_monitors(output)
+    assert monitors == [Monitor("DP-1", 0, 0, 2560, 1440, primary=True),
+                        Monitor("HDMI-1", 2560, 180, 1920, 1080),
+                        Monitor("eDP-1", -1920, 0, 1920, 1200)]
+
+
+def test_parse_xrandr_monitors_ignores_other_lines():
+    assert parse_xrandr_monitors("Monitors: 0\n") == []
@@ -0,0 +1,42 @@
+"""Tests of the shared-memory landmark channel between the face worker and the controller."""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from faceworker import LandmarkChannel
+from landmarks import NUM_LANDMARKS
+
+SHAPE = (4, 6, 3)
+
+
+def make_channel():
+    return LandmarkChannel(bytearray(LandmarkChannel.size(SHAPE)), SHAPE)
+
+
+def test_read_returns_the_published_landmarks():
+    channel = make_channel()
+    published = np.random.default_rng(0).random((NUM_LANDMARKS, 3), dtype=np.float32)
+    channel.publish(1, published, 12.5, {"capture": 0.002, "face_mesh": 0.01})
+    points = np.zeros((NUM_LANDMARKS, 3), dtype=np.float32)
+    seq, slot, count, timestamp, timings = channel.read(points)
+    assert (seq, slot, count, timestamp) == (2, 1, NUM_LANDMARKS, 12.5)
+    assert timings == {"capture": 0.002, "convert": 0.0, "face_mesh": 0.01}
+    assert np.array_equal(points, published)
+
+
+def test_read_reports_no_face():
+    channel = make_channel()
+    channel.publish(0, None, 1.0, {})
+    assert channel.read(np.zeros((NUM_LANDMARKS, 3), dtype=np.float32))[2] == 0
+
+
+def test_read_gives_up_on_a_publish_that_never_finishes():
+    channel = make_channel()
+    channel.header[LandmarkChannel.SEQ] = 1  # A worker that died while publishing
+    started = time.perf_counter()
+    assert channel.read(np.zeros((NUM_LANDMARKS, 3), dtype=np.float32), timeout=0.05) is None
+    assert 0.05 <= time.perf_counter() - started < 1.0
@@ -0,0 +1,87 @@
+"""Trace-driven tests of the face gesture tables, on fixed timestamps."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gestures import FACE_FEATURES, GestureEngine, face_gestures
+
+FRAME = 1 / 30
+OPEN = (False, False, False)
+BOTH_CLOSED = (True, True, False)
+LEFT_CLOSED = (True, False, False)
+MOUTH_OPEN = (False, False, True)
+
+
+def make_engine():
+    return GestureEngine(FACE_FEATURES, face_gestures(blink_duration=0.1, click_interval=1.0,
+                                                      right_click_duration=2.0, drag_duration=0.3,
+                                                      mouth_open_duration=1.0))
+
+
+def replay(engine, segments):
+    """Feed (features, seconds) segments at 30 fps; returns (time, action) pairs."""
+    fired = []
+    frame = 0
+    for values, seconds in segments:
+        for _ in range(round(seconds / FRAME)):
+            timestamp = frame * FRAME
+            fired += [(timestamp, action) for action in engine.update(values, timestamp)]
+            frame += 1
+    return fired
+
+
+def actions(fired):
+    return [action for _, action in fired]
+
+
+def test_short_closure_is_left_click():
+    fired = replay(make_engine(), [(OPEN, 0.5), (BOTH_CLOSED, 0.3), (OPEN, 0.5)])
+    assert actions(fired) == ["left_click"]
+    assert abs(fired[0][0] - 0.8) < FRAME
+
+
+def test_natural_blink_is_ignored():
+    assert replay(make_engine(), [(OPEN, 0.5), (BOTH_CLOSED, 0.05), (OPEN, 0.5)]) == []
+
+
+def test_closure_between_click_and_right_click_does_nothing():
+    assert replay(make_engine(), [(OPEN, 0.5), (BOTH_CLOSED, 1.5), (OPEN, 0.5)]) == []
+
+
+def test_long_closure_is_right_click_on_opening():
+    fired = replay(make_engine(), [(OPEN, 0.5), (BOTH_CLOSED, 2.5), (OPEN, 0.5)])
+    assert actions(fired) == ["right_click"]
+    assert abs(fired[0][0] - 3.0) < FRAME
+
+
+def test_left_eye_hold_drags_until_both_open():
+    engine = make_engine()
+    fired = replay(engine, [(OPEN, 0.5), (LEFT_CLOSED, 1.0), (OPEN, 0.5)])
+    assert actions(fired) == ["drag_start", "drag_end"]
+    assert abs(fired[0][0] - 0.8) < FRAME
+    assert abs(fired[1][0] - 1.5) < FRAME
+    assert engine.state("drag") == "idle"
+
+
+def test_short_left_wink_does_not_drag():
+    assert replay(make_engine(), [(OPEN, 0.5), (LEFT_CLOSED, 0.2), (OPEN, 0.5)]) == []
+
+
+def test_mouth_held_open_toggles_keyboard_on_closing():
+    fired = replay(make_engine(), [(OPEN, 0.5), (MOUTH_OPEN, 1.2), (OPEN, 0.5)])
+    assert actions(fired) == ["toggle_keyboard"]
+    assert abs(fired[0][0] - 1.7) < FRAME
+
+
+def test_short_mouth_opening_is_ignored():
+    assert replay(make_engine(), [(OPEN, 0.5), (MOUTH_OPEN, 0.5), (OPEN, 0.5)]) == []
+
+
+def test_mixed_trace():
+    fired = replay(make_engine(), [
+        (OPEN, 1.0), (BOTH_CLOSED, 0.3), (OPEN, 1.0), (BOTH_CLOSED, 2.5), (OPEN, 1.0),
+        (LEFT_CLOSED, 0.6), (OPEN, 0.5), (MOUTH_OPEN, 1.5), (OPEN, 0.5),
+    ])
+    assert actions(fired) == ["left_click", "right_click", "drag_start", "drag_end",
+                              "toggle_keyboard"]
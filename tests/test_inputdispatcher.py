@@ -0,0 +1,99 @@
+"""Tests of the shared input dispatcher's ordering and timing, on a RecordingBackend."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inputdispatcher import FOCUS_SETTLE_DEFAULT, InputDispatcher, RecordingBackend
+
+TOLERANCE = 0.005
+
+
+@pytest.fixture
+def dispatcher():
+    dispatcher = InputDispatcher()
+    dispatcher.flush(timeout=2)
+    backend = RecordingBackend()
+    dispatcher.set_backend(backend)
+    yield dispatcher, backend
+    dispatcher.flush(timeout=2)
+
+
+def ops(backend):
+    return [(op, args) for _, op, args in backend.events]
+
+
+def times(backend, op):
+    return [at for at, name, _ in backend.events if name == op]
+
+
+def test_dispatcher_is_shared():
+    assert InputDispatcher() is InputDispatcher()
+
+
+def test_backend_is_only_chosen_through_set_or_use_backend(dispatcher):
+    output, backend = dispatcher
+    with pytest.raises(TypeError):
+        InputDispatcher(backend=RecordingBackend())
+    output.use_backend("recorder")
+    assert output.backend is backend
+    output.use_backend("auto")
+    assert output.backend is backend
+
+
+def test_click_holds_the_button(dispatcher):
+    output, backend = dispatcher
+    output.click(100, 200)
+    assert output.flush(timeout=2)
+    assert ops(backend) == [("move_to", (100, 200)), ("mouse_down", ("left",)),
+                            ("mouse_up", ("left",))]
+    (down,), (up,) = times(backend, "mouse_down"), times(backend, "mouse_up")
+    assert up - down >= output.click_hold - TOLERANCE
+
+
+def test_double_click_is_spaced_by_the_interval(dispatcher):
+    output, backend = dispatcher
+    output.click(button="right", clicks=2, interval=0.03)
+    assert output.flush(timeout=2)
+    assert [op for op, _ in ops(backend)] == ["mouse_down", "mouse_up", "mouse_down", "mouse_up"]
+    ups, downs = times(backend, "mouse_up"), times(backend, "mouse_down")
+    assert downs[1] - ups[0] >= 0.03 - TOLERANCE
+
+
+def test_events_keep_their_order_and_moves_coalesce(dispatcher):
+    output, backend = dispatcher
+    for x in range(10):
+        output.move_to(x, x)
+    output.press("a")
+    output.write("bc")
+    output.scroll(-120)
+    output.move_to(50, 60)
+    assert output.flush(timeout=2)
+    assert ops(backend) == [("move_to", (9, 9)), ("press", ("a",)), ("write", ("bc",)),
+                            ("scroll", (-120,)), ("move_to", (50, 60))]
+    assert output.position() == (50, 60)
+
+
+def test_moves_wait_for_a_click_to_finish(dispatcher):
+    output, backend = dispatcher
+    output.click(10, 10)
+    output.move_to(500, 500)
+    assert output.flush(timeout=2)
+    assert [op for op, _ in ops(backend)] == ["move_to", "mouse_down", "mouse_up", "move_to"]
+    assert backend.cursor == (500, 500)
+
+
+def test_events_after_a_hotkey_wait_for_the_focus_to_settle(dispatcher):
+    output, backend = dispatcher
+    output.settle_time = 0.05
+    try:
+        output.hotkey("alt", "tab")
+        output.press("x")
+        assert output.flush(timeout=2)
+    finally:
+        output.settle_time = FOCUS_SETTLE_DEFAULT
+    assert ops(backend) == [("hotkey", ("alt", "tab")), ("press", ("x",))]
+    (hotkey,), (press,) = times(backend, "hotkey"), times(backend, "press")
+    assert press - hotkey >= 0.05 - TOLERANCE
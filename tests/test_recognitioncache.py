@@ -0,0 +1,96 @@
+"""Tests of the acoustic recognition cache, on synthetic audio."""
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recognitioncache import RecognitionCache
+
+RATE = 16000
+
+
+def utterance(tones, seconds=0.6, level=8000.0, silence=0.2):
+    """16-bit PCM of a sequence of tones (Hz), padded with silence."""
+    t = np.arange(int(RATE * seconds / len(tones))) / RATE
+    voiced = np.concatenate([np.sin(2 * np.pi * f * t) + 0.5 * np.sin(2 * np.pi * 2.7 * f * t)
+                             for f in tones])
+    pad = np.zeros(int(RATE * silence))
+    samples = np.concatenate([pad, voiced * level, pad])
+    return samples.astype(np.int16).tobytes()
+
+
+COPY = utterance([300, 900, 500])
+PASTE = utterance([1200, 400, 1500])
+UNDO = utterance([700, 700, 2000])
+
+
+def test_fingerprint_ignores_loudness():
+    cache = RecognitionCache()
+    loud, _ = cache.fingerprint(COPY, RATE)
+    quiet, _ = cache.fingerprint(utterance([300, 900, 500], level=800.0), RATE)
+    assert float(loud @ quiet) > 0.99
+
+
+def test_silence_and_long_audio_are_not_fingerprinted():
+    cache = RecognitionCache(max_seconds=1.5)
+    assert cache.fingerprint(bytes(RATE * 2), RATE) is None
+    assert cache.fingerprint(utterance([300, 900, 500, 1200, 400], seconds=3.0), RATE) is None
+
+
+def test_repeat_hits_and_other_phrases_miss():
+    cache = RecognitionCache()
+    cache.store(cache.fingerprint(COPY, RATE), "copy")
+    cache.store(cache.fingerprint(PASTE, RATE), "paste")
+    assert cache.lookup(cache.fingerprint(utterance([300, 900, 500], level=5000.0), RATE)) == "copy"
+    assert cache.lookup(cache.fingerprint(UNDO, RATE)) is None
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.hit_rate == 0.5
+
+
+def test_threshold_above_any_similarity_always_misses():
+    cache = RecognitionCache(threshold=1.01)
+    fingerprint = cache.fingerprint(COPY, RATE)
+    cache.store(fingerprint, "copy")
+    assert cache.lookup(fingerprint) is None
+
+
+def test_same_sound_for_two_commands_is_a_miss():
+    cache = RecognitionCache()
+    fingerprint = cache.fingerprint(COPY, RATE)
+    cache.store(fingerprint, "copy")
+    cache.store(fingerprint, "cut")
+    assert cache.lookup(fingerprint) is None
+
+
+def test_least_recently_matched_entry_is_evicted():
+    cache = RecognitionCache(capacity=2)
+    copy, paste, undo = (cache.fingerprint(pcm, RATE) for pcm in (COPY, PASTE, UNDO))
+    cache.store(copy, "copy")
+    cache.store(paste, "paste")
+    assert cache.lookup(copy) == "copy"  # Now more recent than "paste"
+    cache.store(undo, "undo")
+    assert len(cache) == 2
+    assert cache.lookup(paste) is None
+    assert cache.lookup(copy) == "copy"
+    assert cache.lookup(undo) == "undo"
+
+
+def test_cache_is_only_used_with_batch_engines(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    from speechengines import SpeechEngine
+    from voicecontroller import VoiceController
+
+    class BatchEngine(SpeechEngine):
+        name = "batch"
+
+    class StreamingEngine(SpeechEngine):
+        name = "streaming"
+        streaming = True
+
+    controller = VoiceController(config_overrides={"recognition_cache_size": 8})
+    assert isinstance(controller.create_recognition_cache(BatchEngine()), RecognitionCache)
+    assert controller.create_recognition_cache(StreamingEngine()) is None
+    controller.recognition_cache_size = 0
+    assert controller.create_recognition_cache(BatchEngine()) is None
@@ -0,0 +1,99 @@
+"""Replay regression tests: landmark dumps through the face pipeline via benchmark.py."""
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmark import run_benchmark
+from framesource import LandmarkStreamSource, save_landmark_stream
+from landmarks import (NUM_LANDMARKS, FACE_LEFT, FACE_RIGHT, LEFT_EYE_TOP, LEFT_EYE_BOTTOM,
+                       RIGHT_EYE_TOP, RIGHT_EYE_BOTTOM, UPPER_LIP, LOWER_LIP, MOUTH_LEFT,
+                       MOUTH_RIGHT)
+
+FPS = 30
+
+
+def face(left_closed=False, right_closed=False, mouth_open=False):
+    """Landmarks of a frontal face with the eyes and mouth open or closed."""
+    points = np.full((NUM_LANDMARKS, 3), 0.5, dtype=np.float32)
+    points[FACE_LEFT, 0], points[FACE_RIGHT, 0] = 0.35, 0.65
+    points[LEFT_EYE_TOP, 1] = points[RIGHT_EYE_TOP, 1] = 0.40
+    points[LEFT_EYE_BOTTOM, 1] = 0.40 if left_closed else 0.43
+    points[RIGHT_EYE_BOTTOM, 1] = 0.40 if right_closed else 0.43
+    points[MOUTH_LEFT, 0], points[MOUTH_RIGHT, 0] = 0.45, 0.55
+    points[UPPER_LIP, 1] = 0.60
+    points[LOWER_LIP, 1] = 0.66 if mouth_open else 0.60
+    return points
+
+
+def trace(segments):
+    """Frames and timestamps for (landmarks or None, seconds) segments at FPS."""
+    frames = []
+    for points, seconds in segments:
+        frames += [points] * round(seconds * FPS)
+    return frames, np.arange(len(frames)) / FPS
+
+
+def replay(tmp_path, segments):
+    frames, timestamps = trace(segments)
+    path = str(tmp_path / "trace.npz")
+    save_landmark_stream(path, frames, (640, 480), timestamps)
+    return run_benchmark(path, config_path=str(tmp_path / "config.json"))
+
+
+def test_landmark_stream_round_trip(tmp_path):
+    frames, timestamps = trace([(face(), 0.1), (None, 0.1)])
+    path = str(tmp_path / "trace.npz")
+    save_landmark_stream(path, frames, (320, 240), timestamps * 2)
+    source = LandmarkStreamSource(path)
+    read = []
+    while source.read()[0]:
+        read.append((source.timestamp, source.payload))
+    assert len(read) == len(frames)
+    assert [t for t, _ in read] == list(timestamps * 2)
+    assert np.array_equal(read[0][1], frames[0])
+    assert read[-1][1] is None
+    assert source.frame.shape == (240, 320, 3)
+
+
+def test_blinks_replay_to_left_and_right_click(tmp_path):
+    closed = face(left_closed=True, right_closed=True)
+    results = replay(tmp_path, [(face(), 1.0), (closed, 0.3), (face(), 1.2),
+                                (closed, 2.5), (face(), 0.8)])
+    assert results["frames"] == 174
+    events = results["events"]
+    assert events["mouse_down:left"] == events["mouse_up:left"] == 1
+    assert events["mouse_down:right"] == events["mouse_up:right"] == 1
+
+
+def test_left_eye_hold_replays_to_a_drag(tmp_path):
+    events = replay(tmp_path, [(face(), 1.0), (face(left_closed=True), 1.0), (face(), 1.0)])["events"]
+    assert events["mouse_down:left"] == events["mouse_up:left"] == 1
+    assert "mouse_down:right" not in events
+
+
+def test_mouth_hold_replays_to_keyboard_toggle(tmp_path):
+    events = replay(tmp_path, [(face(), 1.0), (face(mouth_open=True), 1.5), (face(), 1.0)])["events"]
+    assert events["keyboard_open"] == 1
+    assert "mouse_down:left" not in events
+
+
+def test_lost_face_fires_nothing(tmp_path):
+    results = replay(tmp_path, [(face(), 0.5), (None, 1.0), (face(), 0.5)])
+    assert results["faces"] == 30
+    assert "mouse_down:left" not in results["events"]
+
+
+def test_replay_leaves_the_working_directory_alone(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    frames, timestamps = trace([(face(), 0.2)])
+    save_landmark_stream("trace.npz", frames, (640, 480), timestamps)
+    run_benchmark("trace.npz")
+    assert sorted(os.listdir(tmp_path)) == ["trace.npz"]
+
+
+def test_capture_time_is_recorded_once_per_frame(tmp_path):
+    result = replay(tmp_path, [(face(), 0.5)])
+    assert result["stages"]["capture"]["count"] == result["frames"] == 15
@@ -0,0 +1,56 @@
+"""Tests of the per-thread OS priorities."""
+import os
+import sys
+from threading import Thread, get_native_id
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scheduler import (BASE_NICE, NICE_OFFSETS, PRIORITY_HIGH, PRIORITY_LOW, PRIORITY_NORMAL,
+                       set_thread_priority)
+
+pytestmark = pytest.mark.skipif(not sys.platform.startswith("linux"), reason="Linux niceness")
+
+
+def niceness_after(*priorities):
+    """Apply `priorities` in turn on a fresh thread; returns its niceness after each."""
+    seen = []
+
+    def run():
+        for priority in priorities:
+            set_thread_priority(priority)
+            seen.append(os.getpriority(os.PRIO_PROCESS, get_native_id()))
+
+    thread = Thread(target=run)
+    thread.start()
+    thread.join()
+    return seen
+
+
+def test_priorities_do_not_stack():
+    assert niceness_after(PRIORITY_LOW, PRIORITY_LOW) == [BASE_NICE + NICE_OFFSETS[PRIORITY_LOW]] * 2
+
+
+def test_child_thread_is_set_relative_to_the_process():
+    seen = []
+
+    def child():
+        set_thread_priority(PRIORITY_LOW)
+        seen.append(os.getpriority(os.PRIO_PROCESS, get_native_id()))
+
+    def parent():
+        set_thread_priority(PRIORITY_NORMAL)
+        thread = Thread(target=child)
+        thread.start()
+        thread.join()
+
+    thread = Thread(target=parent)
+    thread.start()
+    thread.join()
+    assert seen == [BASE_NICE + NICE_OFFSETS[PRIORITY_LOW]]
+
+
+def test_high_priority_is_never_below_the_base():
+    nice, = niceness_after(PRIORITY_HIGH)
+    assert BASE_NICE + NICE_OFFSETS[PRIORITY_HIGH] <= nice <= BASE_NICE
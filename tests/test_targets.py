@@ -0,0 +1,108 @@
+"""Tests of snapping and dwell clicks as the on-screen keyboard's targets come and go."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmark import BENCHMARK_OVERRIDES
+from facecontroller import FaceController
+from inputdispatcher import InputDispatcher, RecordingBackend
+from targets import DwellClicker, TargetIndex, TargetSnapper, keyboard_targets
+from virtualkeyboard import VirtualKeyboard
+
+KEYS = [("a", 100, 100, 40, 40), ("b", 150, 100, 40, 40)]
+FRAME = 1 / 30
+
+
+def test_snap_is_dropped_once_its_target_is_gone():
+    index = TargetIndex()
+    snapper = TargetSnapper(index)
+    index.replace("keyboard", keyboard_targets(KEYS))
+    x, y, target = snapper.snap(118, 118)
+    assert target.name == "a" and (x, y) != (118, 118)
+    index.replace("keyboard", [])
+    assert snapper.snap(118, 118) == (118, 118, None)
+    assert snapper.current is None
+
+
+def test_dwell_on_a_target_clicks_once():
+    index = TargetIndex()
+    index.replace("keyboard", keyboard_targets(KEYS))
+    target, _ = index.nearest(120, 120, 10)
+    dwell = DwellClicker(dwell_time=0.5)
+    clicks = [dwell.update(120, 120, frame * FRAME, target) for frame in range(30)]
+    assert clicks.count(True) == 1 and clicks.index(True) == 15
+
+
+@pytest.fixture
+def controller(tmp_path):
+    backend = RecordingBackend()
+    InputDispatcher().set_backend(backend)
+    controller = FaceController(config_overrides={**BENCHMARK_OVERRIDES, "snap_targets": True,
+                                                  "dwell_click": True, "dwell_time": 0.5},
+                                config_path=str(tmp_path / "config.json"))
+    controller.backend = backend
+    return controller
+
+
+def clicks(controller):
+    InputDispatcher().flush(timeout=2)
+    return [op for _, op, _ in controller.backend.events if op == "mouse_down"]
+
+
+def test_dwell_on_a_keyboard_button_clicks(controller):
+    controller.on_keyboard_targets(KEYS)
+    for frame in range(30):
+        controller.move_cursor(120, 120, frame * FRAME)
+    assert clicks(controller) == ["mouse_down"]
+
+
+def test_dwell_is_reset_when_the_keyboard_closes(controller):
+    controller.on_keyboard_targets(KEYS)
+    for frame in range(10):
+        controller.move_cursor(120, 120, frame * FRAME)
+    assert controller.dwell.target is not None
+    controller.on_keyboard_targets([])
+    controller.move_cursor(120, 120, 10 * FRAME)
+    assert controller.dwell.target is None and controller.snapper.current is None
+    # Resting on, the dwell starts over from where the button was
+    for frame in range(11, 20):
+        controller.move_cursor(120, 120, frame * FRAME)
+    assert clicks(controller) == []
+
+
+class FakeRoot:
+    """Stands in for the Tk root: queues after() callbacks for the keyboard thread."""
+
+    def __init__(self):
+        self.queued = []
+
+    def after(self, ms, callback):
+        self.queued.append(callback)
+
+    def winfo_viewable(self):
+        return True
+
+    def quit(self):
+        pass
+
+    def destroy(self):
+        pass
+
+
+def test_keyboard_stop_reports_no_targets_on_the_keyboard_thread():
+    keyboard = VirtualKeyboard()
+    root, running, listeners = keyboard.root, keyboard._is_running, keyboard.target_listeners
+    published = []
+    try:
+        keyboard.root, keyboard._is_running = FakeRoot(), True
+        keyboard.target_listeners = [published.append]
+        keyboard.stop()
+        assert published == []  # Nothing is called on the stopping thread
+        for callback in keyboard.root.queued:
+            callback()
+        assert published == [[]]
+    finally:
+        keyboard.root, keyboard._is_running, keyboard.target_listeners = root, running, listeners
@@ -0,0 +1,245 @@
+"""
+WAV-driven tests of the voice pipeline: the audio ring buffer, phrase
+segmentation, the streaming decode loop and the engine adapters.
+
+fixtures/two_utterances.wav is 8 kHz 16-bit mono: 0.6 s of low noise, a
+0.6 s tone burst, 1.0 s of noise, a 0.8 s burst and 1.0 s of noise. The
+bursts stand in for two spoken utterances; a scripted engine decides
+what was "said" in each.
+"""
+import json
+import os
+import shutil
+import sys
+import wave
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from audiostream import AudioStream
+from inputdispatcher import InputDispatcher, RecordingBackend
+from speechengines import SpeechEngine, VoskEngine
+
+FIXTURE = os.path.join(ROOT, "tests", "fixtures", "two_utterances.wav")
+RATE = 8000
+CHUNK = 800  # 100 ms
+LOUD = 1000.0  # RMS separating the bursts from the noise
+
+
+def wav_chunks(path=FIXTURE, size=CHUNK):
+    with wave.open(path, "rb") as wav:
+        assert (wav.getframerate(), wav.getsampwidth(), wav.getnchannels()) == (RATE, 2, 1)
+        chunks = []
+        while True:
+            chunk = wav.readframes(size)
+            if not chunk:
+                return chunks
+            chunks.append(chunk)
+
+
+class ScriptedEngine(SpeechEngine):
+    """
+    Streaming engine that "hears" the next scripted word on every loud chunk.
+
+    Each burst of loud chunks is one utterance; it ends after `end_chunks`
+    quiet chunks, like a decoder's endpointer.
+    """
+
+    name = "scripted"
+    streaming = True
+
+    def __init__(self, utterances, end_chunks=3):
+        self.utterances = [phrase.split() for phrase in utterances]
+        self.end_chunks = end_chunks
+
+    def start(self, sample_rate):
+        self.heard, self.quiet, self.finished = [], 0, ""
+
+    def accept(self, chunk):
+        if AudioStream.rms(chunk) > LOUD:
+            self.quiet = 0
+            words = self.utterances[0] if self.utterances else []
+            if len(self.heard) < len(words):
+                self.heard.append(words[len(self.heard)])
+            return False
+        self.quiet += 1
+        if self.heard and self.quiet >= self.end_chunks:
+            self.finished, self.heard = " ".join(self.heard), []
+            self.utterances.pop(0)
+            return True
+        return False
+
+    def partial(self):
+        return " ".join(self.heard)
+
+    def result(self):
+        text, self.finished = self.finished, ""
+        return text
+
+    def final(self):
+        text, self.heard = " ".join(self.heard), []
+        return text
+
+
+@pytest.fixture
+def controller(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    shutil.copy(os.path.join(ROOT, "voice_commands.yaml"), tmp_path)
+    backend = RecordingBackend()
+    InputDispatcher().set_backend(backend)
+    from voicecontroller import VoiceController
+    controller = VoiceController(config_overrides={"early_fire": True, "recognition_cache_size": 0})
+    controller.backend = backend
+    return controller
+
+
+def decode(controller, utterances):
+    """Decode the fixture with a scripted engine; returns (command, seconds into the audio) pairs."""
+    controller.engine = ScriptedEngine(utterances)
+    chunks = wav_chunks()
+    position = [0]
+    fired = []
+    controller.command_listeners.append(lambda cmd: fired.append((cmd, position[0] * CHUNK / RATE)))
+
+    def read_chunk():
+        if position[0] >= len(chunks):
+            return b""
+        position[0] += 1
+        return chunks[position[0] - 1]
+
+    controller.decode_stream(read_chunk, RATE)
+    InputDispatcher().flush(timeout=2)
+    return fired
+
+
+def test_ring_buffer_flags_speech_chunks():
+    stream = AudioStream(sample_rate=RATE, chunk_size=CHUNK, calibration_seconds=0.3)
+    stream.closed = False
+    for chunk in wav_chunks():
+        stream.write(chunk)
+    stream.close()
+    flags = []
+    while True:
+        item = stream.read(timeout=0)
+        if item is None:
+            break
+        flags.append(item[1])
+    assert stream.noise_floor is not None and stream.noise_floor < LOUD
+    assert flags == [False] * 6 + [True] * 6 + [False] * 10 + [True] * 8 + [False] * 10
+
+
+def test_ring_buffer_counts_overruns():
+    stream = AudioStream(sample_rate=RATE, chunk_size=CHUNK, buffer_seconds=1.0)
+    stream.closed = False
+    for chunk in wav_chunks():
+        stream.write(chunk)
+    chunk, _ = stream.read(timeout=0)
+    assert stream.overruns == len(wav_chunks()) - 10
+    assert chunk == wav_chunks()[-10]
+
+
+def test_listen_cuts_one_phrase_per_utterance():
+    stream = AudioStream(sample_rate=RATE, chunk_size=CHUNK, calibration_seconds=0.3)
+    stream.closed = False
+    for chunk in wav_chunks():
+        stream.write(chunk)
+    stream.close()
+    seconds = [len(stream.listen(pause_threshold=0.5).frame_data) / 2 / RATE for _ in range(2)]
+    # Pre-roll, the burst, then the pause that ended it
+    assert seconds == pytest.approx([0.3 + 0.6 + 0.5, 0.3 + 0.8 + 0.5])
+    with pytest.raises(EOFError):
+        stream.listen()
+
+
+def test_command_fires_early_from_the_partial(controller):
+    fired = decode(controller, ["copy", "paste"])
+    assert [cmd for cmd, _ in fired] == ["copy", "paste"]
+    # Each ran on the first loud chunk of its burst, not after the utterance ended
+    assert fired[0][1] == pytest.approx(0.7)
+    assert fired[1][1] == pytest.approx(2.3)
+    events = [(op, args) for _, op, args in controller.backend.events]
+    assert events == [("hotkey", ("ctrl", "c")), ("hotkey", ("ctrl", "v"))]
+
+
+def test_longer_phrase_is_waited_for(controller):
+    fired = decode(controller, ["select all", "copy"])
+    assert [cmd for cmd, _ in fired] == ["select all", "copy"]
+
+
+def test_commands_wait_for_the_end_without_early_fire(controller):
+    controller.early_fire = False
+    fired = decode(controller, ["copy", "paste"])
+    assert [cmd for cmd, _ in fired] == ["copy", "paste"]
+    assert fired[0][1] == pytest.approx(1.5)
+
+
+def test_words_containing_stop_do_not_stop(controller):
+    decode(controller, ["start the stopwatch", "non-stop music"])
+    assert not controller.stop_event.is_set()
+
+
+def test_stop_phrase_stops_voice_control(controller):
+    fired = decode(controller, ["stop listening", "copy"])
+    assert controller.stop_event.is_set()
+    assert fired == []
+
+
+class FakeKaldiRecognizer:
+    """Replays (ended, partial, text) steps the way vosk.KaldiRecognizer reports them."""
+
+    created = []
+
+    def __init__(self, model, sample_rate, grammar=None):
+        self.grammar = grammar
+        self.steps = []
+        self.step = (False, "", "")
+        FakeKaldiRecognizer.created.append(self)
+
+    def AcceptWaveform(self, chunk):
+        self.step = self.steps.pop(0) if self.steps else (False, "", "")
+        return self.step[0]
+
+    def PartialResult(self):
+        return json.dumps({"partial": self.step[1]})
+
+    def Result(self):
+        return json.dumps({"text": self.step[2]})
+
+    def FinalResult(self):
+        return json.dumps({"text": self.step[2]})
+
+
+class FakeVosk:
+    KaldiRecognizer = FakeKaldiRecognizer
+
+
+def vosk_engine():
+    engine = VoskEngine.__new__(VoskEngine)
+    engine._vosk, engine.model = FakeVosk, None
+    engine.decoder, engine.grammar, engine.sample_rate = None, None, None
+    engine._grammar_changed = engine._restart = False
+    FakeKaldiRecognizer.created = []
+    return engine
+
+
+def test_vosk_adapter_drops_unknown_words():
+    engine = vosk_engine()
+    engine.start(RATE)
+    engine.decoder.steps = [(False, "[unk] copy", ""), (True, "", "copy [unk] paste")]
+    assert not engine.accept(b"")
+    assert engine.partial() == "copy"
+    assert engine.accept(b"")
+    assert engine.result() == "copy paste"
+
+
+def test_vosk_adapter_restarts_the_decoder_for_a_new_grammar():
+    engine = vosk_engine()
+    engine.start(RATE)
+    assert FakeKaldiRecognizer.created[-1].grammar is None
+    engine.set_grammar(["copy", "[unk]"])
+    assert engine.accept(b"")  # Ends the utterance in progress
+    engine.accept(b"")
+    assert len(FakeKaldiRecognizer.created) == 2
+    assert json.loads(FakeKaldiRecognizer.created[-1].grammar) == ["copy", "[unk]"]
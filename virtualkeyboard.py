@@ -3,10 +3,11 @@ from tkinter import ttk
 import logging
 import atexit
 import threading
-from typing import Optional, Dict, Any
+from typing import Callable, List, Optional, Dict, Any, Tuple
 from pathlib import Path
 import yaml
-import pyautogui
+from inputdispatcher import InputDispatcher
+from scheduler import set_thread_priority, PRIORITY_LOW
 
 # Configure logging
 logging.basicConfig(
@@ -94,6 +95,10 @@ class VirtualKeyboard:
             self._is_running = False
             self._drag_data = {"x": 0, "y": 0}
             self.buttons = {}
+            self.key_buttons = []  # (key, button) for every button, including repeated keys
+            # Called only on the keyboard thread, in order, with [(key, x, y, width,
+            # height)] in screen pixels whenever the buttons move, appear or disappear
+            self.target_listeners: List[Callable[[List[Tuple[str, int, int, int, int]]], None]] = []
             self.keyboard_thread = None
             atexit.register(self.cleanup)
             self._initialized = True
@@ -105,6 +110,7 @@ class VirtualKeyboard:
             return
 
         def create_keyboard():
+            set_thread_priority(PRIORITY_LOW)
             self.root = tk.Tk()
             self._setup_window(x, y)
             self._create_widgets()
@@ -120,9 +126,12 @@ class VirtualKeyboard:
         """Stop the virtual keyboard"""
         try:
             if self._is_running and self.root:
+               # Once not running the buttons publish as gone; doing it on the
+               # keyboard thread keeps it from overtaking a layout update there
+               self._is_running = False
+               self.root.after(0, self._publish_targets)
                self.root.after(0, self.root.quit)
                self.root.after(100, self.root.destroy)
-               self._is_running = False
             if self.keyboard_thread:
                 self.keyboard_thread.join(timeout=1.0)
         except:
@@ -217,6 +226,25 @@ class VirtualKeyboard:
                     sticky='nsew'
                 )
                 self.buttons[key] = button
+                self.key_buttons.append((key, button))
+
+    def button_geometry(self) -> List[Tuple[str, int, int, int, int]]:
+        """Screen rectangles of the visible buttons; call on the keyboard thread."""
+        if not self._is_running or not self.root.winfo_viewable():
+            return []
+        return [(key, button.winfo_rootx(), button.winfo_rooty(),
+                 button.winfo_width(), button.winfo_height())
+                for key, button in self.key_buttons]
+
+    def _publish_targets(self, event: Optional[tk.Event] = None) -> None:
+        if event is not None and event.widget is not self.root:
+            return
+        geometry = self.button_geometry() if event is None or event.type != tk.EventType.Unmap else []
+        for listener in self.target_listeners:
+            try:
+                listener(geometry)
+            except Exception as e:
+                logger.error(f"Error in keyboard target listener: {e}")
 
     def hide(self) -> None:
         if self.root and self.root.winfo_exists():
@@ -233,7 +261,7 @@ class VirtualKeyboard:
     @staticmethod
     def return_focus_to_last_window(event: Optional[tk.Event] = None) -> str:
         try:
-            pyautogui.hotkey('alt', 'tab')
+            InputDispatcher().hotkey('alt', 'tab')
         except Exception as e:
             logger.error(f"Error returning focus to last window: {e}")
         return 'break'
@@ -244,6 +272,8 @@ class VirtualKeyboard:
         title_bar = self.main_frame.winfo_children()[0]
         title_bar.bind('<Button-1>', self._start_drag)
         title_bar.bind('<B1-Motion>', self._drag)
+        for sequence in ('<Configure>', '<Map>', '<Unmap>'):
+            self.root.bind(sequence, self._publish_targets, add='+')
         
         for button in self.buttons.values():
             button.bind('<FocusIn>', self.return_focus_to_last_window)
@@ -277,6 +307,7 @@ class VirtualKeyboard:
             logger.error(f"Error handling button click for key '{key}': {e}")
 
     def _handle_key_press(self, key: str) -> None:
+        output = InputDispatcher()
         self.return_focus_to_last_window()
     
         if key == 'Caps':
@@ -286,12 +317,12 @@ class VirtualKeyboard:
             self.is_shift = not self.is_shift
             return
         elif key in {'Space', 'Tab', 'Enter', 'Backspace'}:
-            pyautogui.press(key.lower())
+            output.press(key.lower())
             return
     
         if self.is_caps or self.is_shift:
             if key.isalpha():
-                pyautogui.press(key.upper())
+                output.press(key.upper())
             else:
                 shifted_symbols = {
                     '1': '!', '2': '@', '3': '#', '4': '$', '5': '%',
@@ -301,9 +332,9 @@ class VirtualKeyboard:
                     '`': '~'
                 }
                 char = shifted_symbols.get(key, key)
-                pyautogui.write(char)
+                output.write(char)
         else:
-            pyautogui.write(key)
+            output.write(key)
     
         if self.is_shift:
             self.is_shift = False
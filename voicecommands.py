@@ -0,0 +1,361 @@
+from threading import Thread, Event, RLock
+from collections import deque
+from functools import partial
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import inspect
+import logging
+import os
+import yaml
+
+logger = logging.getLogger(__name__)
+
+STOP_PHRASES = ("stop", "stop listening")
+UNKNOWN_WORD = "[unk]"
+COMMANDS_FILE_DEFAULT = "voice_commands.yaml"
+RELOAD_INTERVAL_DEFAULT = 1.0
+OUTPUT_ACTIONS = ("click", "mouse_down", "mouse_up", "scroll", "press", "hotkey", "move_rel", "write")
+
+
+class CommandTable(dict):
+    """
+    Spoken phrase -> action mapping that reports changes to its phrase set.
+
+    Listeners are called with the table whenever a phrase is added or
+    removed (replacing the action of an existing phrase does not count), so
+    anything compiled from the phrases, such as a decoder grammar, can be
+    rebuilt automatically.
+
+    Changes are serialized by a lock and listeners run while it is held.
+    Lookups take no lock: `replace` never empties the table on the way, so a
+    phrase present before and after a reload resolves throughout it. Other
+    threads iterating the table should use `phrases()`.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.listeners: List[Callable[["CommandTable"], None]] = []
+        self.version = 0
+        self._lock = RLock()
+
+    def _changed(self) -> None:
+        self.version += 1
+        for listener in self.listeners:
+            listener(self)
+
+    def __setitem__(self, phrase: str, action: Callable) -> None:
+        with self._lock:
+            added = phrase not in self
+            super().__setitem__(phrase, action)
+            if added:
+                self._changed()
+
+    def __delitem__(self, phrase: str) -> None:
+        with self._lock:
+            super().__delitem__(phrase)
+            self._changed()
+
+    def pop(self, phrase: str, *default):
+        with self._lock:
+            had = phrase in self
+            value = super().pop(phrase, *default)
+            if had:
+                self._changed()
+            return value
+
+    def popitem(self):
+        with self._lock:
+            item = super().popitem()
+            self._changed()
+            return item
+
+    def setdefault(self, phrase: str, action: Callable = None):
+        with self._lock:
+            if phrase not in self:
+                self[phrase] = action
+            return self[phrase]
+
+    def update(self, *args, **kwargs) -> None:
+        with self._lock:
+            keys = set(self)
+            super().update(*args, **kwargs)
+            if set(self) != keys:
+                self._changed()
+
+    def clear(self) -> None:
+        with self._lock:
+            if self:
+                super().clear()
+                self._changed()
+
+    def replace(self, commands: Dict[str, Callable]) -> None:
+        """Swap in a whole new command set with a single change notification."""
+        with self._lock:
+            # New and changed phrases go in before stale ones come out, so
+            # a concurrent lookup of a phrase kept by the reload never misses
+            super().update(commands)
+            for phrase in [phrase for phrase in self if phrase not in commands]:
+                super().__delitem__(phrase)
+            self._changed()
+
+    def phrases(self) -> List[str]:
+        """A consistent snapshot of the phrases, safe to take from any thread."""
+        with self._lock:
+            return list(self)
+
+
+class CommandAction:
+    """
+    A command compiled once into a pre-bound call.
+
+    `spec` is the action mapping from the command file; the target method is
+    looked up and its arguments bound when the command is loaded, so running
+    the command is a single call and mistakes show up at load time.
+    """
+
+    def __init__(self, phrase: str, spec: dict, targets: Dict[str, Callable]):
+        params = dict(spec)
+        name = params.pop("action", None)
+        if name not in targets:
+            raise ValueError(f"Command '{phrase}': unknown action '{name}'. "
+                             f"Choose from: {', '.join(targets)}")
+        args = tuple(params.pop("keys", ())) if name == "hotkey" else ()
+        target = targets[name]
+        try:
+            inspect.signature(target).bind(*args, **params)
+        except TypeError as e:
+            raise ValueError(f"Command '{phrase}': bad parameters for {name}: {e}")
+        self.phrase = phrase
+        self.name = name
+        self.spec = spec
+        self._call = partial(target, *args, **params)
+
+    def __call__(self):
+        return self._call()
+
+    def __repr__(self):
+        return f"CommandAction({self.phrase!r}, {self.spec!r})"
+
+
+def _substitute(value, replacement: str):
+    if isinstance(value, str):
+        return value.format(value=replacement)
+    if isinstance(value, list):
+        return [_substitute(item, replacement) for item in value]
+    if isinstance(value, dict):
+        return {key: _substitute(item, replacement) for key, item in value.items()}
+    return value
+
+
+def compile_commands(config: dict, targets: Dict[str, Callable]) -> Dict[str, CommandAction]:
+    """
+    Compile a command file's contents into phrase -> CommandAction.
+
+    Args:
+        config: Mapping with "commands" (phrase -> action spec) and optional
+            "templates" (phrase pattern, values, action spec).
+        targets: Action name -> callable the actions are bound to.
+
+    Raises:
+        ValueError: On any malformed entry; nothing is compiled then.
+    """
+    if not isinstance(config, dict):
+        raise ValueError("Command file must contain a mapping")
+    specs = dict(config.get("commands") or {})
+    for template in config.get("templates") or []:
+        for value in template["values"]:
+            specs[template["phrase"].format(value=value)] = _substitute(template["action"], value)
+    commands = {}
+    for phrase, spec in specs.items():
+        if not isinstance(spec, dict):
+            raise ValueError(f"Command '{phrase}': expected a mapping with an 'action'")
+        commands[str(phrase)] = CommandAction(str(phrase), spec, targets)
+    return commands
+
+
+def load_command_file(path: str, targets: Dict[str, Callable]) -> Dict[str, CommandAction]:
+    """Read and compile a YAML (or JSON) command file."""
+    with open(path, 'r') as f:
+        return compile_commands(yaml.safe_load(f) or {}, targets)
+
+
+class CommandFileWatcher:
+    """
+    Reloads a command file in the background whenever it changes.
+
+    The file is polled every `interval` seconds. A changed file is parsed
+    and compiled on the watcher thread and only handed to `on_load` if it
+    compiled cleanly, so a half-saved or broken edit keeps the previous
+    commands in place.
+    """
+
+    def __init__(self, path: str, targets: Dict[str, Callable],
+                 on_load: Callable[[Dict[str, CommandAction]], None],
+                 interval: float = RELOAD_INTERVAL_DEFAULT):
+        self.path = path
+        self.targets = targets
+        self.on_load = on_load
+        self.interval = interval
+        self.stop_event = Event()
+        self.watch_thread = None
+        self._mtime: Optional[float] = None
+
+    def _modified(self) -> Optional[float]:
+        try:
+            return os.path.getmtime(self.path)
+        except OSError:
+            return None
+
+    def load(self) -> bool:
+        """Load the file now; returns True if new commands were applied."""
+        self._mtime = self._modified()
+        try:
+            commands = load_command_file(self.path, self.targets)
+        except Exception as e:
+            logger.error(f"Could not load voice commands from {self.path}: {e}")
+            return False
+        self.on_load(commands)
+        logger.info(f"Loaded {len(commands)} voice commands from {self.path}")
+        return True
+
+    def watch_file(self):
+        """Watch loop: reload whenever the file's modification time changes."""
+        while not self.stop_event.wait(self.interval):
+            mtime = self._modified()
+            if mtime is not None and mtime != self._mtime:
+                self.load()
+
+    def start(self):
+        """Start watching the file in a separate thread."""
+        if self.interval > 0 and (self.watch_thread is None or not self.watch_thread.is_alive()):
+            self.stop_event.clear()
+            self.watch_thread = Thread(target=self.watch_file,
+                                       name="CommandWatchThread")
+            self.watch_thread.daemon = True
+            self.watch_thread.start()
+
+    def stop(self):
+        """Stop watching the file."""
+        self.stop_event.set()
+        if self.watch_thread and self.watch_thread.is_alive():
+            self.watch_thread.join(timeout=2)
+
+
+def build_grammar(phrases: Iterable[str], extra: Iterable[str] = STOP_PHRASES) -> List[str]:
+    """
+    Compile command phrases into a decoder grammar.
+
+    The grammar lists every phrase in lowercase, as decoders emit it, plus
+    an out-of-grammar token so speech that is not a command decodes to
+    "[unk]" instead of being forced onto the nearest phrase.
+    """
+    grammar = sorted({phrase.lower() for phrase in phrases} | {phrase.lower() for phrase in extra})
+    grammar.append(UNKNOWN_WORD)
+    return grammar
+
+
+class CommandMatcher:
+    """
+    Word-level Aho-Corasick automaton over the command phrases.
+
+    Built once per phrase set, it finds every phrase occurring in a
+    recognized utterance in a single pass over its words, independent of
+    how many phrases there are. Overlapping matches are resolved
+    leftmost-longest, so "select all" wins over "select" and several
+    commands in one utterance come back in spoken order. Phrases only match
+    whole words: "cut" does not fire inside "shortcut".
+    """
+
+    def __init__(self, phrases: Iterable[str]):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail = [0]
+        self.depth = [0]
+        self.output: List[Optional[str]] = [None]  # Phrase ending at this node
+        self.output_link = [0]  # Nearest node on the fail chain with an output
+        for phrase in phrases:
+            self._insert(phrase)
+        self._link()
+
+    def _insert(self, phrase: str) -> None:
+        state = 0
+        for word in phrase.lower().split():
+            next_state = self.goto[state].get(word)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto[state][word] = next_state
+                self.goto.append({})
+                self.fail.append(0)
+                self.depth.append(self.depth[state] + 1)
+                self.output.append(None)
+                self.output_link.append(0)
+            state = next_state
+        if state:
+            self.output[state] = phrase
+
+    def _link(self) -> None:
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for word, child in self.goto[state].items():
+                fallback = self.fail[state]
+                while fallback and word not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(word, 0)
+                link = self.fail[child]
+                self.output_link[child] = link if self.output[link] is not None else self.output_link[link]
+                queue.append(child)
+
+    def _step(self, state: int, word: str) -> int:
+        while state and word not in self.goto[state]:
+            state = self.fail[state]
+        return self.goto[state].get(word, 0)
+
+    def scan(self, text: str) -> Tuple[List[Tuple[int, int, str]], Optional[int]]:
+        """
+        Find the phrases in `text`.
+
+        Returns:
+            ([(start_word, end_word, phrase), ...] leftmost-longest and
+            non-overlapping, in order; index of the first word of the longest
+            unfinished phrase prefix at the end of the text, or None).
+        """
+        words = text.lower().split()
+        found = []
+        state = 0
+        for index, word in enumerate(words):
+            state = self._step(state, word)
+            node = state if self.output[state] is not None else self.output_link[state]
+            while node:
+                found.append((index + 1 - self.depth[node], index + 1, self.output[node]))
+                node = self.output_link[node]
+        found.sort(key=lambda match: (match[0], match[0] - match[1]))
+        matches = []
+        end = 0
+        for match in found:
+            if match[0] >= end:
+                matches.append(match)
+                end = match[1]
+
+        pending = None
+        node = state
+        while node:
+            if self.goto[node]:
+                pending = len(words) - self.depth[node]
+                break
+            node = self.fail[node]
+        return matches, pending
+
+    def find(self, text: str) -> List[str]:
+        """Phrases in `text`, leftmost-longest, in spoken order."""
+        return [phrase for _, _, phrase in self.scan(text)[0]]
+
+    def settled(self, text: str) -> List[str]:
+        """
+        Phrases in a partial hypothesis that further words can no longer change.
+
+        A match is held back while the words after its start could still grow
+        into a longer phrase, e.g. "select" waits in case "all" follows.
+        """
+        matches, pending = self.scan(text)
+        if pending is None:
+            return [phrase for _, _, phrase in matches]
+        return [phrase for start, end, phrase in matches if end <= pending]
@@ -1,187 +1,471 @@
 from threading import Lock, Thread, Event
-import pyautogui
-from typing import Dict, Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from inputdispatcher import InputDispatcher
+from metrics import MetricsRegistry, RateLimitedLogger
+from speechengines import create_engine, VOSK_MODEL_PATH_DEFAULT
+from audiostream import (AudioStream, create_vad, SAMPLE_RATE_DEFAULT, SPEECH_ENERGY_RATIO_DEFAULT,
+                         PAUSE_THRESHOLD_DEFAULT, VAD_AGGRESSIVENESS_DEFAULT)
+from voicecommands import (CommandTable, CommandMatcher, CommandFileWatcher, build_grammar,
+                           OUTPUT_ACTIONS, STOP_PHRASES, COMMANDS_FILE_DEFAULT, RELOAD_INTERVAL_DEFAULT)
+from dictation import Dictation
+from scheduler import set_thread_priority, PRIORITY_LOW
+from recognitioncache import RecognitionCache, CACHE_SIZE_DEFAULT, SIMILARITY_THRESHOLD_DEFAULT
+from typing import Dict, Callable, Iterable, List, Optional
 import speech_recognition as sr
 import logging
+import json
+import os
+import queue
 import time
 
+CHUNK_SIZE = 1600  # 100 ms of audio at 16 kHz per streaming decoder step
+UTTERANCE_QUEUE_SIZE = 8
+RECOGNIZER_WORKERS_DEFAULT = 2
+
 class VoiceController:
-    def __init__(self):
+    def __init__(self, config_overrides: Optional[dict] = None, stop_event: Optional[Event] = None):
+        self.config_path = "voice_controller_config.json"
+        self.default_config = {
+            "speech_engine": "auto",
+            "vosk_model_path": VOSK_MODEL_PATH_DEFAULT,
+            "sample_rate": SAMPLE_RATE_DEFAULT,
+            "early_fire": True,
+            "constrained_grammar": True,
+            "speech_energy_ratio": SPEECH_ENERGY_RATIO_DEFAULT,
+            "pause_threshold": PAUSE_THRESHOLD_DEFAULT,
+            "vad_mode": "auto",
+            "vad_aggressiveness": VAD_AGGRESSIVENESS_DEFAULT,
+            "recognizer_workers": RECOGNIZER_WORKERS_DEFAULT,
+            "commands_file": COMMANDS_FILE_DEFAULT,
+            "commands_reload_interval": RELOAD_INTERVAL_DEFAULT,
+            "recognition_cache_size": CACHE_SIZE_DEFAULT,
+            "recognition_cache_threshold": SIMILARITY_THRESHOLD_DEFAULT
+        }
+        self.load_config()
+        for key, value in (config_overrides or {}).items():
+            setattr(self, key, value)
         self.recognizer = sr.Recognizer()
+        self.engine = None  # Created on first use; loading an offline model takes a moment
+        self.command_listeners: List[Callable[[str], None]] = []
+        self.audio_stream = AudioStream(sample_rate=self.sample_rate, chunk_size=CHUNK_SIZE,
+                                        speech_energy_ratio=self.speech_energy_ratio,
+                                        vad=create_vad(self.vad_mode, self.sample_rate,
+                                                       self.vad_aggressiveness))
+        # Recognized utterances (text or pending recognitions), in the order they were spoken
+        self.command_queue = queue.Queue(maxsize=UTTERANCE_QUEUE_SIZE)
+        self.dispatch_thread = None
         self.command_lock = Lock()
-        self.stop_event = Event()
-        pyautogui.FAILSAFE = True
-        pyautogui.PAUSE = 0.05  # Reduced pause for faster response
-
-        self.commands: Dict[str, Callable] = {
-            "select": self.left_click,
-            "right click": pyautogui.rightClick,
-            "double click": pyautogui.doubleClick,
-            "triple click": pyautogui.tripleClick,
-            "drag": self.start_drag,
-            "drop": self.end_drag,
-            "scroll up": lambda: pyautogui.scroll(200),
-            "scroll down": lambda: pyautogui.scroll(-200),
-            "page up": lambda: pyautogui.hotkey('pgup'),
-            "page down": lambda: pyautogui.hotkey('pgdn'),
-            "minimise": lambda: pyautogui.hotkey('win', 'down'),
-            "maximize": lambda: pyautogui.hotkey('win', 'up'),
-            "close window": lambda: pyautogui.hotkey('alt', 'f4'),
-            "switch window": lambda: pyautogui.hotkey('alt', 'tab'),
-            "new window": lambda: pyautogui.hotkey('ctrl', 'n'),
-            "volume up": lambda: pyautogui.press('volumeup'),
-            "volume down": lambda: pyautogui.press('volumedown'),
-            # Updated to Win + Ctrl + O
-            "keyboard": lambda: pyautogui.hotkey('win', 'ctrl', 'o'),
-            "mute": lambda: pyautogui.press('volumemute'),
-            "play pause": lambda: pyautogui.press('playpause'),
-            "go back": lambda: pyautogui.hotkey('alt', 'left'),
-            "go forward": lambda: pyautogui.hotkey('alt', 'right'),
-            "refresh": lambda: pyautogui.hotkey('f5'),
-            "select all": lambda: pyautogui.hotkey('ctrl', 'a'),
-            "copy": lambda: pyautogui.hotkey('ctrl', 'c'),
-            "paste": lambda: pyautogui.hotkey('ctrl', 'v'),
-            "cut": lambda: pyautogui.hotkey('ctrl', 'x'),
-            "undo": lambda: pyautogui.hotkey('ctrl', 'z'),
-            "redo": lambda: pyautogui.hotkey('ctrl', 'y'),
-            # Added duration for smoother movement
-            "move left": lambda: pyautogui.moveRel(-50, 0, duration=0.1),
-            "move right": lambda: pyautogui.moveRel(50, 0, duration=0.1),
-            "move up": lambda: pyautogui.moveRel(0, -50, duration=0.1),
-            "move down": lambda: pyautogui.moveRel(0, 50, duration=0.1),
-            "small a": lambda: pyautogui.press('a'),
-            "small b": lambda: pyautogui.press('b'),
-            "small c": lambda: pyautogui.press('c'),
-            "small d": lambda: pyautogui.press('d'),
-            "small e": lambda: pyautogui.press('e'),
-            "small f": lambda: pyautogui.press('f'),
-            "small g": lambda: pyautogui.press('g'),
-            "small h": lambda: pyautogui.press('h'),
-            "small i": lambda: pyautogui.press('i'),
-            "small j": lambda: pyautogui.press('j'),
-            "small k": lambda: pyautogui.press('k'),
-            "small l": lambda: pyautogui.press('l'),
-            "small m": lambda: pyautogui.press('m'),
-            "small n": lambda: pyautogui.press('n'),
-            "small o": lambda: pyautogui.press('o'),
-            "small p": lambda: pyautogui.press('p'),
-            "small q": lambda: pyautogui.press('q'),
-            "small r": lambda: pyautogui.press('r'),
-            "small s": lambda: pyautogui.press('s'),
-            "small t": lambda: pyautogui.press('t'),
-            "small u": lambda: pyautogui.press('u'),
-            "small v": lambda: pyautogui.press('v'),
-            "small w": lambda: pyautogui.press('w'),
-            "small x": lambda: pyautogui.press('x'),
-            "small y": lambda: pyautogui.press('y'),
-            "small z": lambda: pyautogui.press('z'),
-            "capital A": lambda: pyautogui.press('A'),
-            "capital B": lambda: pyautogui.press('B'),
-            "capital C": lambda: pyautogui.press('C'),
-            "capital D": lambda: pyautogui.press('D'),
-            "capital E": lambda: pyautogui.press('E'),
-            "capital F": lambda: pyautogui.press('F'),
-            "capital G": lambda: pyautogui.press('G'),
-            "capital H": lambda: pyautogui.press('H'),
-            "capital I": lambda: pyautogui.press('I'),
-            "capital J": lambda: pyautogui.press('J'),
-            "capital K": lambda: pyautogui.press('K'),
-            "capital L": lambda: pyautogui.press('L'),
-            "capital M": lambda: pyautogui.press('M'),
-            "capital N": lambda: pyautogui.press('N'),
-            "capital O": lambda: pyautogui.press('O'),
-            "capital P": lambda: pyautogui.press('P'),
-            "capital Q": lambda: pyautogui.press('Q'),
-            "capital R": lambda: pyautogui.press('R'),
-            "capital S": lambda: pyautogui.press('S'),
-            "capital T": lambda: pyautogui.press('T'),
-            "capital U": lambda: pyautogui.press('U'),
-            "capital V": lambda: pyautogui.press('V'),
-            "capital W": lambda: pyautogui.press('W'),
-            "capital X": lambda: pyautogui.press('X'),
-            "capital Y": lambda: pyautogui.press('Y'),
-            "capital Z": lambda: pyautogui.press('Z'),
-        }
+        self.stop_event = stop_event or Event()  # Shared with the other controllers when scheduled
+        self.priority = PRIORITY_LOW
+        self.output = InputDispatcher()
+        self.metrics = MetricsRegistry()
+        self.metrics.gauge("voice.audio_overruns", lambda: self.audio_stream.overruns)
+        self.log_limiter = RateLimitedLogger(logging.getLogger(__name__))
+        self.dictation = Dictation()
+        # Shortcut for repeated short commands, set up with the engine; a size of 0 disables it
+        self.recognition_cache: Optional[RecognitionCache] = None
+
+        # Phrase -> action, loaded from the command file and kept up to date by the watcher
+        self.commands: Dict[str, Callable] = CommandTable()
+        self.action_targets: Dict[str, Callable] = {
+            name: getattr(self.output, name) for name in OUTPUT_ACTIONS}
+        self.action_targets["dictation"] = self.set_dictation
+        self.command_watcher = CommandFileWatcher(self.commands_file, self.action_targets,
+                                                  self.commands.replace,
+                                                  interval=self.commands_reload_interval)
+        self.command_watcher.load()
+        self.matcher = CommandMatcher(self.commands)
+        # Stop phrases match whole words only, so "stopwatch" or "non-stop" do not stop anything
+        self.stop_matcher = CommandMatcher(STOP_PHRASES)
+        self.commands.listeners.append(self.update_matcher)
+        self.commands.listeners.append(self.update_grammar)
         self.voice_thread = None
 
-    def left_click(self):
-        """Execute a left click with error handling."""
-        try:
-            pyautogui.click()
-        except Exception as e:
-            logging.error(f"Error during left click: {e}")
+    def load_engine(self):
+        """Create the configured speech engine if it does not exist yet."""
+        if self.engine is None:
+            self.engine = create_engine(self.speech_engine, self.recognizer, self.vosk_model_path)
+            logging.info(f"Using {self.engine.name} speech engine")
+            self.recognition_cache = self.create_recognition_cache(self.engine)
+            self.update_grammar(self.commands.phrases())
+        return self.engine
 
-    def start_drag(self):
-        """Start dragging from current position."""
-        try:
-            pyautogui.mouseDown()
-        except Exception as e:
-            logging.error(f"Error starting drag: {e}")
+    def create_recognition_cache(self, engine) -> Optional[RecognitionCache]:
+        """
+        The recognition cache for a batch engine, or None.
+
+        Streaming engines have already decoded an utterance by the time it
+        ends, so there is nothing left for a cache hit to save; the cache is
+        only used with batch engines such as Google.
+        """
+        if self.recognition_cache_size <= 0:
+            return None
+        if engine.streaming:
+            logging.info(f"recognition_cache_size only applies to batch speech engines; "
+                         f"not caching with the streaming {engine.name} engine")
+            return None
+        cache = RecognitionCache(self.recognition_cache_size, self.recognition_cache_threshold)
+        self.metrics.gauge("voice.cache_hit_rate", lambda: cache.hit_rate)
+        self.metrics.gauge("voice.cache_hits", lambda: cache.hits)
+        self.metrics.gauge("voice.cache_misses", lambda: cache.misses)
+        return cache
+
+    def update_matcher(self, commands: Dict[str, Callable]) -> None:
+        """Rebuild the phrase index; called whenever a command is added or removed."""
+        self.matcher = CommandMatcher(commands)
+
+    def update_grammar(self, commands: Iterable[str]) -> None:
+        """Recompile the decoder grammar from the command phrases; called whenever one is added or removed."""
+        if self.engine is not None and self.constrained_grammar:
+            # Dictation needs the full vocabulary
+            self.engine.set_grammar(None if self.dictation.active else build_grammar(commands))
+
+    def set_dictation(self, enabled: bool = True) -> None:
+        """Switch dictation mode on or off."""
+        if enabled:
+            self.dictation.start()
+        else:
+            self.dictation.stop()
+        logging.info(f"Dictation mode {'on' if enabled else 'off'}")
+        self.update_grammar(self.commands.phrases())
+
+    def dictate(self, text: str) -> str:
+        """
+        Type dictated text, one batched write per run of words.
+
+        Returns:
+            Text that followed a phrase ending dictation, to be run as commands.
+        """
+        actions, rest = self.dictation.translate(text)
+        for name, args in actions:
+            try:
+                with self.metrics.timer("voice.dispatch"):
+                    self.action_targets[name](*args)
+            except Exception as e:
+                logging.error(f"Error typing dictated text: {e}")
+        self.metrics.increment("voice.dictated_words", len(text.split()))
+        if rest is not None:
+            self.set_dictation(False)
+        return rest or ""
+
+    def execute_command(self, text: str) -> List[str]:
+        """
+        Run every command contained in recognized text, in spoken order.
+
+        In dictation mode the text is typed instead, until a phrase ending
+        dictation; whatever follows that phrase is run as commands. A
+        command switching dictation on likewise has the rest of its
+        utterance typed.
+
+        Returns:
+            The commands that were run, or ["stop"] if voice control was stopped.
+        """
+        logging.info(f"Command received: {text}")
+        if self.dictation.active and text.lower().strip() not in STOP_PHRASES:
+            text = self.dictate(text)
+            if not text:
+                return []
+        words = text.split()
+        text = text.lower()
+        if self.stop_matcher.scan(text)[0]:
+            logging.info("Stopping voice command system...")
+            self.stop_event.set()
+            self.audio_stream.close()
+            return ["stop"]
+
+        matches = self.matcher.scan(text)[0]
+        if not matches:
+            self.metrics.increment("voice.unknown_commands")
+            logging.warning(f"Unknown command: {text}")
+        commands = []
+        for _, end, cmd in matches:
+            self.run_commands([cmd])
+            commands.append(cmd)
+            if self.dictation.active:
+                rest = " ".join(words[end:])
+                if rest:
+                    commands += self.execute_command(rest)
+                break
+        return commands
+
+    def run_commands(self, commands: List[str]) -> None:
+        """Run already matched commands in order."""
+        for cmd in commands:
+            action = self.commands.get(cmd)
+            if action is None:  # Removed since it was matched
+                continue
+            logging.info(f"Executing command: {cmd}")
+            try:
+                with self.metrics.timer("voice.dispatch"):
+                    action()
+            except Exception as e:
+                logging.error(f"Error executing command '{cmd}': {e}")
+                continue
+            self.metrics.increment("voice.commands")
+            for listener in self.command_listeners:
+                listener(cmd)
+
+    def run_recognized(self, text: str, heard_at: Optional[float], skip: int = 0) -> None:
+        """
+        Hand recognized text to the dispatch thread.
+
+        Args:
+            skip: Number of leading commands of this utterance that already ran from a partial result.
+        """
+        if skip and not self.stop_matcher.scan(text)[0]:
+            # Only the words after the last command that already ran are left
+            matches = self.matcher.scan(text.lower())[0]
+            end = matches[min(skip, len(matches)) - 1][1] if matches else 0
+            text = " ".join(text.split()[end:])
+        self.submit(text, heard_at)
+
+    def submit(self, item, heard_at: Optional[float] = None) -> None:
+        """Dispatch recognized text or matched commands and record how long after speech onset they were recognized."""
+        if not item:
+            return
+        if heard_at is not None:
+            self.metrics.observe("voice.time_to_command", time.perf_counter() - heard_at)
+        if self.dispatch_thread and self.dispatch_thread.is_alive():
+            self.queue_command(item)
+        else:
+            # Replays decode without a dispatch thread and expect commands to run in place
+            self.dispatch_item(item)
+
+    def queue_command(self, item) -> None:
+        """
+        Queue recognized text, a Future that will produce it, or a list of
+        matched commands for dispatch.
+
+        Blocks while the queue is full rather than dropping an utterance;
+        the microphone keeps recording into its ring buffer meanwhile.
+        """
+        while not self.stop_event.is_set():
+            try:
+                self.command_queue.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                self.metrics.increment("voice.queue_full")
 
-    def end_drag(self):
-        """End dragging operation."""
+    def recognize_phrase(self, engine, audio) -> Optional[str]:
+        """
+        Worker task: recognize one phrase, returning None if nothing usable was heard.
+
+        Short phrases that sound like a recently confirmed command are
+        answered from the recognition cache. Everything else goes to the
+        engine, and phrases it recognizes as commands are added to the cache.
+        """
+        cache = self.recognition_cache if not self.dictation.active else None
+        fingerprint = None
+        if cache is not None:
+            with self.metrics.timer("voice.fingerprint"):
+                fingerprint = cache.fingerprint(audio.get_raw_data(convert_width=2), audio.sample_rate)
+            text = cache.lookup(fingerprint)
+            if text is not None:
+                logging.debug(f"Recognition cache hit: {text}")
+                return text
         try:
-            pyautogui.mouseUp()
+            with self.metrics.timer("voice.recognize"):
+                text = engine.recognize(audio)
+            if (fingerprint is not None and text and not self.stop_matcher.scan(text)[0]
+                    and self.matcher.find(text.lower())):
+                cache.store(fingerprint, text)
+            return text
+        except sr.UnknownValueError:
+            self.metrics.increment("voice.unrecognized")
+            logging.debug("Could not understand audio")
+        except sr.RequestError as e:
+            self.log_limiter.error("request_error", f"Speech recognition service error: {e}")
         except Exception as e:
-            logging.error(f"Error ending drag: {e}")
+            logging.error(f"Unexpected error in speech recognition: {e}")
+        return None
+
+    def dispatch_commands(self):
+        """Dispatch loop: run queued commands in the order they were spoken."""
+        while not self.stop_event.is_set():
+            item = self.command_queue.get()
+            if self.stop_event.is_set():
+                break
+            self.dispatch_item(item.result() if isinstance(item, Future) else item)
+
+    def dispatch_item(self, item) -> None:
+        if not item:
+            return
+        with self.command_lock:
+            if isinstance(item, list):
+                self.run_commands(item)
+            else:
+                self.execute_command(item)
+
+    def decode_stream(self, read_chunk: Callable[[], bytes], sample_rate: int) -> None:
+        """
+        Feed raw audio to the streaming engine and run commands as they are recognized.
+
+        With `early_fire` each command runs as soon as the partial hypothesis
+        settles on it, without waiting for the end of the utterance; commands
+        later in the same utterance follow as they are heard. Returns when
+        `read_chunk` returns no data or voice control is stopped.
+
+        Args:
+            read_chunk: Returns the next block of 16-bit mono PCM, or b"" at the end.
+            sample_rate: Sample rate of the audio in Hz.
+        """
+        engine = self.load_engine()
+        engine.start(sample_rate)
+        fired = 0  # Commands of the current utterance already run from partials
+        heard_at = None
+        while not self.stop_event.is_set():
+            chunk = read_chunk()
+            if not chunk:
+                text = engine.final()
+                if text:
+                    self.run_recognized(text, heard_at, skip=fired)
+                break
+            with self.metrics.timer("voice.decode"):
+                ended = engine.accept(chunk)
+            if ended:
+                text = engine.result()
+                if text:
+                    self.run_recognized(text, heard_at, skip=fired)
+                fired, heard_at = 0, None
+                continue
+            partial = engine.partial()
+            if not partial:
+                continue
+            if heard_at is None:
+                heard_at = time.perf_counter()
+            if not self.early_fire or self.dictation.active:
+                continue
+            # Like commands, a stop phrase only fires once later words cannot change it
+            if self.stop_matcher.settled(partial):
+                self.run_recognized(partial, heard_at)
+                continue
+            settled = self.matcher.settled(partial)
+            if len(settled) > fired:
+                self.metrics.increment("voice.early_fires")
+                self.submit(settled[fired:], heard_at)
+                fired = len(settled)
+
+    def process_streaming_commands(self):
+        """Streaming loop: decode the microphone stream continuously with the offline engine."""
+        while not self.stop_event.is_set():
+            try:
+                self.audio_stream.start()
+                logging.info("Listening for commands...")
+                self.decode_stream(self.audio_stream.read_chunk, self.audio_stream.sample_rate)
+            except Exception as e:
+                self.log_limiter.error("stream_error", f"Error in streaming voice recognition: {e}")
+            if not self.stop_event.is_set():
+                # The microphone went away; reopen it after a pause
+                self.stop_event.wait(1.0)
 
     def process_voice_commands(self):
         """
         Main loop for processing voice commands with improved error handling
         and noise reduction.
         """
-        while not self.stop_event.is_set():
-            with sr.Microphone() as source:
+        # Recognition threads started from here inherit the low priority
+        set_thread_priority(self.priority)
+        try:
+            engine = self.load_engine()
+        except Exception as e:
+            logging.error(f"Could not start speech engine: {e}")
+            self.stop_event.set()
+            return
+        self.dispatch_thread = Thread(target=self.dispatch_commands,
+                                      name="VoiceDispatchThread")
+        self.dispatch_thread.daemon = True
+        self.dispatch_thread.start()
+        try:
+            if engine.streaming:
+                self.process_streaming_commands()
+            else:
+                self.process_phrases(engine)
+        finally:
+            self.audio_stream.stop()
+            self.stop_event.set()
+            try:
+                self.command_queue.put_nowait(None)  # Wake the dispatch thread
+            except queue.Full:
+                pass
+            self.dispatch_thread.join(timeout=2)
+
+    def process_phrases(self, engine):
+        """
+        Phrase loop for batch engines.
+
+        This thread only segments phrases out of the microphone stream. Each
+        phrase is recognized on a worker pool and its result queued in
+        spoken order for the dispatch thread, so listening never waits for
+        recognition or commands and back-to-back phrases are all kept.
+        """
+        workers = max(1, self.recognizer_workers) if engine.concurrent else 1
+        self.audio_stream.start()
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="VoiceRecognizer") as pool:
+            while not self.stop_event.is_set():
                 try:
-                    self.recognizer.adjust_for_ambient_noise(
-                        source, duration=0.5)
-                    logging.info("Listening for commands...")
-                    audio = self.recognizer.listen(
-                        source, timeout=5, phrase_time_limit=3)
-
-                    with self.command_lock:
-                        command = self.recognizer.recognize_google(
-                            audio).lower()
-                        logging.info(f"Command received: {command}")
-
-                        if  "stop" in command:
-                            logging.info("Stopping voice command system...")
-                            self.stop_event.set()
-                            break
-
-                        for cmd, action in self.commands.items():
-                            if cmd in command:
-                                logging.info(f"Executing command: {cmd}")
-                                action()
-                                break
-                        else:
-                            logging.warning(f"Unknown command: {command}")
+                    self.log_limiter.info("listening", "Listening for commands...")
+                    started = time.perf_counter()
+                    audio = self.audio_stream.listen(
+                        timeout=5, phrase_time_limit=3, pause_threshold=self.pause_threshold)
+                    # Timeouts are not recorded, so this is the time to capture a phrase
+                    self.metrics.observe("voice.listen", time.perf_counter() - started)
+                    self.queue_command(pool.submit(self.recognize_phrase, engine, audio))
 
                 except sr.WaitTimeoutError:
+                    self.metrics.increment("voice.listen_timeouts")
                     continue
-                except sr.UnknownValueError:
-                    logging.debug("Could not understand audio")
-                except sr.RequestError as e:
-                    logging.error(f"Speech recognition service error: {e}")
+                except EOFError:
+                    if not self.stop_event.is_set():
+                        # The microphone went away; reopen it after a pause
+                        self.stop_event.wait(1.0)
+                        self.audio_stream.start()
                 except Exception as e:
                     logging.error(
                         f"Unexpected error in voice command processing: {e}")
 
-                time.sleep(0.05)  # Reduced delay
+    def load_config(self):
+        """Load configuration from JSON file or create with defaults if not exists."""
+        try:
+            if os.path.exists(self.config_path):
+                with open(self.config_path, 'r') as f:
+                    try:
+                        self.default_config.update(json.load(f))
+                        logging.info("Voice configuration loaded successfully")
+                    except json.JSONDecodeError as e:
+                        logging.error(f"Error decoding voice configuration: {e}. Using default settings.")
+            else:
+                self.save_config(self.default_config)
+        except Exception as e:
+            logging.error(f"Error loading voice configuration: {e}")
+        for key, value in self.default_config.items():
+            setattr(self, key, value)
+
+    def save_config(self, config: Optional[dict] = None):
+        """Save current configuration to JSON file."""
+        try:
+            if config is None:
+                config = {key: getattr(self, key) for key in self.default_config}
+            with open(self.config_path, 'w') as f:
+                json.dump(config, f, indent=4)
+            logging.info("Voice configuration saved successfully")
+        except Exception as e:
+            logging.error(f"Error saving voice configuration: {e}")
 
     def start(self):
         """Start the voice controller in a separate thread."""
         if self.voice_thread is None or not self.voice_thread.is_alive():
-            self.stop_event.clear()
             self.voice_thread = Thread(
                 target=self.process_voice_commands, name="VoiceControlThread")
             self.voice_thread.daemon = True
             self.voice_thread.start()
+            self.command_watcher.start()
             logging.info("Voice control thread started")
 
     def stop(self):
         """Stop the voice controller thread."""
         self.stop_event.set()
+        self.command_watcher.stop()
+        self.audio_stream.close()  # Wake the thread if it is waiting for audio
         if self.voice_thread and self.voice_thread.is_alive():
             self.voice_thread.join(timeout=5)
             logging.info("Voice control thread stopped")
@@ -0,0 +1,83 @@
+"""
+Offline replay of recorded voice commands.
+
+Streams WAV files (16-bit mono PCM) through VoiceController's decoder as if
+they came from the microphone, with input injected into an in-memory
+recorder. Needs no microphone and, with the offline engine, no network:
+
+    python voicereplay.py copy.wav switch_window.wav
+    python voicereplay.py --expect "scroll up" scroll_up.wav
+"""
+import argparse
+import logging
+import sys
+import time
+import wave
+
+from inputdispatcher import InputDispatcher, RecordingBackend
+from voicecontroller import VoiceController, CHUNK_SIZE
+
+logger = logging.getLogger(__name__)
+
+
+def replay_wav(controller: VoiceController, path: str) -> dict:
+    """Decode one WAV file and return the commands it triggered."""
+    fired = []
+    position = [0]  # Frames fed to the decoder so far
+
+    def read_chunk():
+        chunk = wav.readframes(CHUNK_SIZE)
+        position[0] += len(chunk) // 2
+        return chunk
+
+    # Report where in the audio each command fired, not how fast the file decoded
+    listener = lambda cmd: fired.append((cmd, position[0] / wav.getframerate()))
+    controller.command_listeners.append(listener)
+    try:
+        with wave.open(path, 'rb') as wav:
+            if wav.getsampwidth() != 2 or wav.getnchannels() != 1:
+                raise ValueError(f"{path}: expected 16-bit mono PCM")
+            duration = wav.getnframes() / wav.getframerate()
+            controller.stop_event.clear()
+            started = time.perf_counter()
+            controller.decode_stream(read_chunk, wav.getframerate())
+            elapsed = time.perf_counter() - started
+    finally:
+        controller.command_listeners.remove(listener)
+    return {
+        "file": path,
+        "audio_s": round(duration, 3),
+        "decode_s": round(elapsed, 3),
+        "commands": [cmd for cmd, _ in fired],
+        "fired_at_s": [round(at, 3) for _, at in fired],
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Replay WAV files through the voice command decoder.")
+    parser.add_argument("wavs", nargs="+", help="16-bit mono WAV files")
+    parser.add_argument("--engine", default="vosk", help="Speech engine (default: vosk)")
+    parser.add_argument("--no-early-fire", action="store_true",
+                        help="Only act on complete utterances")
+    parser.add_argument("--expect", action="append", default=[],
+                        help="Command expected from each file, in order; exit 1 on a mismatch")
+    args = parser.parse_args(argv)
+
+    backend = RecordingBackend()
+    InputDispatcher().set_backend(backend)
+    controller = VoiceController(config_overrides={"speech_engine": args.engine,
+                                                   "early_fire": not args.no_early_fire})
+    failures = 0
+    for index, path in enumerate(args.wavs):
+        result = replay_wav(controller, path)
+        print(f"{result['file']}: {result['commands'] or 'no command'} "
+              f"(fired at {result['fired_at_s']}s, {result['audio_s']}s of audio "
+              f"decoded in {result['decode_s']}s)")
+        if index < len(args.expect) and args.expect[index] not in result["commands"]:
+            print(f"  expected '{args.expect[index]}'")
+            failures += 1
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())